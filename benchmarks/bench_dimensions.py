@@ -0,0 +1,146 @@
+"""
+Inline agent/address text versus the agents/addresses dimensions.
+
+Persists the same --rows synthetic companies through persist_companies twice,
+into two scratch schemas of the configured Postgres (POSTGRES_* / DATABASE_URL):
+once inline and once with COMPANY_DIMENSIONS on. Agents and addresses are
+drawn from small skewed pools, the way a handful of registered-agent services
+cover most filings. Reports table+index size, WAL written by the load and
+the time to read every row back for export (companies vs companies_expanded).
+The scratch schemas are dropped afterwards.
+
+    python -m benchmarks.bench_dimensions --rows 500000 --agents 5000
+"""
+import argparse
+import asyncio
+import logging
+import random
+import time
+from datetime import date, timedelta
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import async_sessionmaker
+from logger import logger
+from models import Address, Agent, Company, create_engine_from_env
+from models.dimensions import VIEW, init_dimensions
+import scraper.utils as utils
+
+SCHEMAS = {"inline": "bench_dim_inline", "dimensions": "bench_dim_keys"}
+STREETS = ["MAIN ST", "STATE ST", "BROADWAY", "PARK AVE", "5TH AVE", "WALL ST", "CENTRAL AVE"]
+CITIES = ["ALBANY", "NEW YORK", "BROOKLYN", "BUFFALO", "ROCHESTER", "YONKERS", "SYRACUSE"]
+
+
+def make_pools(args, rng: random.Random) -> tuple[list[tuple], list[dict]]:
+    addresses = [
+        (f"{rng.randrange(1, 999)} {rng.choice(STREETS)}", rng.choice(CITIES), "NY", f"1{rng.randrange(0, 10000):04d}", "UNITED STATES")
+        for _ in range(args.addresses)
+    ]
+    agents = [
+        {"name": f"AGENT SERVICE {i} INC", "address": rng.choice(addresses)}
+        for i in range(args.agents)
+    ]
+    return addresses, agents
+
+
+def make_rows(args, seed: int = 1) -> list[list[Company]]:
+    rng = random.Random(seed)
+    addresses, agents = make_pools(args, rng)
+    # skewed: low indexes (the big agent services, busy office buildings) dominate
+    pick = lambda pool: pool[min(len(pool) - 1, int(rng.paretovariate(1.2)) - 1)]
+    today = date.today()
+    batches, batch = [], []
+    for i in range(1, args.rows + 1):
+        principal = pick(addresses) if rng.random() < 0.8 else rng.choice(addresses)
+        agent = pick(agents)
+        mailing = principal if rng.random() < 0.6 else None
+        batch.append(Company(
+            source_state="NY",
+            entity_number=i,
+            entity_name=f"BENCH COMPANY {i} LLC",
+            entity_type="DOMESTIC LIMITED LIABILITY COMPANY",
+            status="Active",
+            registration_date=today - timedelta(days=rng.randrange(0, 30)),
+            **{f"principal_{f}": v for f, v in zip(("street", "city", "state", "postal_code", "country"), principal)},
+            **{f"mailing_{f}": (v if mailing else None) for f, v in zip(("street", "city", "state", "postal_code", "country"), principal)},
+            agent_name=agent["name"],
+            **{f"agent_{f}": v for f, v in zip(("street", "city", "state", "postal_code", "country"), agent["address"])},
+            previous_names=[],
+            source_last_seen_at=today,
+        ))
+        if len(batch) == args.batch_size:
+            batches.append(batch)
+            batch = []
+    if batch:
+        batches.append(batch)
+    return batches
+
+
+async def run(mode: str, args) -> dict:
+    schema = SCHEMAS[mode]
+    engine = create_engine_from_env(application_name="bench_dimensions", server_settings={"search_path": schema})
+    sessions = async_sessionmaker(engine, expire_on_commit=False)
+    try:
+        async with engine.begin() as conn:
+            await conn.execute(text(f"DROP SCHEMA IF EXISTS {schema} CASCADE"))
+            await conn.execute(text(f"CREATE SCHEMA {schema}"))
+            for model in (Company, Agent, Address):
+                await conn.run_sync(model.__table__.create)
+            await init_dimensions(conn)
+            start_lsn = (await conn.execute(text("SELECT pg_current_wal_lsn()"))).scalar()
+
+        utils.COMPANY_DIMENSIONS = mode == "dimensions"
+        started = time.perf_counter()
+        for batch in make_rows(args):
+            async with sessions() as db:
+                await utils.persist_companies(batch, db=db)
+        load = time.perf_counter() - started
+
+        async with engine.begin() as conn:
+            wal = (await conn.execute(
+                text("SELECT pg_wal_lsn_diff(pg_current_wal_lsn(), :start)"), {"start": start_lsn}
+            )).scalar()
+            await conn.execute(text("ANALYZE"))
+            sizes = (await conn.execute(text("""
+                SELECT sum(pg_table_size(c.oid)), sum(pg_indexes_size(c.oid))
+                FROM pg_class c JOIN pg_namespace n ON n.oid = c.relnamespace
+                WHERE n.nspname = :schema AND c.relkind = 'r'
+            """), {"schema": schema})).one()
+
+        # what the daily export reads: the table itself before dimensions, the view with them
+        source = VIEW if mode == "dimensions" else "companies"
+        timings = []
+        for _ in range(args.repeat):
+            async with engine.connect() as conn:
+                started = time.perf_counter()
+                rows = (await conn.execute(text(f"SELECT * FROM {source}"))).mappings().all()
+                timings.append(time.perf_counter() - started)
+        return {
+            "load_s": load, "wal_mb": float(wal) / 2**20,
+            "table_mb": sizes[0] / 2**20, "index_mb": sizes[1] / 2**20,
+            "export_s": min(timings), "rows": len(rows),
+        }
+    finally:
+        async with engine.begin() as conn:
+            await conn.execute(text(f"DROP SCHEMA IF EXISTS {schema} CASCADE"))
+        await engine.dispose()
+
+
+async def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rows", type=int, default=500_000)
+    parser.add_argument("--agents", type=int, default=5_000)
+    parser.add_argument("--addresses", type=int, default=50_000)
+    parser.add_argument("--batch-size", type=int, default=2_000)
+    parser.add_argument("--repeat", type=int, default=3, help="export reads, best is reported")
+    args = parser.parse_args()
+    # one line per persisted batch would drown the report
+    logger.setLevel(logging.WARNING)
+
+    results = {mode: await run(mode, args) for mode in SCHEMAS}
+    print(f"rows={args.rows} agents={args.agents} addresses={args.addresses}")
+    print(f"{'':<12}{'table MB':>10}{'index MB':>10}{'WAL MB':>10}{'load s':>9}{'export s':>10}")
+    for mode, r in results.items():
+        print(f"{mode:<12}{r['table_mb']:10.1f}{r['index_mb']:10.1f}{r['wal_mb']:10.1f}{r['load_s']:9.2f}{r['export_s']:10.2f}")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,169 @@
+"""
+Event loop backends (see event_loop) on the crawl's HTTP hot path.
+
+Starts the DOS stand-in in its own process, then for each backend runs a
+fresh client process that keeps --concurrency searches in flight through
+scraper.utils.post_json for --duration seconds (after --warmup) and samples
+event-loop lag every --lag-interval seconds. Reports requests/sec, lag
+p50/p99/max and client CPU time per request.
+
+    python -m benchmarks.bench_event_loop --concurrency 200 --duration 20
+    python -m benchmarks.bench_event_loop --backends asyncio --json   # one row, for CI
+"""
+import argparse
+import asyncio
+import json
+import os
+import socket
+import subprocess
+import sys
+import time
+import event_loop
+from benchmarks.dos_standin import API_PATH
+
+PREFIXES = [a + b for a in "ABCDEFGHIJKLMNOPQRSTUVWXYZ" for b in "ABCDEFGHIJKLMNOPQRSTUVWXYZ"]
+
+
+def _percentile(values: list[float], q: float) -> float:
+    values = sorted(values)
+    return values[min(len(values) - 1, int(q / 100 * len(values)))]
+
+
+async def client(args) -> dict:
+    import aiohttp
+    from scraper import utils
+
+    url = f"{args.url}{API_PATH}/GetComplexSearchMatchingEntities"
+    semaphore = asyncio.Semaphore(args.concurrency)
+    completed = failed = 0
+    measuring = False
+    lag: list[float] = []
+    stop = asyncio.Event()
+
+    async def sample_lag():
+        while not stop.is_set():
+            expected = time.perf_counter() + args.lag_interval
+            await asyncio.sleep(args.lag_interval)
+            if measuring:
+                lag.append(max(time.perf_counter() - expected, 0.0))
+
+    async def worker(i: int):
+        nonlocal completed, failed
+        n = i
+        while not stop.is_set():
+            body = {"searchValue": PREFIXES[n % len(PREFIXES)], "searchByTypeIndicator": "EntityName"}
+            n += args.concurrency
+            try:
+                await utils.post_json(session, url, body, semaphore=semaphore, hedge=False, max_retries=1)
+                if measuring:
+                    completed += 1
+            except Exception:
+                if measuring:
+                    failed += 1
+
+    connector = aiohttp.TCPConnector(limit=args.concurrency)
+    async with aiohttp.ClientSession(connector=connector) as session:
+        tasks = [asyncio.create_task(worker(i)) for i in range(args.concurrency)]
+        sampler = asyncio.create_task(sample_lag())
+        await asyncio.sleep(args.warmup)
+        measuring = True
+        cpu, wall = time.process_time(), time.perf_counter()
+        await asyncio.sleep(args.duration)
+        measuring = False
+        cpu, wall = time.process_time() - cpu, time.perf_counter() - wall
+        stop.set()
+        await asyncio.gather(*tasks, sampler, return_exceptions=True)
+
+    return {
+        "backend": event_loop.loop_name(),
+        "requests": completed,
+        "failed": failed,
+        "rps": completed / wall,
+        "lag_p50_ms": _percentile(lag, 50) * 1000 if lag else None,
+        "lag_p99_ms": _percentile(lag, 99) * 1000 if lag else None,
+        "lag_max_ms": max(lag) * 1000 if lag else None,
+        "cpu_us_per_request": cpu / completed * 1e6 if completed else None,
+    }
+
+
+def free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def wait_for_port(port: int, timeout: float = 15):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            socket.create_connection(("127.0.0.1", port), timeout=0.2).close()
+            return
+        except OSError:
+            time.sleep(0.1)
+    raise RuntimeError(f"stand-in did not come up on port {port}")
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--backends", default="asyncio,uvloop")
+    parser.add_argument("--concurrency", type=int, default=200)
+    parser.add_argument("--duration", type=float, default=20)
+    parser.add_argument("--warmup", type=float, default=3)
+    parser.add_argument("--lag-interval", type=float, default=0.01)
+    parser.add_argument("--median-ms", type=float, default=5, help="stand-in latency")
+    parser.add_argument("--server-loop", default="auto", help="the stand-in's own loop, kept out of the comparison")
+    parser.add_argument("--json", action="store_true", help="print one JSON object per backend")
+    # internal: run as the measured client process
+    parser.add_argument("--client", help=argparse.SUPPRESS)
+    parser.add_argument("--url", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.client:
+        print(json.dumps(event_loop.run(client(args), args.client)))
+        return 0
+
+    port = free_port()
+    env = {**os.environ, "LOG_LEVEL": "WARNING"}
+    server = subprocess.Popen(
+        [sys.executable, "-m", "benchmarks.dos_standin", "--port", str(port),
+         "--median-ms", str(args.median_ms), "--loop", args.server_loop],
+        stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL, env=env,
+    )
+    try:
+        wait_for_port(port)
+        results = []
+        for backend in filter(None, args.backends.split(",")):
+            out = subprocess.run(
+                [sys.executable, "-m", "benchmarks.bench_event_loop", "--client", backend,
+                 "--url", f"http://127.0.0.1:{port}", "--concurrency", str(args.concurrency),
+                 "--duration", str(args.duration), "--warmup", str(args.warmup),
+                 "--lag-interval", str(args.lag_interval)],
+                capture_output=True, text=True, check=True, env=env,
+            ).stdout
+            result = json.loads(out.strip().splitlines()[-1])
+            result["requested"] = backend
+            results.append(result)
+    finally:
+        server.terminate()
+        server.wait()
+
+    if args.json:
+        for r in results:
+            print(json.dumps(r))
+        return 0
+    print(f"concurrency={args.concurrency} duration={args.duration:g}s stand-in median={args.median_ms:g}ms")
+    print(f"{'backend':<9}{'req/s':>9}{'failed':>8}{'lag p50':>10}{'lag p99':>10}{'lag max':>10}{'CPU/req':>11}")
+    fmt = lambda v, unit: f"{v:.2f}{unit}" if v is not None else "-"
+    for r in results:
+        print(
+            f"{r['backend']:<9}{r['rps']:9.0f}{r['failed']:8d}{fmt(r['lag_p50_ms'], 'ms'):>10}"
+            f"{fmt(r['lag_p99_ms'], 'ms'):>10}{fmt(r['lag_max_ms'], 'ms'):>10}{fmt(r['cpu_us_per_request'], 'us'):>11}"
+        )
+    missing = [r["requested"] for r in results if r["requested"] != "auto" and r["backend"] != r["requested"]]
+    if missing:
+        print(f"note: {', '.join(missing)} not available, ran on the asyncio loop instead")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
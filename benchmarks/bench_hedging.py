@@ -0,0 +1,88 @@
+"""
+Tail latency of batched detail fetches with and without hedging.
+
+Runs batches of detail requests through post_json against the local stand-in
+with a small stall rate, and reports batch p50/p99 and total request volume.
+Hedging must not add more than --max-extra-pct requests over the unhedged run;
+exits 1 when it does.
+
+    python -m benchmarks.bench_hedging --batches 50 --stall-rate 0.01
+"""
+import argparse
+import asyncio
+import sys
+import time
+import aiohttp
+from benchmarks.dos_standin import API_PATH, StandinConfig, start
+from scraper import utils
+from scraper.latency import HedgeBudget, LatencyTracker
+
+
+async def run(hedge: bool, args) -> dict:
+    config = StandinConfig(stall_rate=args.stall_rate, stall_seconds=args.stall_seconds)
+    runner, base_url = await start(config)
+    utils.latency = LatencyTracker(min_samples=20, max_timeout=args.stall_seconds * 2, default_timeout=args.stall_seconds * 2)
+    semaphore = asyncio.Semaphore(args.concurrency)
+    url = f"{base_url}{API_PATH}/GetEntityRecordByID"
+    durations = []
+    try:
+        async with aiohttp.ClientSession() as session:
+            # warm the latency tracker with stall-free traffic so percentiles exist before measuring
+            stall_rate, config.stall_rate = config.stall_rate, 0.0
+            await asyncio.gather(*(
+                utils.post_json(session, url, {"SearchID": i}, semaphore=semaphore, hedge=False)
+                for i in range(args.warmup)
+            ))
+            config.stall_rate, config.requests = stall_rate, 0
+            utils.hedge_budget = HedgeBudget(ratio=args.budget)
+
+            for b in range(args.batches):
+                started = time.perf_counter()
+                await asyncio.gather(*(
+                    utils.post_json(session, url, {"SearchID": b * 1000 + i}, semaphore=semaphore, hedge=hedge, max_retries=2)
+                    for i in range(args.batch_size)
+                ), return_exceptions=True)
+                durations.append(time.perf_counter() - started)
+    finally:
+        await runner.cleanup()
+    durations.sort()
+    return {
+        "hedge": hedge,
+        "p50": durations[len(durations) // 2],
+        "p99": durations[min(len(durations) - 1, int(len(durations) * 0.99))],
+        "requests": config.requests,
+        "hedges": utils.hedge_budget.hedges,
+    }
+
+
+async def main() -> int:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--batches", type=int, default=50)
+    parser.add_argument("--batch-size", type=int, default=24)
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--stall-rate", type=float, default=0.01)
+    parser.add_argument("--stall-seconds", type=float, default=5.0)
+    parser.add_argument("--budget", type=float, default=utils.hedge_budget.ratio, help="HEDGE_BUDGET_RATIO")
+    parser.add_argument("--max-extra-pct", type=float, default=5.0, help="allowed request increase from hedging")
+    parser.add_argument("--warmup", type=int, default=200)
+    args = parser.parse_args()
+    results = []
+    for hedge in (False, True):
+        r = await run(hedge, args)
+        results.append(r)
+        print(
+            f"hedge={r['hedge']!s:5} batch p50={r['p50']:.3f}s p99={r['p99']:.3f}s "
+            f"requests={r['requests']} hedges={r['hedges']}"
+        )
+    plain, hedged = results
+    extra = (hedged["requests"] / plain["requests"] - 1) * 100
+    over = extra > args.max_extra_pct
+    print(
+        f"p99 {plain['p99']:.3f}s -> {hedged['p99']:.3f}s, requests +{extra:.1f}% "
+        f"(cap {args.max_extra_pct:g}%): {'EXCEEDED' if over else 'ok'}"
+    )
+    return 1 if over else 0
+
+
+if __name__ == "__main__":
+    sys.exit(asyncio.run(main()))
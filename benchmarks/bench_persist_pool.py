@@ -0,0 +1,94 @@
+"""
+Persist throughput versus connection pool size.
+
+Runs persist_companies from several concurrent workers against a scratch
+schema in the configured Postgres (POSTGRES_* / DATABASE_URL), once per pool
+size, and reports rows per second. The scratch schema is dropped afterwards.
+
+    python -m benchmarks.bench_persist_pool --pool-sizes 1,2,5,10,20 --workers 16
+"""
+import argparse
+import asyncio
+import itertools
+import time
+from datetime import date
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import async_sessionmaker
+from models import Company, create_engine_from_env
+from scraper.utils import persist_companies
+
+SCHEMA = "bench_persist"
+entity_numbers = itertools.count(1)
+
+
+def make_companies(n: int) -> list[Company]:
+    return [
+        Company(
+            source_state="NY",
+            entity_number=next(entity_numbers),
+            entity_name=f"BENCH COMPANY {i} LLC",
+            entity_type="DOMESTIC LIMITED LIABILITY COMPANY",
+            status="Active",
+            registration_date=date.today(),
+            principal_street="1 MAIN ST",
+            principal_city="ALBANY",
+            principal_state="NY",
+            agent_name="BENCH AGENT INC",
+            previous_names=[],
+            source_last_seen_at=date.today(),
+        )
+        for i in range(n)
+    ]
+
+
+async def run(pool_size: int, args) -> float:
+    engine = create_engine_from_env(
+        application_name="bench_persist",
+        server_settings={"search_path": SCHEMA},
+        pool_size=pool_size,
+        max_overflow=0,
+    )
+    sessions = async_sessionmaker(engine, expire_on_commit=False)
+    async with engine.begin() as conn:
+        await conn.execute(text(f"CREATE SCHEMA IF NOT EXISTS {SCHEMA}"))
+        await conn.run_sync(Company.__table__.create, checkfirst=True)
+        await conn.execute(text(f"TRUNCATE {SCHEMA}.companies"))
+
+    batches = [make_companies(args.batch_size) for _ in range(args.batches)]
+    queue = asyncio.Queue()
+    for batch in batches:
+        queue.put_nowait(batch)
+
+    async def worker():
+        while not queue.empty():
+            batch = queue.get_nowait()
+            async with sessions() as db:
+                await persist_companies(batch, db=db)
+
+    started = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(args.workers)))
+    elapsed = time.perf_counter() - started
+    await engine.dispose()
+    return args.batches * args.batch_size / elapsed
+
+
+async def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--pool-sizes", default="1,2,5,10,20")
+    parser.add_argument("--workers", type=int, default=16)
+    parser.add_argument("--batches", type=int, default=400)
+    parser.add_argument("--batch-size", type=int, default=25)
+    args = parser.parse_args()
+    try:
+        for pool_size in map(int, args.pool_sizes.split(",")):
+            rate = await run(pool_size, args)
+            print(f"pool_size={pool_size:3d} workers={args.workers} {rate:10.0f} rows/s")
+    finally:
+        engine = create_engine_from_env(application_name="bench_persist")
+        async with engine.begin() as conn:
+            await conn.execute(text(f"DROP SCHEMA IF EXISTS {SCHEMA} CASCADE"))
+        await engine.dispose()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,94 @@
+"""
+Throughput of the export validation/normalisation stage (exporter.quality).
+
+Builds --rows synthetic company rows with the usual mess (padded and
+lower-case names, full state names, ZIPs that lost their leading zero,
+ZIP+4 without a dash, out-of-range dates), then times normalize_frame on
+--chunk sized frames and a full export_data run with and without validation.
+
+    python -m benchmarks.bench_quality --rows 1000000 --chunk 50000
+"""
+import argparse
+import random
+import tempfile
+import time
+from datetime import date, timedelta
+import pandas as pd
+import exporter.export_utils as export_utils
+from exporter.quality import QualityStats, normalize_frame
+
+STATES = ["NY", "New York", "ny", "N.Y.", "NJ", "new jersey", "CA", "ONTARIO", None]
+ZIPS = ["12207", "7302", "122071234", "12207-1234", " 10001 ", "ABC", None]
+COUNTRIES = ["United States", "USA", "US", "united states of america", "CANADA", None]
+
+
+def make_rows(n: int, seed: int = 1) -> list[dict]:
+    rng = random.Random(seed)
+    today = date.today()
+    rows = []
+    for i in range(n):
+        registered = today - timedelta(days=rng.randrange(0, 20000))
+        rows.append({
+            "source_state": "NY",
+            "entity_number": i,
+            "entity_name": rng.choice(["  acme  holdings llc", "ACME HOLDINGS LLC", "Acme   Holdings, LLC "]) + str(i),
+            "entity_type": "DOMESTIC LIMITED LIABILITY COMPANY",
+            "status": rng.choice(["Active", "ACTIVE", "Inactive - Dissolution"]),
+            "registration_date": registered if rng.random() > 0.001 else date(1799, 12, 31),
+            "next_filing_date": registered + timedelta(days=730),
+            "expiration_date": None if rng.random() > 0.01 else registered - timedelta(days=5),
+            "principal_street": "1 main st  ",
+            "principal_city": rng.choice(["albany", "ALBANY", " New York "]),
+            "principal_state": rng.choice(STATES),
+            "principal_postal_code": rng.choice(ZIPS),
+            "principal_country": rng.choice(COUNTRIES),
+            "mailing_street": None,
+            "mailing_city": None,
+            "mailing_state": None,
+            "mailing_postal_code": None,
+            "mailing_country": None,
+            "agent_name": rng.choice(["REGISTERED AGENTS INC", "registered agents inc ", "C T CORPORATION SYSTEM"]),
+            "agent_street": "90 STATE ST",
+            "agent_city": "ALBANY",
+            "agent_state": rng.choice(STATES),
+            "agent_postal_code": rng.choice(ZIPS),
+            "agent_country": rng.choice(COUNTRIES),
+            "incorporator_name": None,
+            "previous_names": [],
+            "source_last_seen_at": today,
+        })
+    return rows
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rows", type=int, default=1_000_000)
+    parser.add_argument("--chunk", type=int, default=50_000)
+    args = parser.parse_args()
+
+    rows = make_rows(args.rows)
+    frames = [pd.DataFrame(rows[i : i + args.chunk]) for i in range(0, len(rows), args.chunk)]
+
+    stats = QualityStats()
+    started = time.perf_counter()
+    for df in frames:
+        normalize_frame(df, stats)
+    elapsed = time.perf_counter() - started
+    print(f"normalize_frame   {args.rows / elapsed:12,.0f} rows/s  ({elapsed:.2f}s for {args.rows} rows)")
+
+    export_utils.EXPORT_CHUNK_ROWS = args.chunk
+    with tempfile.TemporaryDirectory() as tmp:
+        for validate in (False, True):
+            export_utils.EXPORT_VALIDATE = validate
+            started = time.perf_counter()
+            export_utils.export_data(rows, tmp)
+            elapsed = time.perf_counter() - started
+            label = "export+validate" if validate else "export only"
+            print(f"{label:<17} {args.rows / elapsed:12,.0f} rows/s  ({elapsed:.2f}s)")
+
+    for column in ("principal_state", "principal_postal_code", "registration_date", "expiration_date"):
+        print(column, stats.report()[column])
+
+
+if __name__ == "__main__":
+    main()
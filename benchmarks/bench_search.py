@@ -0,0 +1,144 @@
+"""
+Name search latency on a large synthetic companies table.
+
+Fills a scratch schema in the configured Postgres (POSTGRES_* / DATABASE_URL)
+with --rows synthetic companies, builds the search columns and indexes from
+models.search, then times exporter.search.search_companies for exact names,
+misspelled names (fuzzy, needs pg_trgm), agent names and second pages.
+The scratch schema is dropped afterwards unless --keep is given.
+
+    python -m benchmarks.bench_search --rows 2000000 --queries 200
+"""
+import argparse
+import asyncio
+import random
+import statistics
+import time
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import async_sessionmaker
+from models import Company, create_engine_from_env
+from models.search import init_search
+import exporter.search as search
+
+SCHEMA = "bench_search"
+SYLLABLES = ["ka", "lo", "mer", "tin", "ro", "vex", "an", "dor", "li", "sa", "qu", "bel", "nor", "ti", "gra", "phe", "us", "zen", "mo", "har"]
+
+# word(x) = three syllables picked by x, so names come from 8000 distinct words
+WORD = "(s[1 + (({x}) % 20)] || s[1 + (({x}) / 20 % 20)] || s[1 + (({x}) / 400 % 20)])"
+
+FILL = f"""
+    INSERT INTO companies (
+        source_state, entity_number, entity_name, entity_type, status,
+        agent_name, previous_names, source_last_seen_at
+    )
+    SELECT
+        'NY',
+        g,
+        upper({WORD.format(x="w1")} || ' ' || {WORD.format(x="w2")}) || ' ' || (ARRAY['LLC', 'INC', 'CORP', 'LP'])[1 + g % 4],
+        'DOMESTIC LIMITED LIABILITY COMPANY',
+        'Active',
+        upper({WORD.format(x="w3")}) || (ARRAY[' REGISTERED AGENTS INC', ' AGENT SERVICES LLC', ' CORPORATE SERVICES CORP', ' LAW GROUP PC'])[1 + w2 % 4],
+        CASE WHEN g % 10 = 0 THEN ARRAY[upper({WORD.format(x="w3")} || ' ' || {WORD.format(x="w1")} || ' LLC')] ELSE ARRAY[]::varchar[] END,
+        CURRENT_DATE
+    FROM (
+        SELECT g,
+            floor(random() * 8000)::int AS w1,
+            floor(random() * 8000)::int AS w2,
+            floor(random() * 8000)::int AS w3
+        FROM generate_series(CAST(:first AS int), CAST(:last AS int)) g
+    ) r, (SELECT ARRAY[{", ".join(f"'{s}'" for s in SYLLABLES)}] AS s) syllables
+"""
+
+
+def misspell(name: str, rng: random.Random) -> str:
+    """Drops one letter of the first word, the kind of typo fuzzy search is for."""
+    first, _, rest = name.partition(" ")
+    i = rng.randrange(1, len(first))
+    return f"{first[:i]}{first[i + 1:]} {rest}"
+
+
+def report(label: str, timings: list[float]):
+    timings = sorted(timings)
+    p = lambda q: timings[min(len(timings) - 1, int(q / 100 * len(timings)))] * 1000
+    print(f"{label:<16} n={len(timings):4d} p50={p(50):7.2f}ms p95={p(95):7.2f}ms p99={p(99):7.2f}ms mean={statistics.mean(timings) * 1000:7.2f}ms")
+
+
+async def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rows", type=int, default=2_000_000)
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--chunk", type=int, default=250_000)
+    parser.add_argument("--keep", action="store_true", help="keep the scratch schema (and its data) for another run")
+    args = parser.parse_args()
+
+    engine = create_engine_from_env(
+        application_name="bench_search",
+        server_settings={"search_path": f"{SCHEMA}, public"},
+    )
+    sessions = async_sessionmaker(engine, expire_on_commit=False)
+    try:
+        async with engine.begin() as conn:
+            await conn.execute(text(f"CREATE SCHEMA IF NOT EXISTS {SCHEMA}"))
+            # public stays on the search_path for pg_trgm, so name the schema explicitly
+            await conn.run_sync(lambda sync_conn: Company.__table__.create(
+                sync_conn.execution_options(schema_translate_map={None: SCHEMA}), checkfirst=True
+            ))
+            existing = (await conn.execute(text(f"SELECT count(*) FROM {SCHEMA}.companies"))).scalar()
+
+        if existing < args.rows:
+            started = time.perf_counter()
+            for first in range(existing + 1, args.rows + 1, args.chunk):
+                async with engine.begin() as conn:
+                    await conn.execute(text("SELECT setseed(:seed)"), {"seed": first / (args.rows + 1)})
+                    await conn.execute(text(FILL), {"first": first, "last": min(first + args.chunk - 1, args.rows)})
+            print(f"filled {args.rows - existing} rows in {time.perf_counter() - started:.1f}s")
+
+        started = time.perf_counter()
+        async with engine.begin() as conn:
+            await init_search(conn)
+            await conn.execute(text("ANALYZE companies"))
+        print(f"search columns and indexes ready in {time.perf_counter() - started:.1f}s")
+
+        rng = random.Random(1)
+        async with sessions() as db:
+            trigram = await search.trigram_available(db)
+            sample = (await db.execute(
+                text("SELECT entity_name, agent_name FROM companies TABLESAMPLE SYSTEM (1) LIMIT :n"),
+                {"n": args.queries},
+            )).all()
+        print(f"rows={args.rows} pg_trgm={'yes' if trigram else 'no (full-text only)'}")
+
+        cases = {
+            "exact name": [name for name, _ in sample],
+            "agent name": [agent for _, agent in sample],
+        }
+        if trigram:
+            cases["misspelled name"] = [misspell(name, rng) for name, _ in sample]
+
+        async with sessions() as db:
+            for label, queries in cases.items():
+                await search.search_companies(db, queries[0])  # warm-up
+                timings, cursors = [], []
+                for q in queries:
+                    started = time.perf_counter()
+                    _, cursor = await search.search_companies(db, q, limit=20)
+                    timings.append(time.perf_counter() - started)
+                    if cursor:
+                        cursors.append((q, cursor))
+                report(label, timings)
+                if cursors:
+                    timings = []
+                    for q, cursor in cursors:
+                        started = time.perf_counter()
+                        await search.search_companies(db, q, limit=20, cursor=cursor)
+                        timings.append(time.perf_counter() - started)
+                    report(f"  page 2", timings)
+    finally:
+        if not args.keep:
+            async with engine.begin() as conn:
+                await conn.execute(text(f"DROP SCHEMA IF EXISTS {SCHEMA} CASCADE"))
+        await engine.dispose()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,99 @@
+"""
+Import cost of the process entrypoints, from `python -X importtime`.
+
+Each entrypoint's modules are imported in a fresh interpreter --runs times;
+the report shows the median total import time, the slowest modules (self
+time) and whether any module that has no business loading at startup did
+(pandas, NumPy, pyarrow, the exporter, zstandard). The "errors" entrypoint
+also creates the day's crawl error counter the way the first failed request
+does, so a lazy import on that path is caught too. Exits 1 when a forbidden
+module loads or an entrypoint's median exceeds its --budget-ms, so it can
+gate CI.
+
+    python -m benchmarks.bench_startup --runs 10
+    python -m benchmarks.bench_startup --budget-ms crawl=900,health=60
+"""
+import argparse
+import statistics
+import subprocess
+import sys
+from collections import defaultdict
+
+# what each process imports before doing any work
+ENTRYPOINTS = {
+    "crawl": ["scraper.crawl", "scraper.engine", "scraper.new_york_scrapper"],
+    "runner": ["scraper.scraper_runner"],
+    "health": ["scraper.health"],
+    "errors": ["scraper.utils"],
+}
+# run after the imports: code paths that may import lazily mid-crawl
+AFTER_IMPORT = {
+    "errors": "import datetime, tempfile; scraper.utils._errors_file('NY', datetime.date.today(), tempfile.mkdtemp())",
+}
+FORBIDDEN = ["pandas", "numpy", "pyarrow", "exporter", "zstandard"]
+
+
+def import_times(modules: list[str], after: str = "") -> dict[str, tuple[int, int]]:
+    """module -> (self us, cumulative us) for one cold interpreter."""
+    # the runner sets up its log file under /app/logs at import, like in the container
+    code = "import " + ", ".join(modules) + (f"; {after}" if after else "")
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", code],
+        capture_output=True, text=True, check=True,
+    )
+    times = {}
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "imported package" in line:
+            continue
+        self_us, cumulative_us, name = line[len("import time:"):].split("|")
+        times[name.strip()] = (int(self_us), int(cumulative_us))
+    return times
+
+
+def parse_budgets(value: str) -> dict[str, float]:
+    budgets = {}
+    for item in filter(None, value.split(",")):
+        name, _, ms = item.partition("=")
+        budgets[name.strip()] = float(ms)
+    return budgets
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--runs", type=int, default=10)
+    parser.add_argument("--top", type=int, default=10)
+    parser.add_argument("--budget-ms", type=parse_budgets, default={}, help="e.g. crawl=900,health=60")
+    args = parser.parse_args()
+
+    failed = False
+    for entrypoint, modules in ENTRYPOINTS.items():
+        totals = []
+        self_times: dict[str, list[int]] = defaultdict(list)
+        loaded = set()
+        for _ in range(args.runs):
+            times = import_times(modules, AFTER_IMPORT.get(entrypoint, ""))
+            totals.append(sum(self_us for self_us, _ in times.values()) / 1000)
+            for name, (self_us, _) in times.items():
+                self_times[name].append(self_us)
+            loaded |= times.keys()
+
+        median = statistics.median(totals)
+        budget = args.budget_ms.get(entrypoint)
+        over = budget is not None and median > budget
+        forbidden = sorted(m for m in loaded if m.split(".")[0] in FORBIDDEN)
+        failed |= over or bool(forbidden)
+
+        print(
+            f"{entrypoint:<7} median {median:7.1f} ms  min {min(totals):7.1f} ms  "
+            f"{len(loaded)} modules" + (f"  budget {budget:.0f} ms {'EXCEEDED' if over else 'ok'}" if budget else "")
+        )
+        slowest = sorted(self_times.items(), key=lambda item: -statistics.median(item[1]))[: args.top]
+        for name, samples in slowest:
+            print(f"    {statistics.median(samples) / 1000:7.1f} ms  {name}")
+        if forbidden:
+            print(f"    FORBIDDEN at startup: {', '.join(forbidden)}")
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
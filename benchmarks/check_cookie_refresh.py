@@ -0,0 +1,72 @@
+"""
+Checks that the default cookie refresh hook (circuit_breaker.reload_env_cookies)
+really gets fresh cookies from a rewritten .env to the requests.
+
+The DOS stand-in answers 403 challenges unless the request carries the
+expected cookie. The process environment keeps the stale value, as it does
+after load_dotenv / compose env_file at startup. A temporary .env holds the
+fresh one and is rewritten once more to rotate the cookie mid-run. Each
+request has to trip the breaker, refresh from the file and then succeed.
+Exits 1 on failure, so it can gate CI.
+
+    python -m benchmarks.check_cookie_refresh
+"""
+import asyncio
+import functools
+import os
+import sys
+import tempfile
+from pathlib import Path
+import aiohttp
+from benchmarks.dos_standin import API_PATH, StandinConfig, start
+from scraper import utils
+from scraper.circuit_breaker import COOKIE_ENV_PREFIX, CircuitBreaker, reload_env_cookies
+
+COOKIE = "TS00000000076"
+
+
+async def main() -> int:
+    env_name = f"{COOKIE_ENV_PREFIX}{COOKIE}"
+    os.environ[env_name] = "stale"
+    config = StandinConfig(median_ms=1)
+    runner, base_url = await start(config)
+    failures = []
+    with tempfile.TemporaryDirectory() as tmp:
+        env_file = Path(tmp) / ".env"
+        cookies = {COOKIE: "stale"}
+        breaker = CircuitBreaker(
+            cookies,
+            refresh_hook=functools.partial(reload_env_cookies, env_file=str(env_file)),
+            threshold=1,
+            cooldown=0,
+        )
+        url = f"{base_url}{API_PATH}/GetEntityRecordByID"
+        try:
+            async with aiohttp.ClientSession() as session:
+                for value in ("fresh", "rotated"):
+                    env_file.write_text(f"{env_name}={value}\n")
+                    config.required_cookies = {COOKIE: value}
+                    challenges = config.blocked
+                    try:
+                        await asyncio.wait_for(utils.post_json(
+                            session, url, {"SearchID": "1"}, semaphore=asyncio.Semaphore(1),
+                            cookies=cookies, breaker=breaker, hedge=False,
+                        ), timeout=30)
+                        # blocked once with the stale cookie, then through with the refreshed one
+                        ok = cookies[COOKIE] == value and config.blocked > challenges
+                    except Exception as e:
+                        print(f"{value}: request failed: {e!r}")
+                        ok = False
+                    print(
+                        f"{value:<8} cookie now {cookies[COOKIE]!r} after {config.blocked - challenges} "
+                        f"challenge(s): {'ok' if ok else 'FAILED'}"
+                    )
+                    if not ok:
+                        failures.append(value)
+        finally:
+            await runner.cleanup()
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(asyncio.run(main()))
@@ -0,0 +1,183 @@
+"""
+Local stand-in for the NY DOS Public Inquiry API.
+
+Serves the search/detail/name-history/filing-history/document endpoints with
+synthetic data (documents are fake PDFs of --pdf-kb KB) and a
+configurable latency profile (lognormal latency plus occasional stalls) and
+an optional cookie check that answers like the WAF when cookies are stale, so
+the crawl's HTTP path can be exercised and benchmarked without touching the
+real site.
+
+    python -m benchmarks.dos_standin --port 8080 --stall-rate 0.01 [--loop uvloop]
+"""
+import argparse
+import asyncio
+import random
+from datetime import date
+from aiohttp import web
+import event_loop
+
+API_PATH = "/PublicInquiryWeb/api/PublicInquiry"
+
+
+class StandinConfig:
+    def __init__(
+        self,
+        median_ms: float = 40,
+        sigma: float = 0.5,
+        stall_rate: float = 0.0,
+        stall_seconds: float = 30.0,
+        seed: int = 1,
+        max_dos_id: int | None = None,
+        gap_every: int = 0,
+        pdf_kb: int = 256,
+        required_cookies: dict | None = None,
+    ):
+        self.median_ms = median_ms
+        self.sigma = sigma
+        self.stall_rate = stall_rate
+        self.stall_seconds = stall_seconds
+        self.random = random.Random(seed)
+        # IDs above max_dos_id and every gap_every-th ID (withdrawn filings) do not exist
+        self.max_dos_id = max_dos_id
+        self.gap_every = gap_every
+        self.pdf_kb = pdf_kb
+        # requests without these cookie values get a WAF-style HTML challenge (403)
+        self.required_cookies = required_cookies or {}
+        self.requests = 0
+        self.blocked = 0
+
+    async def delay(self):
+        self.requests += 1
+        if self.random.random() < self.stall_rate:
+            await asyncio.sleep(self.stall_seconds)
+            return
+        await asyncio.sleep(self.median_ms / 1000 * self.random.lognormvariate(0, self.sigma))
+
+
+def entity_name(dos_id: int) -> str:
+    return f"STANDIN {dos_id} LLC"
+
+
+def fake_pdf(document_id: str, size_kb: int) -> bytes:
+    # *02 documents are the same boilerplate form for every entity
+    seed = "form" if document_id.endswith("02") else document_id
+    body = (f"%PDF-1.4\n% standin document {seed}\n".encode() * (size_kb * 32))[: size_kb * 1024]
+    return body + b"\n%%EOF\n"
+
+
+def make_app(config: StandinConfig | None = None) -> web.Application:
+    config = config or StandinConfig()
+    today = date.today().isoformat()
+
+    async def search(request: web.Request):
+        body = await request.json()
+        await config.delay()
+        seed = sum(map(ord, body.get("searchValue", "")))
+        rows = [
+            {"dosID": str(seed * 100 + i), "entityName": entity_name(seed * 100 + i), "initialFilingDate": today if i < 2 else "2001-01-01"}
+            for i in range(10)
+        ]
+        return web.json_response({"entitySearchResultList": rows})
+
+    async def detail(request: web.Request):
+        body = await request.json()
+        await config.delay()
+        dos_id = int(body["SearchID"])
+        if (config.max_dos_id is not None and dos_id > config.max_dos_id) or (config.gap_every and dos_id % config.gap_every == 0):
+            return web.json_response({"entityGeneralInfo": None})
+        return web.json_response({
+            "entityGeneralInfo": {
+                "dosID": str(dos_id),
+                "entityName": entity_name(dos_id),
+                "entityType": "DOMESTIC LIMITED LIABILITY COMPANY",
+                "entityStatus": "Active",
+                "dateOfInitialDosFiling": today,
+                "jurisdiction": "New York, United States",
+            },
+            "sopAddress": {"address": {"streetAddress": "1 MAIN ST", "city": "ALBANY", "state": "NY", "zipCode": "12207", "country": "United States"}},
+            "registeredAgent": {"name": "STANDIN AGENT INC", "address": {"streetAddress": "2 MAIN ST", "city": "ALBANY", "state": "NY", "zipCode": "12207"}},
+        })
+
+    async def history(request: web.Request):
+        await request.json()
+        await config.delay()
+        return web.json_response({"nameHistoryResultList": []})
+
+    async def filing_history(request: web.Request):
+        body = await request.json()
+        await config.delay()
+        dos_id = int(body["SearchID"])
+        filer = {"streetAddress": "3 MAIN ST", "city": "ALBANY", "state": "NY", "zipCode": "12207", "country": "United States"}
+        return web.json_response({"filingHistoryResultList": [
+            {"documentID": f"{dos_id}01", "filingType": "ARTICLES OF ORGANIZATION", "filingDate": today,
+             "filerName": f"FILER {dos_id}", "filerAddress": filer},
+            {"documentID": f"{dos_id}02", "filingType": "CERTIFICATE OF PUBLICATION", "filingDate": today,
+             "filerName": f"FILER {dos_id}", "filerAddress": filer},
+        ]})
+
+    async def document(request: web.Request):
+        body = await request.json()
+        await config.delay()
+        pdf = fake_pdf(str(body["DocumentID"]), config.pdf_kb)
+        response = web.StreamResponse(headers={"Content-Type": "application/pdf"})
+        await response.prepare(request)
+        for i in range(0, len(pdf), 16384):
+            await response.write(pdf[i : i + 16384])
+        await response.write_eof()
+        return response
+
+    @web.middleware
+    async def waf(request: web.Request, handler):
+        if any(request.cookies.get(k) != v for k, v in config.required_cookies.items()):
+            config.blocked += 1
+            return web.Response(status=403, text="<html><body>Request rejected</body></html>", content_type="text/html")
+        return await handler(request)
+
+    app = web.Application(middlewares=[waf])
+    app["config"] = config
+    app.router.add_post(f"{API_PATH}/GetComplexSearchMatchingEntities", search)
+    app.router.add_post(f"{API_PATH}/GetEntityRecordByID", detail)
+    app.router.add_post(f"{API_PATH}/GetNameHistoryByID", history)
+    app.router.add_post(f"{API_PATH}/GetFilingHistoryByID", filing_history)
+    app.router.add_post(f"{API_PATH}/GetDocumentByID", document)
+    return app
+
+
+async def start(config: StandinConfig | None = None, host: str = "127.0.0.1", port: int = 0) -> tuple[web.AppRunner, str]:
+    """Starts the stand-in in the current loop; returns the runner and its base URL."""
+    runner = web.AppRunner(make_app(config))
+    await runner.setup()
+    site = web.TCPSite(runner, host, port)
+    await site.start()
+    bound_port = site._server.sockets[0].getsockname()[1]
+    return runner, f"http://{host}:{bound_port}"
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8080)
+    parser.add_argument("--median-ms", type=float, default=40)
+    parser.add_argument("--stall-rate", type=float, default=0.0)
+    parser.add_argument("--stall-seconds", type=float, default=30.0)
+    parser.add_argument("--max-dos-id", type=int)
+    parser.add_argument("--gap-every", type=int, default=0)
+    parser.add_argument("--pdf-kb", type=int, default=256)
+    parser.add_argument("--require-cookie", action="append", default=[], help="NAME=VALUE, else 403 challenge")
+    parser.add_argument("--loop", default="auto", help="event loop backend: auto | uvloop | asyncio")
+    args = parser.parse_args()
+    web.run_app(
+        make_app(StandinConfig(
+            args.median_ms,
+            stall_rate=args.stall_rate,
+            stall_seconds=args.stall_seconds,
+            max_dos_id=args.max_dos_id,
+            gap_every=args.gap_every,
+            pdf_kb=args.pdf_kb,
+            required_cookies=dict(c.split("=", 1) for c in args.require_cookie),
+        )),
+        host=args.host,
+        port=args.port,
+        loop=event_loop.new_event_loop(args.loop),
+    )
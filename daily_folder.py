@@ -0,0 +1,45 @@
+"""
+Per-day output folders shared by the scraper and the exporter.
+
+Stdlib only: the scraper creates the day's error counter on its first failed
+request, mid-crawl, and must not pull in the exporter (pandas, NumPy) to do it.
+"""
+from datetime import date, datetime, timezone
+from pathlib import Path
+
+
+def ensure_daily_folder(state: str, base_dir: str = "/scraper_data", target_date: date | None = None) -> Path:
+    """
+      {base_dir}/{state_lower}_new_business/YYYY/MM/DD
+    """
+    if target_date is None:
+        target_date = datetime.now(timezone.utc).date()
+
+    daily_folder = (
+        Path(base_dir)
+        / f"{state.lower()}_new_business"
+        / f"{target_date:%Y/%m/%d}"
+    )
+
+    daily_folder.mkdir(parents=True, exist_ok=True)
+    return daily_folder
+
+def init_daily_errors_file(state: str, base_dir: str = "/scraper_data", target_date: date | None = None) -> Path:
+    """
+
+    """
+    daily_folder = ensure_daily_folder(state, base_dir=base_dir, target_date=target_date)
+    errors_file = daily_folder / "crawl_errors_count_ny.txt"
+    if not errors_file.exists():
+        errors_file.touch()
+    return errors_file
+
+
+def init_runtime_log_file(state: str, base_dir: str = "/scraper_data") -> Path:
+    """
+    """
+    daily_folder = ensure_daily_folder(state, base_dir=base_dir)
+    runtime_file = daily_folder / "runtime_log.txt"
+    if not runtime_file.exists():
+        runtime_file.touch()
+    return runtime_file
@@ -0,0 +1,47 @@
+"""
+Event loop backend for the process entrypoints.
+
+EVENT_LOOP=auto (default) runs on uvloop when it is installed and on the
+stdlib loop otherwise; EVENT_LOOP=uvloop / asyncio pick one explicitly
+(uvloop falls back to the stdlib loop, with a warning, when it is missing).
+benchmarks/bench_event_loop.py compares the two on the crawl's HTTP path.
+
+    event_loop.run(main())          # instead of asyncio.run(main())
+"""
+import asyncio
+import os
+from logger import logger
+
+EVENT_LOOP = os.getenv("EVENT_LOOP", "auto").lower()
+BACKENDS = ("auto", "uvloop", "asyncio")
+
+
+def loop_factory(backend: str = EVENT_LOOP):
+    """A callable creating the backend's loop, or None for the stdlib default."""
+    if backend not in BACKENDS:
+        raise ValueError(f"EVENT_LOOP must be one of {', '.join(BACKENDS)}, not {backend!r}")
+    if backend == "asyncio":
+        return None
+    try:
+        import uvloop
+    except ImportError:
+        if backend == "uvloop":
+            logger.warning("EVENT_LOOP=uvloop but uvloop is not installed, using the asyncio loop")
+        return None
+    return uvloop.new_event_loop
+
+
+def new_event_loop(backend: str = EVENT_LOOP) -> asyncio.AbstractEventLoop:
+    factory = loop_factory(backend)
+    return factory() if factory else asyncio.new_event_loop()
+
+
+def loop_name(loop: asyncio.AbstractEventLoop | None = None) -> str:
+    loop = loop or asyncio.get_running_loop()
+    return "uvloop" if type(loop).__module__.startswith("uvloop") else "asyncio"
+
+
+def run(coro, backend: str = EVENT_LOOP):
+    """asyncio.run on the configured backend."""
+    with asyncio.Runner(loop_factory=loop_factory(backend)) as runner:
+        return runner.run(coro)
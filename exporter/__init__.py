@@ -1,3 +1,4 @@
-from .export_utils import export_data, get_companies_for_today, generate_manifest, ensure_daily_folder, export_data, init_daily_errors_file,init_runtime_log_file, get_companies_for_yesterday
+from .export_utils import export_data, get_companies_for_today, generate_manifest, ensure_daily_folder, export_data, init_daily_errors_file,init_runtime_log_file, get_companies_for_yesterday, stream_changes_for_date, export_changes, get_document_counts
+from .search import search_companies
 
-__all__ = ["export_data", "get_companies_for_today", "generate_manifest", "ensure_daily_folder", "export_data", "init_daily_errors_file", "init_runtime_log_file", "get_companies_for_yesterday"]
\ No newline at end of file
+__all__ = ["export_data", "get_companies_for_today", "generate_manifest", "ensure_daily_folder", "export_data", "init_daily_errors_file", "init_runtime_log_file", "get_companies_for_yesterday", "stream_changes_for_date", "export_changes", "get_document_counts", "search_companies"]
\ No newline at end of file
@@ -0,0 +1,241 @@
+"""
+Read-only HTTP API over scraped companies.
+
+    GET /companies?date=YYYY-MM-DD&state=NY&status=Active   NDJSON stream
+    GET /companies/{entity_number}?state=NY                 one company as JSON
+    GET /health
+
+/companies returns the rows first seen on `date` (default: today, UTC), like
+the daily export. Once the day's manifest.json exists, its checksum is the
+ETag: clients revalidate with If-None-Match, and finished days are served
+from an in-memory LRU instead of Postgres. Days still being crawled are
+always read from the database and carry no ETag.
+
+Queries go through their own small read-only pool (API_DB_POOL_SIZE) with a
+statement timeout, so consumers cannot starve the scraper's connections.
+
+    python -m exporter.api --port 8080
+"""
+import argparse
+import hashlib
+import json
+import os
+from collections import OrderedDict
+from datetime import date, datetime, timezone
+from pathlib import Path
+from aiohttp import web
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncEngine
+from models import create_engine_from_env
+from models.dimensions import PUBLIC_COLUMNS
+from logger import logger
+import event_loop
+from .export_utils import sha256_file
+
+API_HOST = os.getenv("API_HOST", "0.0.0.0")
+API_PORT = int(os.getenv("API_PORT", "8080"))
+API_DATA_DIR = os.getenv("API_DATA_DIR", "/scraper_data")
+API_DB_POOL_SIZE = int(os.getenv("API_DB_POOL_SIZE", "4"))
+API_STATEMENT_TIMEOUT_MS = int(os.getenv("API_STATEMENT_TIMEOUT_MS", "30000"))
+API_CACHE_MAX_MB = float(os.getenv("API_CACHE_MAX_MB", "64"))
+# single result sets above this size are streamed but never cached
+API_CACHE_ENTRY_MAX_MB = float(os.getenv("API_CACHE_ENTRY_MAX_MB", "16"))
+STREAM_CHUNK_ROWS = 1000
+
+COLUMN_LIST = ", ".join(PUBLIC_COLUMNS)
+
+COMPANIES_FOR_DAY = text(f"""
+    SELECT {COLUMN_LIST} FROM companies_expanded
+    WHERE source_state = :state
+    AND source_last_seen_at = :day
+    AND (CAST(:status AS text) IS NULL OR status = :status)
+    ORDER BY id
+""")
+
+COMPANY_BY_NUMBER = text(f"""
+    SELECT {COLUMN_LIST} FROM companies_expanded
+    WHERE source_state = :state AND entity_number = :entity_number
+    ORDER BY source_last_seen_at DESC
+    LIMIT 1
+""")
+
+
+class ResultCache:
+    """LRU of finished NDJSON bodies, bounded by total size in bytes."""
+
+    def __init__(self, max_bytes: int):
+        self.max_bytes = max_bytes
+        self.size = 0
+        self.hits = 0
+        self.misses = 0
+        self._entries: OrderedDict[tuple, bytes] = OrderedDict()
+
+    def get(self, key: tuple) -> bytes | None:
+        body = self._entries.get(key)
+        if body is None:
+            self.misses += 1
+            return None
+        self._entries.move_to_end(key)
+        self.hits += 1
+        return body
+
+    def put(self, key: tuple, body: bytes):
+        if len(body) > self.max_bytes:
+            return
+        if key in self._entries:
+            self.size -= len(self._entries.pop(key))
+        self._entries[key] = body
+        self.size += len(body)
+        while self.size > self.max_bytes:
+            _, evicted = self._entries.popitem(last=False)
+            self.size -= len(evicted)
+
+
+class ManifestChecksums:
+    """sha256 of each day's manifest.json, re-hashed only when the file changes."""
+
+    def __init__(self, base_dir: str):
+        self.base_dir = Path(base_dir)
+        self._known: dict[Path, tuple[float, str]] = {}
+
+    def path(self, state: str, day: date) -> Path:
+        return self.base_dir / f"{state.lower()}_new_business" / f"{day:%Y/%m/%d}" / "manifest.json"
+
+    def get(self, state: str, day: date) -> str | None:
+        path = self.path(state, day)
+        try:
+            mtime = path.stat().st_mtime
+        except OSError:
+            return None
+        known = self._known.get(path)
+        if known and known[0] == mtime:
+            return known[1]
+        checksum = sha256_file(path)
+        self._known[path] = (mtime, checksum)
+        return checksum
+
+
+def make_etag(*parts) -> str:
+    return '"' + hashlib.sha256("|".join(map(str, parts)).encode()).hexdigest()[:32] + '"'
+
+
+def etag_matches(request: web.Request, etag: str) -> bool:
+    header = request.headers.get("If-None-Match", "")
+    return header.strip() == "*" or etag in [tag.strip() for tag in header.split(",")]
+
+
+def to_ndjson(row) -> bytes:
+    return (json.dumps(dict(row), default=str, ensure_ascii=False) + "\n").encode()
+
+
+# ---------------- Handlers ----------------
+async def list_companies(request: web.Request) -> web.StreamResponse:
+    try:
+        day = date.fromisoformat(request.query["date"]) if "date" in request.query else datetime.now(timezone.utc).date()
+    except ValueError:
+        raise web.HTTPBadRequest(text="date must be YYYY-MM-DD")
+    state = request.query.get("state", "NY").upper()
+    status = request.query.get("status") or None
+
+    checksum = request.app["manifests"].get(state, day)
+    etag = make_etag(checksum, state, day, status) if checksum else None
+    if etag and etag_matches(request, etag):
+        raise web.HTTPNotModified(headers={"ETag": etag})
+
+    cache: ResultCache = request.app["cache"]
+    key = (state, day, status, checksum)
+    headers = {"Content-Type": "application/x-ndjson; charset=utf-8"}
+    if etag:
+        headers["ETag"] = etag
+        headers["Cache-Control"] = "public, max-age=300"
+        body = cache.get(key)
+        if body is not None:
+            return web.Response(body=body, headers=headers)
+
+    response = web.StreamResponse(headers=headers)
+    await response.prepare(request)
+    # only finished days are worth keeping; a body that grows past the entry cap stops being collected
+    collected = [] if etag else None
+    collected_size = 0
+    entry_limit = API_CACHE_ENTRY_MAX_MB * 1024 * 1024
+    engine: AsyncEngine = request.app["engine"]
+    async with engine.connect() as conn:
+        result = await conn.stream(COMPANIES_FOR_DAY, {"state": state, "day": day, "status": status})
+        async for rows in result.mappings().partitions(STREAM_CHUNK_ROWS):
+            chunk = b"".join(to_ndjson(row) for row in rows)
+            await response.write(chunk)
+            if collected is not None:
+                collected.append(chunk)
+                collected_size += len(chunk)
+                if collected_size > entry_limit:
+                    collected = None
+    if collected is not None:
+        cache.put(key, b"".join(collected))
+    await response.write_eof()
+    return response
+
+
+async def get_company(request: web.Request) -> web.Response:
+    try:
+        entity_number = int(request.match_info["entity_number"])
+    except ValueError:
+        raise web.HTTPBadRequest(text="entity_number must be an integer")
+    # entity numbers are only unique within a state
+    state = request.query.get("state", "NY").upper()
+    async with request.app["engine"].connect() as conn:
+        row = (await conn.execute(
+            COMPANY_BY_NUMBER, {"state": state, "entity_number": entity_number}
+        )).mappings().first()
+    if row is None:
+        raise web.HTTPNotFound(text=f"No {state} company {entity_number}")
+
+    body = json.dumps(dict(row), default=str, ensure_ascii=False).encode()
+    etag = make_etag(hashlib.sha256(body).hexdigest())
+    if etag_matches(request, etag):
+        raise web.HTTPNotModified(headers={"ETag": etag})
+    return web.Response(body=body, content_type="application/json", headers={"ETag": etag})
+
+
+async def health(request: web.Request) -> web.Response:
+    cache: ResultCache = request.app["cache"]
+    async with request.app["engine"].connect() as conn:
+        await conn.execute(text("SELECT 1"))
+    return web.json_response({
+        "status": "ok",
+        "cache_bytes": cache.size,
+        "cache_hits": cache.hits,
+        "cache_misses": cache.misses,
+    })
+
+
+# ---------------- App ----------------
+def make_app(engine: AsyncEngine | None = None, data_dir: str = API_DATA_DIR) -> web.Application:
+    app = web.Application()
+    app["engine"] = engine or create_engine_from_env(
+        application_name="ny_api",
+        read_only=True,
+        server_settings={"statement_timeout": str(API_STATEMENT_TIMEOUT_MS)},
+        pool_size=API_DB_POOL_SIZE,
+        max_overflow=0,
+    )
+    app["manifests"] = ManifestChecksums(data_dir)
+    app["cache"] = ResultCache(int(API_CACHE_MAX_MB * 1024 * 1024))
+    app.router.add_get("/companies", list_companies)
+    app.router.add_get("/companies/{entity_number}", get_company)
+    app.router.add_get("/health", health)
+
+    async def close_engine(app: web.Application):
+        await app["engine"].dispose()
+
+    app.on_cleanup.append(close_engine)
+    return app
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--host", default=API_HOST)
+    parser.add_argument("--port", type=int, default=API_PORT)
+    args = parser.parse_args()
+    loop = event_loop.new_event_loop()
+    logger.info("Serving read-only API on %s:%d (%s event loop)", args.host, args.port, event_loop.loop_name(loop))
+    web.run_app(make_app(), host=args.host, port=args.port, access_log=None, loop=loop)
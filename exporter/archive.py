@@ -0,0 +1,136 @@
+"""
+Retention for a month-partitioned `companies` table.
+
+Partitions older than the retention window are detached, written to Parquet
+under {output}/companies_YYYY_MM.parquet, and dropped, one at a time. A run
+that fails part-way leaves at most one partition detached; the next run
+archives such leftovers first:
+
+    python -m exporter.archive --keep-months 12 --output /scraper_data/archive
+
+Requires pyarrow.
+"""
+import argparse
+import json
+from datetime import date
+from pathlib import Path
+from sqlalchemy import ARRAY, Date, DateTime, Float, Integer, text
+from models import Company, engine
+from models.dimensions import expanded_select
+from models.partitioning import (
+    detach_partition, detached_partitions, is_partitioned, month_start, partitions_older_than,
+)
+from logger import logger
+import event_loop
+
+CHUNK_ROWS = 50_000
+
+
+def arrow_schema(columns: list[str]):
+    import pyarrow as pa
+
+    fields = []
+    for name in columns:
+        column = Company.__table__.c.get(name)
+        column_type = column.type if column is not None else None
+        if isinstance(column_type, Integer):
+            arrow_type = pa.int64()
+        elif isinstance(column_type, DateTime):
+            arrow_type = pa.timestamp("us", tz="UTC")
+        elif isinstance(column_type, Date):
+            arrow_type = pa.date32()
+        elif isinstance(column_type, Float):
+            arrow_type = pa.float64()
+        elif isinstance(column_type, ARRAY):
+            arrow_type = pa.list_(pa.string())
+        else:
+            arrow_type = pa.string()
+        fields.append(pa.field(name, arrow_type))
+    return pa.schema(fields)
+
+
+def to_text(value) -> str | None:
+    if value is None or isinstance(value, str):
+        return value
+    if isinstance(value, (dict, list)):
+        return json.dumps(value, default=str, ensure_ascii=False)
+    return str(value)
+
+
+async def archive_partition(name: str, month: date, output_dir: Path) -> Path | None:
+    """Streams a detached partition into one Parquet file (none if empty), then drops it."""
+    try:
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+    except ImportError as e:
+        raise RuntimeError("Archiving partitions requires pyarrow") from e
+
+    output_dir.mkdir(parents=True, exist_ok=True)
+    target = output_dir / f"companies_{month:%Y_%m}.parquet"
+    tmp = target.with_suffix(".parquet.tmp")
+    rows_written = 0
+    writer = None
+    async with engine.connect() as conn:
+        # agent and address text joined back from the dimensions, so the archive stands alone
+        result = await conn.stream(text(expanded_select(name)))
+        columns = list(result.keys())
+        schema = arrow_schema(columns)
+        writer = pq.ParquetWriter(tmp, schema, compression="zstd")
+        try:
+            async for chunk in result.mappings().partitions(CHUNK_ROWS):
+                # anything the schema treats as text (JSON, tsvector, ...) is stringified
+                data = {
+                    column: [
+                        to_text(row[column]) if pa.types.is_string(schema.field(column).type) else row[column]
+                        for row in chunk
+                    ]
+                    for column in columns
+                }
+                writer.write_table(pa.Table.from_pydict(data, schema=schema))
+                rows_written += len(chunk)
+        finally:
+            writer.close()
+    if rows_written:
+        tmp.replace(target)
+    else:
+        tmp.unlink()
+        target = None
+
+    async with engine.begin() as conn:
+        await conn.execute(text(f"DROP TABLE {name}"))
+    logger.info("Archived partition %s (%d rows) to %s", name, rows_written, target)
+    return target
+
+
+async def archive_old_partitions(keep_months: int, output_dir: Path) -> list[Path | None]:
+    cutoff = month_start(date.today(), -keep_months)
+    async with engine.connect() as conn:
+        if not await is_partitioned(conn):
+            logger.error("companies is not partitioned, nothing to archive")
+            return []
+        leftovers = await detached_partitions(conn)
+        old = await partitions_older_than(conn, cutoff)
+
+    archived = []
+    for name, month in leftovers:
+        logger.warning("Archiving partition %s left detached by an earlier run", name)
+        archived.append(await archive_partition(name, month, output_dir))
+    # one partition at a time, so a failure leaves the rest attached and readable
+    for name, month in old:
+        async with engine.begin() as conn:
+            await detach_partition(conn, name)
+        archived.append(await archive_partition(name, month, output_dir))
+    return archived
+
+
+async def main():
+    parser = argparse.ArgumentParser(description="Archive old companies partitions to Parquet")
+    parser.add_argument("--keep-months", type=int, default=12)
+    parser.add_argument("--output", default="/scraper_data/archive")
+    args = parser.parse_args()
+    archived = await archive_old_partitions(args.keep_months, Path(args.output))
+    logger.info("Archived %d partitions (%d non-empty)", len(archived), len([p for p in archived if p]))
+
+
+if __name__ == "__main__":
+    event_loop.run(main())
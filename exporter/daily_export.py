@@ -1,8 +1,9 @@
-import asyncio
 from datetime import datetime, timedelta, timezone
 from models import async_session
 from logger import logger
-from exporter.export_utils import export_data, generate_manifest, ensure_daily_folder, get_companies_for_today, get_companies_for_yesterday, init_daily_errors_file, get_companies_for_date
+import event_loop
+from profiling import profiler
+from exporter.export_utils import export_data, generate_manifest, ensure_daily_folder, get_companies_for_today, get_companies_for_yesterday, init_daily_errors_file, get_companies_for_date, export_changes, get_document_counts
 import os
 
 # async def main():
@@ -28,15 +29,25 @@ async def daily_export_for_date(session, state: str, date: datetime):
     logger.info("Starting export for %s", date.strftime("%Y-%m-%d"))
     output_dir = ensure_daily_folder(state=state, base_dir="/scraper_data", target_date=date)
 
-    companies = await get_companies_for_date(session=session, state=state, target_date=date)
-    export_data(companies, output_dir)
+    profiler.start()
+    with profiler.stage("query"):
+        companies = await get_companies_for_date(session=session, state=state, target_date=date)
+    with profiler.stage("export_files"):
+        _, _, quality = export_data(companies, output_dir)
+    with profiler.stage("export_changes"):
+        await export_changes(session, date, output_dir, state=state)
 
-    await generate_manifest(
-        companies=companies,
-        output_dir=output_dir,
-        crawl_errors=get_crawl_errors(),
-        start_time=start_time
-    )
+    with profiler.stage("manifest"):
+        await generate_manifest(
+            companies=companies,
+            output_dir=output_dir,
+            crawl_errors=get_crawl_errors(),
+            start_time=start_time,
+            document_counts=await get_document_counts(session, companies, state=state),
+            quality=quality,
+        )
+    profiler.stop()
+    profiler.write_report(output_dir, section="exporter")
 
     logger.info("Export finished for %s (%s companies)", date.strftime("%Y-%m-%d"), len(companies))
 
@@ -65,4 +76,4 @@ def get_crawl_errors():
     return 0
 
 if __name__ == "__main__":
-    asyncio.run(main())
+    event_loop.run(main())
@@ -1,21 +1,30 @@
 from pathlib import Path
-from datetime import date, datetime, timezone
+from datetime import date, datetime, timedelta, timezone
 import json
 import hashlib
-from typing import List
+from typing import AsyncIterator, List
 import pandas as pd
 from models import Company
+from models.dimensions import PUBLIC_COLUMNS
 from logger import logger
+from daily_folder import ensure_daily_folder, init_daily_errors_file, init_runtime_log_file  # re-exported
+from .quality import QualityStats, normalize_frame
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import text
+import os
+
+EXPORT_CHUNK_ROWS = int(os.getenv("EXPORT_CHUNK_ROWS", "50000"))
+EXPORT_VALIDATE = os.getenv("EXPORT_VALIDATE", "true").lower() == "true"
+# the same public columns the API serves, never SELECT *
+COLUMN_LIST = ", ".join(PUBLIC_COLUMNS)
 
 async def get_companies_for_today(session: AsyncSession, state: str = "NY") -> List[dict]:
     """
     """
-    query = text("""
-        SELECT * FROM companies
+    query = text(f"""
+        SELECT {COLUMN_LIST} FROM companies_expanded
         WHERE source_state = :state
-        AND DATE(source_last_seen_at) = CURRENT_DATE
+        AND source_last_seen_at = CURRENT_DATE
     """)
     result = await session.execute(query, {"state": state})
     companies = result.mappings().all()  
@@ -24,10 +33,13 @@ async def get_companies_for_today(session: AsyncSession, state: str = "NY") -> L
 async def get_companies_for_date(session: AsyncSession, state: str, target_date: date) -> List[dict]:
     """
     """
-    query = text("""
-        SELECT * FROM companies
+    # an entity is never first seen before it was registered; the extra bound
+    # lets Postgres prune old partitions when companies is partitioned
+    query = text(f"""
+        SELECT {COLUMN_LIST} FROM companies_expanded
         WHERE source_state = :state
         AND registration_date = :target_date
+        AND source_last_seen_at >= :target_date
     """)
     result = await session.execute(query, {
         "state": state,
@@ -40,57 +52,22 @@ async def get_companies_for_yesterday(session: AsyncSession, state: str = "NY")
     """
     Отримати компанії, зареєстровані вчора у вказаному штаті.
     """
-    query = text("""
-        SELECT *
-        FROM companies
+    query = text(f"""
+        SELECT {COLUMN_LIST}
+        FROM companies_expanded
         WHERE source_state = :state
         AND registration_date = CURRENT_DATE - INTERVAL '1 day'
+        AND source_last_seen_at >= CURRENT_DATE - INTERVAL '1 day'
     """)
     result = await session.execute(query, {"state": state})
     companies = result.mappings().all()
     return companies
-# ---------------- Daily Folder ----------------
-def ensure_daily_folder(state: str, base_dir: str = "/scraper_data", target_date: date | None = None) -> Path:
-    """
-      {base_dir}/{state_lower}_new_business/YYYY/MM/DD
-    """
-    if target_date is None:
-        target_date = datetime.now(timezone.utc).date()
-
-    daily_folder = (
-        Path(base_dir)
-        / f"{state.lower()}_new_business"
-        / f"{target_date:%Y/%m/%d}"
-    )
-
-    daily_folder.mkdir(parents=True, exist_ok=True)
-    return daily_folder
-
-def init_daily_errors_file(state: str, base_dir: str = "/scraper_data") -> Path:
-    """
-
-    """
-    daily_folder = ensure_daily_folder(state, base_dir=base_dir)
-    errors_file = daily_folder / "crawl_errors_count_ny.txt"
-    if not errors_file.exists():
-        errors_file.touch()
-    return errors_file
-
-
-def init_runtime_log_file(state: str, base_dir: str = "/scraper_data") -> Path:
-    """
-    """
-    daily_folder = ensure_daily_folder(state, base_dir=base_dir)
-    runtime_file = daily_folder / "runtime_log.txt"
-    if not runtime_file.exists():
-        runtime_file.touch()
-    return runtime_file
-
 # ---------------- Export CSV + NDJSON ----------------
-def export_data(companies: List[dict], output_dir: str, prefix: str = "entities") -> tuple[Path, Path]:
+def export_data(companies: List[dict], output_dir: str, prefix: str = "entities") -> tuple[Path, Path, dict]:
     """
-    Exports list of company dicts to CSV and NDJSON using pandas.
-    Returns tuple of file paths.
+    Exports list of company dicts to CSV and NDJSON using pandas, EXPORT_CHUNK_ROWS
+    rows at a time, each chunk validated and normalised (see exporter.quality).
+    Returns the file paths and the per-column quality stats.
     """
     output_dir = Path(output_dir)
     output_dir.mkdir(parents=True, exist_ok=True)
@@ -100,18 +77,56 @@ def export_data(companies: List[dict], output_dir: str, prefix: str = "entities"
 
     if not companies:
         logger.error("No companies found for export")
-        return csv_file, ndjson_file
+        return csv_file, ndjson_file, {}
+
+    stats = QualityStats()
+    with csv_file.open("w", encoding="utf-8", newline="") as csv_out, ndjson_file.open("w", encoding="utf-8") as ndjson_out:
+        for start in range(0, len(companies), EXPORT_CHUNK_ROWS):
+            # DataFrame
+            df = pd.DataFrame(companies[start : start + EXPORT_CHUNK_ROWS])
+            if EXPORT_VALIDATE:
+                normalize_frame(df, stats)
+
+            # CSV
+            df.to_csv(csv_out, index=False, header=start == 0)
+
+            # NDJSON
+            ndjson_out.write(df.to_json(orient="records", lines=True, force_ascii=False))
+
+    return csv_file, ndjson_file, stats.report()
+
+# ---------------- Change sets ----------------
+async def stream_changes_for_date(session: AsyncSession, target_date: date, state: str = "NY") -> AsyncIterator[dict]:
+    """
+    Yields the day's company_changes rows (UTC day) in observation order
+    without loading them all into memory.
+    """
+    start = datetime(target_date.year, target_date.month, target_date.day, tzinfo=timezone.utc)
+    query = text("""
+        SELECT entity_number, observed_at, diff
+        FROM company_changes
+        WHERE source_state = :state
+        AND observed_at >= :start
+        AND observed_at < :end
+        ORDER BY observed_at, id
+    """)
+    result = await session.stream(query, {"state": state, "start": start, "end": start + timedelta(days=1)})
+    async for row in result.mappings():
+        yield dict(row)
 
-    # DataFrame
-    df = pd.DataFrame(companies)
-    
-    # CSV
-    df.to_csv(csv_file, index=False, encoding="utf-8")
-    
-    # NDJSON
-    df.to_json(ndjson_file, orient="records", lines=True, force_ascii=False)
 
-    return csv_file, ndjson_file
+async def export_changes(session: AsyncSession, target_date: date, output_dir: str, state: str = "NY") -> tuple[Path, int]:
+    """Writes the day's change set to changes.ndjson; returns the file and row count."""
+    output_dir = Path(output_dir)
+    output_dir.mkdir(parents=True, exist_ok=True)
+    changes_file = output_dir / "changes.ndjson"
+    count = 0
+    with changes_file.open("w", encoding="utf-8") as f:
+        async for change in stream_changes_for_date(session, target_date, state):
+            f.write(json.dumps(change, default=str, ensure_ascii=False) + "\n")
+            count += 1
+    logger.info("Exported %d changes to %s", count, changes_file)
+    return changes_file, count
 
 # ---------------- Checksums ----------------
 def sha256_file(file_path: Path) -> str:
@@ -134,7 +149,8 @@ def write_manifest(
     crawl_duration_seconds: float,
     crawl_errors_total: int,
     generator: str = "ny_scraper_v1",
-    output_dir: str = "/ny_new_business"
+    output_dir: str = "/ny_new_business",
+    data_quality: dict | None = None,
 ):
     """
     Creates or updates manifest.json with crawl stats.
@@ -159,6 +175,7 @@ def write_manifest(
         "crawl_errors_total": crawl_errors_total,
         "generated_at": now.isoformat(),
         "generator": generator,
+        "data_quality": data_quality or {},
     }
 
     if manifest_file.exists():
@@ -179,6 +196,7 @@ def write_manifest(
                 "pdfs_available": pdfs_available,
                 "coverage_notes": coverage_notes,
                 "generated_at": now.isoformat(),
+                "data_quality": data_quality or {},
             })
             manifest = existing_manifest
 
@@ -187,20 +205,43 @@ def write_manifest(
 
     return manifest_file
 
-async def generate_manifest(companies: list[Company], crawl_errors: int, start_time: datetime, output_dir: str = "/ny_new_business", generator:str = "ny_exporter_v1"):
+async def get_document_counts(session: AsyncSession, companies: list, state: str = "NY") -> dict:
+    """Officer and document counts for the exported companies, as the manifest reports them."""
+    numbers = [c["entity_number"] for c in companies]
+    if not numbers:
+        return {}
+    result = await session.execute(
+        text("""
+            SELECT
+                (SELECT count(*) FROM company_officers
+                 WHERE source_state = :state AND entity_number = ANY(:numbers)) AS officer_rows_total,
+                (SELECT count(DISTINCT entity_number) FROM company_officers
+                 WHERE source_state = :state AND entity_number = ANY(:numbers)) AS officer_data_available,
+                (SELECT count(*) FROM company_documents
+                 WHERE source_state = :state AND entity_number = ANY(:numbers)) AS pdfs_total,
+                (SELECT count(*) FROM company_documents
+                 WHERE source_state = :state AND entity_number = ANY(:numbers) AND sha256 IS NOT NULL) AS pdfs_available
+        """),
+        {"state": state, "numbers": numbers},
+    )
+    return dict(result.mappings().one())
+
+async def generate_manifest(companies: list[Company], crawl_errors: int, start_time: datetime, output_dir: str = "/ny_new_business", generator:str = "ny_exporter_v1", state: str = "NY", document_counts: dict | None = None, quality: dict | None = None):
     now = datetime.now(timezone.utc)
     crawl_duration_seconds = (now - start_time).total_seconds()
 
+    # document_counts: see get_document_counts; all zero when officers/PDFs are not collected
+    document_counts = document_counts or {}
     entities_total = len(companies)
-    officer_rows_total = 0
-    pdfs_total = 0 
-    officer_data_available = officer_rows_total 
-    pdfs_available = 0 
+    officer_rows_total = document_counts.get("officer_rows_total", 0)
+    pdfs_total = document_counts.get("pdfs_total", 0)
+    officer_data_available = document_counts.get("officer_data_available", 0)
+    pdfs_available = document_counts.get("pdfs_available", 0)
 
     coverage_notes = "Includes Statements of Information (Initial + Amendments)"
 
     manifest_file = write_manifest(
-        source_state="NY",
+        source_state=state,
         entities_total=entities_total,
         officer_rows_total=officer_rows_total,
         pdfs_total=pdfs_total,
@@ -210,7 +251,8 @@ async def generate_manifest(companies: list[Company], crawl_errors: int, start_t
         crawl_duration_seconds=crawl_duration_seconds,
         crawl_errors_total=crawl_errors,
         output_dir=output_dir,
-        generator=generator
+        generator=generator,
+        data_quality=quality,
     )
 
     logger.info("Manifest created: %s", manifest_file)
\ No newline at end of file
@@ -0,0 +1,210 @@
+"""
+Column-wise validation and normalisation of exported company rows.
+
+normalize_frame() works on one DataFrame chunk at a time with vectorised
+pandas/NumPy operations only (pyarrow-backed strings when pyarrow is
+installed), so a streaming export pays a few array passes per chunk rather
+than Python code per row. Text columns are factorized first and only their
+distinct values are cleaned: agents, cities, states and ZIPs repeat across
+most of a chunk, so those columns cost one hash pass plus a gather.
+
+  - text columns: surrounding/inner whitespace collapsed, empty strings to null,
+    names and addresses upper-cased like the DOS records themselves (status,
+    entity type and jurisdiction keep their case)
+  - *_state: full US state names mapped to their two-letter codes; anything
+    else on a US (or country-less) row counts as invalid
+  - *_country: common spellings of the United States unified
+  - *_postal_code: US ZIP / ZIP+4 reformatted, 4-digit ZIPs that lost their
+    leading zero padded; other US values count as invalid
+  - dates: values before 1800 or implausibly far in the future are nulled and
+    counted, as are expirations before registration
+
+QualityStats adds up per-column rows/missing/normalized/invalid counts over
+all chunks; the totals go into the manifest under "data_quality".
+"""
+from datetime import date, timedelta
+import numpy as np
+import pandas as pd
+
+try:
+    import pyarrow  # noqa: F401
+
+    STRING_DTYPE = "string[pyarrow]"
+except ImportError:
+    STRING_DTYPE = "string"
+
+# whitespace only; these are DOS vocabulary and keep their case
+TEXT_COLUMNS = ["entity_type", "entity_subtype", "status", "jurisdiction"]
+UPPER_COLUMNS = [
+    "entity_name", "agent_name", "incorporator_name",
+    "principal_street", "principal_city", "mailing_street", "mailing_city", "agent_street", "agent_city",
+]
+ADDRESS_PREFIXES = ["principal", "mailing", "agent"]
+DATE_COLUMNS = ["registration_date", "next_filing_date", "expiration_date"]
+EARLIEST_DATE = pd.Timestamp("1800-01-01")
+# next filing dates lie up to two years ahead; anything later is a parse error
+LATEST_FUTURE = timedelta(days=3 * 365)
+
+US_STATES = {
+    "ALABAMA": "AL", "ALASKA": "AK", "ARIZONA": "AZ", "ARKANSAS": "AR", "CALIFORNIA": "CA",
+    "COLORADO": "CO", "CONNECTICUT": "CT", "DELAWARE": "DE", "DISTRICT OF COLUMBIA": "DC", "FLORIDA": "FL",
+    "GEORGIA": "GA", "HAWAII": "HI", "IDAHO": "ID", "ILLINOIS": "IL", "INDIANA": "IN", "IOWA": "IA",
+    "KANSAS": "KS", "KENTUCKY": "KY", "LOUISIANA": "LA", "MAINE": "ME", "MARYLAND": "MD",
+    "MASSACHUSETTS": "MA", "MICHIGAN": "MI", "MINNESOTA": "MN", "MISSISSIPPI": "MS", "MISSOURI": "MO",
+    "MONTANA": "MT", "NEBRASKA": "NE", "NEVADA": "NV", "NEW HAMPSHIRE": "NH", "NEW JERSEY": "NJ",
+    "NEW MEXICO": "NM", "NEW YORK": "NY", "NORTH CAROLINA": "NC", "NORTH DAKOTA": "ND", "OHIO": "OH",
+    "OKLAHOMA": "OK", "OREGON": "OR", "PENNSYLVANIA": "PA", "RHODE ISLAND": "RI", "SOUTH CAROLINA": "SC",
+    "SOUTH DAKOTA": "SD", "TENNESSEE": "TN", "TEXAS": "TX", "UTAH": "UT", "VERMONT": "VT",
+    "VIRGINIA": "VA", "WASHINGTON": "WA", "WEST VIRGINIA": "WV", "WISCONSIN": "WI", "WYOMING": "WY",
+    "PUERTO RICO": "PR", "GUAM": "GU", "VIRGIN ISLANDS": "VI", "AMERICAN SAMOA": "AS",
+    "NORTHERN MARIANA ISLANDS": "MP",
+}
+STATE_CODES = set(US_STATES.values()) | {"AA", "AE", "AP"}  # plus military mail
+US_COUNTRY = "UNITED STATES"
+US_ALIASES = {"US", "USA", "U.S.", "U.S.A.", "UNITED STATES OF AMERICA", "UNITED STATES", "AMERICA"}
+
+ZIP_PATTERN = r"^\d{5}(?:-\d{4})?$"
+
+
+class QualityStats:
+    """Per-column counters, summed over chunks."""
+
+    FIELDS = ("rows", "missing", "normalized", "invalid")
+
+    def __init__(self):
+        self.columns: dict[str, dict[str, int]] = {}
+
+    def add(self, column: str, **counts):
+        entry = self.columns.setdefault(column, dict.fromkeys(self.FIELDS, 0))
+        for key, value in counts.items():
+            entry[key] += int(value)
+
+    def report(self) -> dict:
+        return {
+            column: {**counts, "valid_ratio": round(1 - counts["invalid"] / counts["rows"], 4) if counts["rows"] else None}
+            for column, counts in sorted(self.columns.items())
+        }
+
+
+# ---------------- Rules (applied to the distinct values of a column) ----------------
+def clean_whitespace(values: pd.Series) -> pd.Series:
+    cleaned = values.str.replace(r"\s+", " ", regex=True).str.strip()
+    return cleaned.mask(cleaned == "")
+
+
+def clean_text(values: pd.Series) -> pd.Series:
+    return clean_whitespace(values).str.upper()
+
+
+def clean_country(values: pd.Series) -> pd.Series:
+    cleaned = clean_text(values)
+    return cleaned.mask(cleaned.isin(US_ALIASES), US_COUNTRY)
+
+
+def clean_us_state(values: pd.Series) -> pd.Series:
+    cleaned = clean_text(values).str.replace(".", "", regex=False)
+    codes = cleaned.map(US_STATES, na_action="ignore")
+    return cleaned.where(codes.isna(), codes)
+
+
+def clean_us_zip(values: pd.Series) -> pd.Series:
+    cleaned = clean_text(values)
+    digits = cleaned.str.replace(r"\D", "", regex=True)
+    length = digits.str.len()
+    formatted = digits.mask(length == 4, "0" + digits)
+    formatted = formatted.mask(length == 9, digits.str[:5] + "-" + digits.str[5:])
+    return formatted.where(length.isin([4, 5, 9]).fillna(False).astype(bool), cleaned)
+
+
+def valid_state(values: pd.Series) -> np.ndarray:
+    return values.isin(STATE_CODES).fillna(False).to_numpy(dtype=bool)
+
+
+def valid_zip(values: pd.Series) -> np.ndarray:
+    return values.str.match(ZIP_PATTERN).fillna(False).to_numpy(dtype=bool)
+
+
+# ---------------- Column passes ----------------
+def _lookup(values: pd.Series) -> np.ndarray:
+    # one trailing None so that the null code -1 gathers None
+    return np.append(values.astype(object).where(values.notna(), None).to_numpy(dtype=object), None)
+
+
+def _differs(before: pd.Series, after: pd.Series) -> np.ndarray:
+    differs = (before.isna() != after.isna()) | (before != after).fillna(False)
+    return np.append(differs.to_numpy(dtype=bool), False)
+
+
+def normalize_column(
+    df: pd.DataFrame,
+    column: str,
+    stats: QualityStats,
+    rule,
+    us: np.ndarray | None = None,
+    us_rule=None,
+    valid=None,
+):
+    """
+    Applies rule to the column's distinct values and gathers the result back per
+    row. With us given, us_rule replaces rule on US rows and valid (per distinct
+    US value) decides which US rows count as invalid.
+    """
+    codes, uniques = pd.factorize(df[column])
+    before = pd.Series(uniques, dtype=object).astype(STRING_DTYPE)
+
+    after = rule(before)
+    values = _lookup(after)[codes]
+    changed = _differs(before, after)[codes]
+    invalid = 0
+    if us is not None:
+        us_after = us_rule(before)
+        values[us] = _lookup(us_after)[codes][us]
+        changed[us] = _differs(before, us_after)[codes][us]
+        if valid is not None:
+            bad = np.append(~valid(us_after) & us_after.notna().to_numpy(dtype=bool), False)
+            invalid = np.count_nonzero(bad[codes] & us)
+
+    # an explicit object dtype spares pandas from scanning every value to infer one
+    df[column] = pd.Series(values, index=df.index, dtype=object, copy=False)
+    missing = np.count_nonzero(pd.isna(values))
+    stats.add(column, rows=len(df), missing=missing, normalized=np.count_nonzero(changed), invalid=invalid)
+
+
+def normalize_frame(df: pd.DataFrame, stats: QualityStats | None = None, today: date | None = None) -> pd.DataFrame:
+    """Normalises a chunk in place and returns it; counts go into stats."""
+    stats = stats if stats is not None else QualityStats()
+
+    for column in TEXT_COLUMNS:
+        if column in df:
+            normalize_column(df, column, stats, clean_whitespace)
+    for column in UPPER_COLUMNS:
+        if column in df:
+            normalize_column(df, column, stats, clean_text)
+
+    for prefix in ADDRESS_PREFIXES:
+        country = f"{prefix}_country"
+        if country in df:
+            normalize_column(df, country, stats, clean_country)
+            # rows without a country are taken to be domestic
+            us = (df[country].isna() | (df[country] == US_COUNTRY)).to_numpy(dtype=bool)
+        else:
+            us = np.ones(len(df), dtype=bool)
+        if f"{prefix}_state" in df:
+            normalize_column(df, f"{prefix}_state", stats, clean_text, us, clean_us_state, valid_state)
+        if f"{prefix}_postal_code" in df:
+            normalize_column(df, f"{prefix}_postal_code", stats, clean_text, us, clean_us_zip, valid_zip)
+
+    today = pd.Timestamp(today or date.today())
+    parsed = {column: pd.to_datetime(df[column], errors="coerce") for column in DATE_COLUMNS if column in df}
+    for column, values in parsed.items():
+        latest = today if column == "registration_date" else today + LATEST_FUTURE
+        # dates outside what pandas can represent (e.g. year 1) come back as NaT
+        invalid = (values < EARLIEST_DATE) | (values > latest) | (values.isna() & df[column].notna())
+        if column == "expiration_date" and "registration_date" in parsed:
+            invalid |= values < parsed["registration_date"]
+        invalid = invalid.fillna(False).to_numpy(dtype=bool)
+        # missing counts values parse_date already gave up on, before invalid ones are nulled
+        stats.add(column, rows=len(df), missing=df[column].isna().sum(), invalid=np.count_nonzero(invalid))
+        if invalid.any():
+            df[column] = df[column].mask(invalid, None)
+    return df
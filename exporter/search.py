@@ -0,0 +1,143 @@
+"""
+Ranked company lookup by name, previous names or agent name.
+
+Uses the columns and indexes from models.search. With pg_trgm installed the
+match is fuzzy (trigram similarity on names and agent name, plus full-text);
+without it only full-text matching is used.
+
+Results are ordered by (score desc, id asc) and paged by keyset: pass the
+cursor returned with one page to get the next, so deep pages cost the same as
+the first one.
+
+    python -m exporter.search "acme holdings" --state NY --limit 10
+"""
+import argparse
+import event_loop
+import base64
+import json
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncSession
+from models.search import SEARCH_TS_CONFIG
+
+# agent_name comes from the agents dimension for rows that only carry agent_key
+RESULT_COLUMNS = """
+    c.id, c.source_state, c.entity_number, c.entity_name, c.entity_type, c.status,
+    c.registration_date, COALESCE(c.agent_name, ag.name) AS agent_name, c.previous_names, c.source_last_seen_at
+"""
+
+# agent matches count, but less than a match on the entity's own names
+TRIGRAM_QUERY = f"""
+    WITH q AS (SELECT websearch_to_tsquery('{SEARCH_TS_CONFIG}', :query) AS ts)
+    SELECT * FROM (
+        SELECT {RESULT_COLUMNS},
+            GREATEST(
+                similarity(c.search_names, :query),
+                similarity(COALESCE(c.agent_name, ag.name), :query) * 0.5,
+                ts_rank(c.search_vector, q.ts)
+            )::real AS score
+        FROM q, companies c
+        LEFT JOIN agents ag ON ag.agent_key = c.agent_key
+        WHERE (
+            c.search_names % :query
+            OR c.agent_name % :query
+            OR c.agent_key = ANY(ARRAY(SELECT agent_key FROM agents WHERE name % :query))
+            OR c.search_vector @@ q.ts
+        )
+        AND (CAST(:state AS text) IS NULL OR c.source_state = :state)
+    ) matches
+    WHERE CAST(:after_score AS real) IS NULL
+        OR score < CAST(:after_score AS real)
+        OR (score = CAST(:after_score AS real) AND id > :after_id)
+    ORDER BY score DESC, id
+    LIMIT :limit
+"""
+
+FULLTEXT_QUERY = f"""
+    WITH q AS (SELECT websearch_to_tsquery('{SEARCH_TS_CONFIG}', :query) AS ts)
+    SELECT * FROM (
+        SELECT {RESULT_COLUMNS}, ts_rank(c.search_vector, q.ts)::real AS score
+        FROM q, companies c
+        LEFT JOIN agents ag ON ag.agent_key = c.agent_key
+        WHERE c.search_vector @@ q.ts
+        AND (CAST(:state AS text) IS NULL OR c.source_state = :state)
+    ) matches
+    WHERE CAST(:after_score AS real) IS NULL
+        OR score < CAST(:after_score AS real)
+        OR (score = CAST(:after_score AS real) AND id > :after_id)
+    ORDER BY score DESC, id
+    LIMIT :limit
+"""
+
+_trigram: bool | None = None
+
+
+def encode_cursor(score: float, row_id: int) -> str:
+    return base64.urlsafe_b64encode(json.dumps([score, row_id]).encode()).decode()
+
+
+def decode_cursor(cursor: str) -> tuple[float, int]:
+    try:
+        score, row_id = json.loads(base64.urlsafe_b64decode(cursor.encode()))
+        return float(score), int(row_id)
+    except (ValueError, TypeError) as e:
+        raise ValueError(f"Invalid search cursor: {cursor!r}") from e
+
+
+async def trigram_available(session: AsyncSession) -> bool:
+    global _trigram
+    if _trigram is None:
+        result = await session.execute(text("SELECT 1 FROM pg_extension WHERE extname = 'pg_trgm'"))
+        _trigram = result.scalar() is not None
+    return _trigram
+
+
+async def search_companies(
+    session: AsyncSession,
+    query: str,
+    state: str | None = None,
+    limit: int = 20,
+    cursor: str | None = None,
+) -> tuple[list[dict], str | None]:
+    """
+    Returns (rows, next_cursor). next_cursor is None on the last page.
+    """
+    query = query.strip()
+    if not query:
+        return [], None
+    after_score, after_id = decode_cursor(cursor) if cursor else (None, 0)
+    sql = TRIGRAM_QUERY if await trigram_available(session) else FULLTEXT_QUERY
+    result = await session.execute(
+        text(sql),
+        {
+            "query": query,
+            "state": state,
+            "after_score": after_score,
+            "after_id": after_id,
+            "limit": limit,
+        },
+    )
+    rows = [dict(row) for row in result.mappings()]
+    next_cursor = encode_cursor(rows[-1]["score"], rows[-1]["id"]) if len(rows) == limit else None
+    return rows, next_cursor
+
+
+async def main():
+    from models import async_session
+
+    parser = argparse.ArgumentParser()
+    parser.add_argument("query")
+    parser.add_argument("--state")
+    parser.add_argument("--limit", type=int, default=20)
+    parser.add_argument("--cursor")
+    args = parser.parse_args()
+
+    async with async_session() as db:
+        rows, next_cursor = await search_companies(db, args.query, args.state, args.limit, args.cursor)
+    for row in rows:
+        print(f"{row['score']:.3f}  {row['entity_number']:>10}  {row['entity_name']}  ({row['agent_name'] or '-'})")
+    if next_cursor:
+        print(f"next: --cursor {next_cursor}")
+
+
+if __name__ == "__main__":
+    event_loop.run(main())
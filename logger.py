@@ -1,17 +1,47 @@
+import atexit
+import json
 import logging
-from logging.handlers import RotatingFileHandler
+import os
+import queue
+import time
+from logging.handlers import QueueHandler, QueueListener, RotatingFileHandler
 from pathlib import Path
 
 LOG_DIR = Path("/app/logs")  # volume з docker-compose
 LOG_DIR.mkdir(parents=True, exist_ok=True)
 
+LOG_LEVEL = os.getenv("LOG_LEVEL", "DEBUG").upper()
+LOG_FORMAT = os.getenv("LOG_FORMAT", "text").lower()  # text | json
+# at most this many records per message template per minute below LOG_RATE_LIMIT_LEVEL; 0 disables
+LOG_RATE_LIMIT_PER_MINUTE = int(os.getenv("LOG_RATE_LIMIT_PER_MINUTE", "120"))
+LOG_RATE_LIMIT_LEVEL = getattr(logging, os.getenv("LOG_RATE_LIMIT_LEVEL", "WARNING").upper(), logging.WARNING)
+
 logger = logging.getLogger("app_logger")
-logger.setLevel(logging.DEBUG)
+logger.setLevel(LOG_LEVEL)
+
+
+class JsonFormatter(logging.Formatter):
+    def format(self, record):
+        payload = {
+            "ts": self.formatTime(record, self.datefmt),
+            "level": record.levelname,
+            "logger": record.name,
+            "message": record.getMessage(),
+        }
+        if record.exc_info:
+            payload["exc_info"] = self.formatException(record.exc_info)
+        elif record.exc_text:
+            payload["exc_info"] = record.exc_text
+        return json.dumps(payload, ensure_ascii=False)
 
-formatter = logging.Formatter(
-    "%(asctime)s - %(levelname)s - %(name)s - %(message)s",
-    datefmt="%Y-%m-%d %H:%M:%S"
-)
+
+if LOG_FORMAT == "json":
+    formatter = JsonFormatter(datefmt="%Y-%m-%dT%H:%M:%S")
+else:
+    formatter = logging.Formatter(
+        "%(asctime)s - %(levelname)s - %(name)s - %(message)s",
+        datefmt="%Y-%m-%d %H:%M:%S"
+    )
 
 # INFO handler (тільки до ERROR)
 info_handler = RotatingFileHandler(
@@ -42,8 +72,76 @@ console_handler = logging.StreamHandler()
 console_handler.setLevel(logging.DEBUG)
 console_handler.setFormatter(formatter)
 
-logger.addHandler(info_handler)
-logger.addHandler(error_handler)
-logger.addHandler(console_handler)
+
+class RateLimitFilter(logging.Filter):
+    """
+    Caps high-volume messages (per-prefix progress, retries) per message
+    template and minute. The next record that gets through after a
+    suppression notes how many similar records were dropped.
+    Records at or above `level` are never limited.
+    """
+
+    WINDOW = 60.0
+    KEEP_SUPPRESSED = 3600.0
+
+    def __init__(self, per_minute: int, level: int = logging.WARNING):
+        super().__init__()
+        self.per_minute = per_minute
+        self.level = level
+        self._windows: dict[tuple, list] = {}  # template -> [window_start, count, suppressed]
+        self._pruned_at = time.monotonic()
+
+    def _prune(self, now: float):
+        # messages built with f-strings make a template each, so expired windows are dropped
+        # once a minute; ones that suppressed records are kept a while longer for the note
+        if now - self._pruned_at < self.WINDOW:
+            return
+        self._pruned_at = now
+        self._windows = {
+            k: w for k, w in self._windows.items()
+            if now - w[0] < (self.KEEP_SUPPRESSED if w[2] else self.WINDOW)
+        }
+
+    def filter(self, record):
+        if not self.per_minute or record.levelno >= self.level:
+            return True
+        key = (record.name, record.msg)
+        now = time.monotonic()
+        self._prune(now)
+        window = self._windows.get(key)
+        if window is None or now - window[0] >= self.WINDOW:
+            suppressed = window[2] if window else 0
+            window = self._windows[key] = [now, 0, 0]
+            if suppressed:
+                if isinstance(record.args, tuple) and record.args:
+                    record.msg = f"{record.msg} [+%d similar suppressed]"
+                    record.args = record.args + (suppressed,)
+                elif not record.args:
+                    # not %-formatted, so a literal % in it must stay literal
+                    record.msg = f"{record.msg} [+{suppressed} similar suppressed]"
+        window[1] += 1
+        if window[1] > self.per_minute:
+            window[2] += 1
+            return False
+        return True
+
+
+# The event loop only pays for a filter check and a queue put; formatting and
+# file I/O happen on the listener's background thread.
+log_queue: queue.SimpleQueue = queue.SimpleQueue()
+queue_handler = QueueHandler(log_queue)
+queue_handler.addFilter(RateLimitFilter(LOG_RATE_LIMIT_PER_MINUTE, LOG_RATE_LIMIT_LEVEL))
+
+listener = QueueListener(
+    log_queue,
+    info_handler,
+    error_handler,
+    console_handler,
+    respect_handler_level=True,
+)
+listener.start()
+atexit.register(listener.stop)
+
+logger.addHandler(queue_handler)
 
 logger.propagate = False
@@ -1,3 +1,10 @@
-from .base import Base, engine, async_session
+from .base import Base, engine, async_session, bulk_mode, create_engine_from_env
 from .company import Company
-from .checkpoint import ScraperCheckpoint
\ No newline at end of file
+from .company_change import CompanyChange
+from .checkpoint import ScraperCheckpoint
+from .prefix_yield import PrefixYield
+from .scraper_run import ScraperRun
+from .search_fingerprint import SearchFingerprint
+from .company_officer import CompanyOfficer
+from .company_document import CompanyDocument
+from .dimensions import Address, Agent
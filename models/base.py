@@ -1,5 +1,6 @@
 import os
-from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncEngine, AsyncSession, create_async_engine, async_sessionmaker
 from sqlalchemy.orm import declarative_base
 
 DB_USER = os.getenv("POSTGRES_USER")
@@ -10,7 +11,57 @@ DB_PORT = os.getenv("POSTGRES_PORT", 5432)
 
 DATABASE_URL = f"postgresql+asyncpg://{DB_USER}:{DB_PASS}@{DB_HOST}:{DB_PORT}/{DB_NAME}"
 
-engine = create_async_engine(DATABASE_URL, echo=False)
+# synchronous_commit used inside bulk_mode() transactions (persist batches); "on" disables the override
+DB_BULK_SYNCHRONOUS_COMMIT = os.getenv("DB_BULK_SYNCHRONOUS_COMMIT", "off").lower()
+if DB_BULK_SYNCHRONOUS_COMMIT not in ("on", "off", "local", "remote_write", "remote_apply"):
+    raise ValueError(f"Invalid DB_BULK_SYNCHRONOUS_COMMIT: {DB_BULK_SYNCHRONOUS_COMMIT}")
+
+
+def create_engine_from_env(
+    application_name: str = "ny_scraper",
+    read_only: bool = False,
+    server_settings: dict | None = None,
+    **overrides,
+) -> AsyncEngine:
+    """
+    The one place engines are built. Pool and driver settings come from DB_* env
+    variables; keyword overrides win (e.g. pool_size for the read-only API pool).
+    """
+    settings = {
+        "application_name": application_name,
+        **({"default_transaction_read_only": "on"} if read_only else {}),
+        **(server_settings or {}),
+    }
+    options = {
+        "echo": os.getenv("DB_ECHO", "false").lower() == "true",
+        "pool_size": int(os.getenv("DB_POOL_SIZE", "10")),
+        "max_overflow": int(os.getenv("DB_MAX_OVERFLOW", "5")),
+        "pool_timeout": float(os.getenv("DB_POOL_TIMEOUT", "30")),
+        "pool_recycle": int(os.getenv("DB_POOL_RECYCLE", "1800")),
+        "pool_pre_ping": os.getenv("DB_POOL_PRE_PING", "true").lower() == "true",
+        "connect_args": {
+            # asyncpg's own statement cache, per connection
+            "statement_cache_size": int(os.getenv("DB_STATEMENT_CACHE_SIZE", "256")),
+            # SQLAlchemy's cache of prepared statements reused across executions
+            "prepared_statement_cache_size": int(os.getenv("DB_PREPARED_STATEMENT_CACHE_SIZE", "256")),
+            "server_settings": settings,
+        },
+    }
+    options.update(overrides)
+    return create_async_engine(os.getenv("DATABASE_URL", DATABASE_URL), **options)
+
+
+async def bulk_mode(session: AsyncSession):
+    """
+    Relaxes durability for the current transaction only: a crash may lose the
+    last few hundred milliseconds of commits, never corrupt data. Rows lost that
+    way are simply re-scraped.
+    """
+    if DB_BULK_SYNCHRONOUS_COMMIT != "on":
+        await session.execute(text(f"SET LOCAL synchronous_commit TO {DB_BULK_SYNCHRONOUS_COMMIT}"))
+
+
+engine = create_engine_from_env()
 async_session = async_sessionmaker(engine, expire_on_commit=False)
 
-Base = declarative_base()
\ No newline at end of file
+Base = declarative_base()
@@ -1,17 +1,19 @@
-from sqlalchemy import Column, Integer, String, Date, DateTime, Text
+from sqlalchemy import BigInteger, Column, Integer, String, Date, DateTime, Text, UniqueConstraint
 from models.base import Base
 from datetime import datetime
-from sqlalchemy.dialects.postgresql import ARRAY
+from sqlalchemy.dialects.postgresql import ARRAY, JSONB
 from sqlalchemy.orm import  DeclarativeBase, Mapped, mapped_column
 from typing import Optional, List
 from datetime import date, datetime, timezone
 
 class Company(Base):
     __tablename__ = "companies"
+    # entity numbers are issued per state, and several states share this table
+    __table_args__ = (UniqueConstraint("source_state", "entity_number", name="companies_state_entity_number_key"),)
 
     id: Mapped[int] = mapped_column(primary_key=True, autoincrement=True)
     source_state: Mapped[str] = mapped_column(String(10), nullable=False)
-    entity_number: Mapped[int] = mapped_column(Integer, nullable=False, unique=True)
+    entity_number: Mapped[int] = mapped_column(Integer, nullable=False)
     entity_name: Mapped[str] = mapped_column(String(255), nullable=False)
     entity_type: Mapped[str] = mapped_column(String(100), nullable=False)
     entity_subtype: Mapped[Optional[str]] = mapped_column(String(100))
@@ -48,4 +50,12 @@ class Company(Base):
     document_number: Mapped[Optional[str]] = mapped_column(String(100), nullable=True)
 
     source_detail_url: Mapped[str] = mapped_column(Text, nullable=True)
-    source_last_seen_at: Mapped[Date] = mapped_column(Date, nullable=False, default=datetime.now(timezone.utc).date())
\ No newline at end of file
+    source_last_seen_at: Mapped[Date] = mapped_column(Date, nullable=False, default=datetime.now(timezone.utc).date())
+    # short hash per tracked field, compared on re-sighting to log changes (see company_changes)
+    field_hashes: Mapped[Optional[dict]] = mapped_column(JSONB, nullable=True)
+
+    # content-hash keys into agents/addresses (models.dimensions); the inline text is left empty when set
+    # (declared last, in the order migrations append them to existing tables)
+    agent_key: Mapped[Optional[int]] = mapped_column(BigInteger, nullable=True)
+    principal_address_key: Mapped[Optional[int]] = mapped_column(BigInteger, nullable=True)
+    mailing_address_key: Mapped[Optional[int]] = mapped_column(BigInteger, nullable=True)
@@ -0,0 +1,19 @@
+from sqlalchemy import BigInteger, Column, DateTime, Index, Integer, String, func
+from sqlalchemy.dialects.postgresql import JSONB
+from models.base import Base
+
+
+class CompanyChange(Base):
+    """Append-only log of field changes; `diff` holds only the changed fields' new values."""
+    __tablename__ = "company_changes"
+
+    id = Column(BigInteger, primary_key=True, autoincrement=True)
+    source_state = Column(String(10), nullable=False)
+    entity_number = Column(Integer, nullable=False)
+    observed_at = Column(DateTime(timezone=True), nullable=False, server_default=func.now())
+    diff = Column(JSONB, nullable=False)
+
+    __table_args__ = (
+        Index("ix_company_changes_entity_observed", "entity_number", "observed_at"),
+        Index("ix_company_changes_observed_at", "observed_at"),
+    )
@@ -0,0 +1,20 @@
+from sqlalchemy import BigInteger, Column, Date, Integer, String, func
+from models.base import Base
+
+
+class CompanyDocument(Base):
+    """
+    One filing document of an entity. sha256/path stay empty until the PDF is
+    stored; path is content-addressed and relative to the data directory.
+    """
+    __tablename__ = "company_documents"
+
+    source_state = Column(String(10), primary_key=True)
+    entity_number = Column(Integer, primary_key=True)
+    document_id = Column(String(100), primary_key=True)
+    document_type = Column(String(255), nullable=True)
+    filed_date = Column(Date, nullable=True)
+    sha256 = Column(String(64), nullable=True, index=True)
+    path = Column(String, nullable=True)
+    size_bytes = Column(BigInteger, nullable=True)
+    fetched_at = Column(Date, nullable=False, server_default=func.current_date())
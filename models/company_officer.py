@@ -0,0 +1,24 @@
+from sqlalchemy import BigInteger, Column, Date, Index, Integer, String, func
+from models.base import Base
+
+
+class CompanyOfficer(Base):
+    """Officers, filers and other people named on an entity's record or filings."""
+    __tablename__ = "company_officers"
+
+    id = Column(BigInteger, primary_key=True, autoincrement=True)
+    source_state = Column(String(10), nullable=False)
+    entity_number = Column(Integer, nullable=False)
+    role = Column(String(100), nullable=False)  # e.g. CEO, FILER
+    name = Column(String(255), nullable=False)
+    street = Column(String(255), nullable=True)
+    city = Column(String(100), nullable=True)
+    state = Column(String(100), nullable=True)
+    postal_code = Column(String(20), nullable=True)
+    country = Column(String(100), nullable=True)
+    filed_date = Column(Date, nullable=True)
+    source_last_seen_at = Column(Date, nullable=False, server_default=func.current_date())
+
+    __table_args__ = (
+        Index("ux_company_officers_entity_role_name", "source_state", "entity_number", "role", "name", unique=True),
+    )
@@ -0,0 +1,110 @@
+"""
+Deduplicated agent and address dimensions for `companies`.
+
+A few registered-agent services and office addresses appear on a large share
+of filings, so their text is stored once:
+
+    addresses  address_key -> street, city, state, postal_code, country
+    agents     agent_key   -> name, address_key
+
+Keys are content hashes (see scraper.dimensions), so the same agent or address
+always gets the same key and can be inserted without looking anything up.
+With COMPANY_DIMENSIONS=true new rows carry agent_key / principal_address_key
+/ mailing_address_key and leave the inline text columns empty. Rows stored
+before that keep their text.
+
+Readers go through the companies_expanded view, which puts the text back and
+works for both kinds of rows. Foreign keys (DIMENSION_FOREIGN_KEYS) make sure a
+company never keeps a key whose dimension row is missing, since its inline
+text is already gone.
+"""
+import os
+from sqlalchemy import BigInteger, Column, String, text
+from sqlalchemy.ext.asyncio import AsyncConnection
+from models.base import Base
+from models.company import Company
+
+COMPANY_DIMENSIONS = os.getenv("COMPANY_DIMENSIONS", "false").lower() == "true"
+
+ADDRESS_FIELDS = ["street", "city", "state", "postal_code", "country"]
+# company address prefix -> its key column
+ADDRESS_KEYS = {"principal": "principal_address_key", "mailing": "mailing_address_key"}
+DIMENSION_KEYS = ["agent_key", *ADDRESS_KEYS.values()]
+# what readers see: every company column except the keys
+EXPANDED_COLUMNS = [c.name for c in Company.__table__.columns if c.name not in DIMENSION_KEYS]
+# bookkeeping columns stay out of the public record (API responses and daily exports)
+HIDDEN_COLUMNS = {"field_hashes"}
+PUBLIC_COLUMNS = [c for c in EXPANDED_COLUMNS if c not in HIDDEN_COLUMNS]
+
+VIEW = "companies_expanded"
+
+# constraint -> (table, column, referenced table and column)
+DIMENSION_FOREIGN_KEYS = {
+    "agents_address_key_fkey": ("agents", "address_key", "addresses (address_key)"),
+    "companies_agent_key_fkey": ("companies", "agent_key", "agents (agent_key)"),
+    "companies_principal_address_key_fkey": ("companies", "principal_address_key", "addresses (address_key)"),
+    "companies_mailing_address_key_fkey": ("companies", "mailing_address_key", "addresses (address_key)"),
+}
+
+
+class Address(Base):
+    __tablename__ = "addresses"
+
+    address_key = Column(BigInteger, primary_key=True, autoincrement=False)
+    street = Column(String(255), nullable=True)
+    city = Column(String(100), nullable=True)
+    state = Column(String(100), nullable=True)
+    postal_code = Column(String(20), nullable=True)
+    country = Column(String(100), nullable=True)
+
+
+class Agent(Base):
+    __tablename__ = "agents"
+
+    agent_key = Column(BigInteger, primary_key=True, autoincrement=False)
+    name = Column(String(255), nullable=True)
+    address_key = Column(BigInteger, nullable=True)
+
+
+def expanded_select(table: str = "companies") -> str:
+    """SELECT over `table` (companies or a detached partition) with the dimension text joined back."""
+    columns = []
+    for name in EXPANDED_COLUMNS:
+        if name == "agent_name":
+            columns.append("COALESCE(c.agent_name, ag.name) AS agent_name")
+            continue
+        prefix, _, field = name.partition("_")
+        if field in ADDRESS_FIELDS and prefix in ("principal", "mailing", "agent"):
+            alias = {"principal": "pa", "mailing": "ma", "agent": "aa"}[prefix]
+            columns.append(f"COALESCE(c.{name}, {alias}.{field}) AS {name}")
+        else:
+            columns.append(f"c.{name}")
+    return f"""
+        SELECT {", ".join(columns)}
+        FROM {table} c
+        LEFT JOIN addresses pa ON pa.address_key = c.principal_address_key
+        LEFT JOIN addresses ma ON ma.address_key = c.mailing_address_key
+        LEFT JOIN agents ag ON ag.agent_key = c.agent_key
+        LEFT JOIN addresses aa ON aa.address_key = ag.address_key
+    """
+
+
+async def init_dimensions(conn: AsyncConnection):
+    """Idempotent; runs after partitioning, which drops the view while it swaps tables."""
+    await conn.execute(text("CREATE INDEX IF NOT EXISTS ix_companies_agent_key ON companies (agent_key)"))
+    # added here rather than on the models: partitioning recreates companies without them
+    for name, (table, column, references) in DIMENSION_FOREIGN_KEYS.items():
+        await conn.execute(text(f"""
+            DO $$ BEGIN
+                IF NOT EXISTS (
+                    SELECT 1 FROM pg_constraint WHERE conname = '{name}' AND conrelid = '{table}'::regclass
+                ) THEN
+                    ALTER TABLE {table} ADD CONSTRAINT {name}
+                    FOREIGN KEY ({column}) REFERENCES {references};
+                END IF;
+            EXCEPTION WHEN foreign_key_violation THEN
+                RAISE WARNING '{name} not added: {table}.{column} has keys without a dimension row';
+            END $$
+        """))
+    await conn.execute(text(f"DROP VIEW IF EXISTS {VIEW}"))
+    await conn.execute(text(f"CREATE VIEW {VIEW} AS {expanded_select()}"))
@@ -0,0 +1,44 @@
+"""
+Idempotent in-place schema upgrades for tables that already exist.
+
+Base.metadata.create_all only creates missing tables; columns and indexes added
+to existing tables later are applied here, from init_db, on every start.
+"""
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncConnection
+from models.partitioning import is_partitioned
+
+UPGRADES = [
+    "ALTER TABLE companies ADD COLUMN IF NOT EXISTS field_hashes JSONB",
+    "ALTER TABLE companies ADD COLUMN IF NOT EXISTS agent_key BIGINT",
+    "ALTER TABLE companies ADD COLUMN IF NOT EXISTS principal_address_key BIGINT",
+    "ALTER TABLE companies ADD COLUMN IF NOT EXISTS mailing_address_key BIGINT",
+]
+
+
+# entity numbers were once unique on their own; they are only unique within a state
+# (old constraint, new constraint, its columns) for a plain and a partitioned table
+IDENTITY_CONSTRAINTS = {
+    False: ("companies_entity_number_key", "companies_state_entity_number_key",
+            "source_state, entity_number"),
+    True: ("companies_entity_number_seen_key", "companies_state_entity_number_seen_key",
+           "source_state, entity_number, source_last_seen_at"),
+}
+
+
+async def upgrade_company_identity(conn: AsyncConnection):
+    old, new, columns = IDENTITY_CONSTRAINTS[await is_partitioned(conn)]
+    await conn.execute(text(f"""
+        DO $$ BEGIN
+            IF NOT EXISTS (SELECT 1 FROM pg_constraint WHERE conname = '{new}') THEN
+                ALTER TABLE companies ADD CONSTRAINT {new} UNIQUE ({columns});
+            END IF;
+        END $$
+    """))
+    await conn.execute(text(f"ALTER TABLE companies DROP CONSTRAINT IF EXISTS {old}"))
+
+
+async def upgrade_schema(conn: AsyncConnection):
+    for statement in UPGRADES:
+        await conn.execute(text(statement))
+    await upgrade_company_identity(conn)
@@ -0,0 +1,145 @@
+"""
+Optional monthly range partitioning of `companies` by source_last_seen_at.
+
+Enabled with COMPANIES_PARTITIONING=month. init_db creates the table as usual
+and then converts it (copying any existing rows) into a partitioned table,
+and makes sure partitions exist for the surrounding months. Old partitions
+can be detached and archived with `python -m exporter.archive`.
+
+Postgres cannot enforce a unique index on a partitioned table unless it
+includes the partition key, so (source_state, entity_number) uniqueness is
+kept by persist_companies filtering out already stored entities.
+"""
+import os
+from datetime import date
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncConnection
+
+COMPANIES_PARTITIONING = os.getenv("COMPANIES_PARTITIONING", "none").lower()  # none | month
+PARTITIONED = COMPANIES_PARTITIONING == "month"
+PARTITION_MONTHS_AHEAD = int(os.getenv("COMPANIES_PARTITION_MONTHS_AHEAD", "2"))
+
+
+def company_conflict_target() -> list[str]:
+    """Columns of the unique index ON CONFLICT refers to."""
+    if PARTITIONED:
+        return ["source_state", "entity_number", "source_last_seen_at"]
+    return ["source_state", "entity_number"]
+
+
+def month_start(day: date, offset: int = 0) -> date:
+    months = day.year * 12 + day.month - 1 + offset
+    return date(months // 12, months % 12 + 1, 1)
+
+
+def partition_name(month: date) -> str:
+    return f"companies_y{month:%Y}m{month:%m}"
+
+
+async def is_partitioned(conn: AsyncConnection, table: str = "companies") -> bool:
+    result = await conn.execute(
+        text("""
+            SELECT 1 FROM pg_partitioned_table p
+            JOIN pg_class c ON c.oid = p.partrelid
+            WHERE c.relname = :table AND pg_table_is_visible(c.oid)
+        """),
+        {"table": table},
+    )
+    return result.scalar() is not None
+
+
+async def create_month_partition(conn: AsyncConnection, month: date):
+    month = month_start(month)
+    await conn.execute(text(f"""
+        CREATE TABLE IF NOT EXISTS {partition_name(month)}
+        PARTITION OF companies
+        FOR VALUES FROM ('{month}') TO ('{month_start(month, 1)}')
+    """))
+
+
+async def ensure_partitions(conn: AsyncConnection, today: date | None = None):
+    """Partitions for the current month and PARTITION_MONTHS_AHEAD after it."""
+    today = today or date.today()
+    for offset in range(0, PARTITION_MONTHS_AHEAD + 1):
+        await create_month_partition(conn, month_start(today, offset))
+
+
+async def migrate_to_partitioned(conn: AsyncConnection):
+    """
+    Converts a plain `companies` table into a partitioned one in place.
+    Runs inside the caller's transaction, so it either fully happens or not at all.
+    """
+    if await is_partitioned(conn):
+        return
+    # the view would pin the legacy table; init_dimensions recreates it on the new one
+    await conn.execute(text("DROP VIEW IF EXISTS companies_expanded"))
+    await conn.execute(text("ALTER TABLE companies RENAME TO companies_legacy"))
+    # the id sequence outlives the legacy table and keeps numbering continuous
+    await conn.execute(text("ALTER SEQUENCE companies_id_seq OWNED BY NONE"))
+    for constraint in ("companies_pkey", "companies_entity_number_key", "companies_state_entity_number_key"):
+        await conn.execute(text(f"ALTER TABLE companies_legacy DROP CONSTRAINT IF EXISTS {constraint}"))
+    await conn.execute(text("""
+        CREATE TABLE companies (LIKE companies_legacy INCLUDING DEFAULTS)
+        PARTITION BY RANGE (source_last_seen_at)
+    """))
+    await conn.execute(text("ALTER SEQUENCE companies_id_seq OWNED BY companies.id"))
+    await conn.execute(text("ALTER TABLE companies ADD PRIMARY KEY (id, source_last_seen_at)"))
+    await conn.execute(text(
+        "ALTER TABLE companies ADD CONSTRAINT companies_state_entity_number_seen_key "
+        "UNIQUE (source_state, entity_number, source_last_seen_at)"
+    ))
+    await conn.execute(text(
+        "CREATE INDEX IF NOT EXISTS ix_companies_entity_number ON companies (entity_number)"
+    ))
+
+    bounds = await conn.execute(text("SELECT min(source_last_seen_at), max(source_last_seen_at) FROM companies_legacy"))
+    first, last = bounds.one()
+    if first is not None:
+        month = month_start(first)
+        while month <= last:
+            await create_month_partition(conn, month)
+            month = month_start(month, 1)
+    await conn.execute(text("INSERT INTO companies SELECT * FROM companies_legacy"))
+    await conn.execute(text("DROP TABLE companies_legacy"))
+
+
+async def init_partitioning(conn: AsyncConnection):
+    if not PARTITIONED:
+        return
+    await migrate_to_partitioned(conn)
+    await ensure_partitions(conn)
+
+
+async def partitions_older_than(conn: AsyncConnection, cutoff: date) -> list[tuple[str, date]]:
+    """Monthly partitions whose whole range lies before `cutoff`, oldest first."""
+    result = await conn.execute(text("""
+        SELECT c.relname FROM pg_inherits i
+        JOIN pg_class c ON c.oid = i.inhrelid
+        JOIN pg_class p ON p.oid = i.inhparent
+        WHERE p.relname = 'companies'
+        ORDER BY c.relname
+    """))
+    old = []
+    for (name,) in result:
+        if not name.startswith("companies_y"):
+            continue
+        month = date(int(name[11:15]), int(name[16:18]), 1)
+        if month_start(month, 1) <= cutoff:
+            old.append((name, month))
+    return old
+
+
+async def detached_partitions(conn: AsyncConnection) -> list[tuple[str, date]]:
+    """Monthly partition tables no longer attached to companies (an archive run that did not finish)."""
+    result = await conn.execute(text("""
+        SELECT c.relname FROM pg_class c
+        WHERE c.relkind = 'r' AND c.relname ~ '^companies_y[0-9]{4}m[0-9]{2}$'
+        AND pg_table_is_visible(c.oid)
+        AND NOT EXISTS (SELECT 1 FROM pg_inherits i WHERE i.inhrelid = c.oid)
+        ORDER BY c.relname
+    """))
+    return [(name, date(int(name[11:15]), int(name[16:18]), 1)) for (name,) in result]
+
+
+async def detach_partition(conn: AsyncConnection, name: str):
+    await conn.execute(text(f"ALTER TABLE companies DETACH PARTITION {name}"))
@@ -0,0 +1,12 @@
+from models.base import Base
+from sqlalchemy import Column, String, Date, Float, func
+
+
+class PrefixYield(Base):
+    __tablename__ = "prefix_yields"
+
+    source_state = Column(String(10), primary_key=True)
+    prefix = Column(String, primary_key=True)
+    score = Column(Float, nullable=False, default=0.0)  # exponentially decayed new entities per day
+    score_date = Column(Date, nullable=False, server_default=func.current_date())
+    last_crawled = Column(Date, nullable=True)
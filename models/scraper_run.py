@@ -0,0 +1,13 @@
+from models.base import Base
+from sqlalchemy import Column, String, Date, DateTime, Integer
+
+
+class ScraperRun(Base):
+    __tablename__ = "scraper_runs"
+
+    run_date = Column(Date, primary_key=True)
+    kind = Column(String(20), primary_key=True)  # full | freshness
+    status = Column(String(20), nullable=False)  # running | completed | failed
+    attempts = Column(Integer, nullable=False, default=0)
+    started_at = Column(DateTime(timezone=True), nullable=True)
+    finished_at = Column(DateTime(timezone=True), nullable=True)
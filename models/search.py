@@ -0,0 +1,104 @@
+"""
+Name search support on `companies`.
+
+Two columns are maintained by a trigger on insert/update and are not mapped on
+the Company model:
+
+    search_names   entity_name plus previous_names, for trigram (fuzzy) matching
+    search_vector  tsvector over entity_name (A), previous_names (B), agent_name (C)
+                   (the agents row's name when the agent is stored as a dimension)
+
+GIN indexes cover search_vector and, when the pg_trgm extension is available,
+search_names, agent_name and agents.name. Without pg_trgm only full-text search works; see
+exporter.search. Enabled with COMPANY_SEARCH=true (the default).
+"""
+import os
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncConnection
+from logger import logger
+
+COMPANY_SEARCH = os.getenv("COMPANY_SEARCH", "true").lower() == "true"
+# text search configuration; "simple" does not stem, which suits proper names
+SEARCH_TS_CONFIG = os.getenv("SEARCH_TS_CONFIG", "simple")
+
+COLUMNS = [
+    "ALTER TABLE companies ADD COLUMN IF NOT EXISTS search_names TEXT",
+    "ALTER TABLE companies ADD COLUMN IF NOT EXISTS search_vector TSVECTOR",
+]
+
+TRIGGER_FUNCTION = f"""
+CREATE OR REPLACE FUNCTION companies_search_fields() RETURNS trigger AS $$
+BEGIN
+    NEW.search_names := concat_ws(' ', NEW.entity_name, NULLIF(array_to_string(NEW.previous_names, ' '), ''));
+    NEW.search_vector :=
+        setweight(to_tsvector('{SEARCH_TS_CONFIG}', coalesce(NEW.entity_name, '')), 'A') ||
+        setweight(to_tsvector('{SEARCH_TS_CONFIG}', coalesce(array_to_string(NEW.previous_names, ' '), '')), 'B') ||
+        setweight(to_tsvector('{SEARCH_TS_CONFIG}', coalesce(
+            NEW.agent_name, (SELECT name FROM agents WHERE agent_key = NEW.agent_key), ''
+        )), 'C');
+    RETURN NEW;
+END
+$$ LANGUAGE plpgsql
+"""
+
+TRIGGER = """
+CREATE TRIGGER companies_search_fields
+BEFORE INSERT OR UPDATE OF entity_name, previous_names, agent_name, agent_key ON companies
+FOR EACH ROW EXECUTE FUNCTION companies_search_fields()
+"""
+
+FULLTEXT_INDEXES = [
+    "CREATE INDEX IF NOT EXISTS ix_companies_search_vector ON companies USING gin (search_vector)",
+]
+
+TRIGRAM_INDEXES = [
+    "CREATE INDEX IF NOT EXISTS ix_companies_search_names_trgm ON companies USING gin (search_names gin_trgm_ops)",
+    "CREATE INDEX IF NOT EXISTS ix_companies_agent_name_trgm ON companies USING gin (agent_name gin_trgm_ops)",
+    "CREATE INDEX IF NOT EXISTS ix_agents_name_trgm ON agents USING gin (name gin_trgm_ops)",
+]
+
+
+async def has_trigram(conn: AsyncConnection) -> bool:
+    result = await conn.execute(text("SELECT 1 FROM pg_extension WHERE extname = 'pg_trgm'"))
+    return result.scalar() is not None
+
+
+async def enable_trigram(conn: AsyncConnection) -> bool:
+    """Creates pg_trgm if the server ships it and we are allowed to; never fails the caller."""
+    if await has_trigram(conn):
+        return True
+    available = await conn.execute(text("SELECT 1 FROM pg_available_extensions WHERE name = 'pg_trgm'"))
+    if available.scalar() is None:
+        logger.warning("pg_trgm is not available on this server, fuzzy name search disabled")
+        return False
+    try:
+        async with conn.begin_nested():
+            await conn.execute(text("CREATE EXTENSION IF NOT EXISTS pg_trgm"))
+    except Exception as e:
+        logger.warning("Could not create pg_trgm, fuzzy name search disabled: %s", e)
+        return False
+    return True
+
+
+async def init_search(conn: AsyncConnection):
+    """Idempotent; runs after partitioning so the trigger lands on the final table."""
+    if not COMPANY_SEARCH:
+        return
+    for statement in COLUMNS:
+        await conn.execute(text(statement))
+    await conn.execute(text(TRIGGER_FUNCTION))
+    await conn.execute(text("DROP TRIGGER IF EXISTS companies_search_fields ON companies"))
+    await conn.execute(text(TRIGGER))
+
+    # rows stored before the trigger existed; touching entity_name fires it
+    backfilled = await conn.execute(
+        text("UPDATE companies SET entity_name = entity_name WHERE search_vector IS NULL")
+    )
+    if backfilled.rowcount:
+        logger.info("Search columns backfilled for %d companies", backfilled.rowcount)
+
+    for statement in FULLTEXT_INDEXES:
+        await conn.execute(text(statement))
+    if await enable_trigram(conn):
+        for statement in TRIGRAM_INDEXES:
+            await conn.execute(text(statement))
@@ -0,0 +1,13 @@
+from models.base import Base
+from sqlalchemy import Column, String, Date, func
+from sqlalchemy.dialects.postgresql import ARRAY
+
+
+class SearchFingerprint(Base):
+    __tablename__ = "search_fingerprints"
+
+    source_state = Column(String(10), primary_key=True)
+    prefix = Column(String, primary_key=True)
+    fingerprint = Column(String(16), nullable=True)  # hash of the sorted entity keys on the first result page
+    entity_keys = Column(ARRAY(String), nullable=False, default=list)  # keys already handled for this prefix
+    updated_at = Column(Date, nullable=False, server_default=func.current_date())
@@ -0,0 +1,213 @@
+"""
+Opt-in run profiling shared by the scraper and the exporter.
+
+Enabled with PROFILE=true. While enabled the run records:
+  - wall time per stage (search, detail, history, parse, persist, checkpoint, export, ...)
+  - event-loop lag, sampled every PROFILE_LOOP_LAG_INTERVAL seconds
+  - the PROFILE_TOP_N slowest prefixes and entities
+  - optionally a cProfile (or yappi, when installed) dump of every
+    PROFILE_SAMPLE_EVERY-th batch, PROFILE_DUMP=cprofile|yappi
+
+and writes perf_report.json (plus <section>_profile.pstats) next to the
+day's manifest. The scraper and the exporter each own a section of the report.
+Disabled, every hook is a no-op.
+"""
+import asyncio
+import cProfile
+import heapq
+import json
+import os
+import time
+from contextlib import contextmanager, nullcontext
+from datetime import datetime, timezone
+from pathlib import Path
+
+PROFILE = os.getenv("PROFILE", "false").lower() == "true"
+PROFILE_TOP_N = int(os.getenv("PROFILE_TOP_N", "20"))
+PROFILE_LOOP_LAG_INTERVAL = float(os.getenv("PROFILE_LOOP_LAG_INTERVAL", "0.5"))
+PROFILE_DUMP = os.getenv("PROFILE_DUMP", "").lower()  # "" | cprofile | yappi
+PROFILE_SAMPLE_EVERY = int(os.getenv("PROFILE_SAMPLE_EVERY", "20"))
+
+REPORT_FILE = "perf_report.json"
+PSTATS_FILE = "profile.pstats"
+
+
+def _percentile(values: list[float], q: float) -> float | None:
+    if not values:
+        return None
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(q / 100 * len(ordered)))]
+
+
+class RunProfiler:
+    def __init__(self, enabled: bool = PROFILE, top_n: int = PROFILE_TOP_N):
+        self.enabled = enabled
+        self.top_n = top_n
+        self.started_at: datetime | None = None
+        self._started = 0.0
+        self.stages: dict[str, list] = {}          # name -> [count, total, max]
+        self.slowest: dict[str, list] = {}         # kind -> min-heap of (seconds, key)
+        self.loop_lag: list[float] = []
+        self._lag_task: asyncio.Task | None = None
+        self._dump = None
+        self._samples = 0
+        self._active = 0
+        self._profiled_batches = 0
+
+    # ---------------- Lifecycle ----------------
+    def start(self):
+        """Starts a fresh run; a long-lived process (the in-process runner) calls this once per run."""
+        if not self.enabled:
+            return
+        self.stop()
+        self.stages = {}
+        self.slowest = {}
+        self.loop_lag = []
+        self._dump = None
+        self._samples = 0
+        self._active = 0
+        self._profiled_batches = 0
+        self.started_at = datetime.now(timezone.utc)
+        self._started = time.perf_counter()
+        try:
+            self._lag_task = asyncio.get_running_loop().create_task(self._sample_loop_lag())
+        except RuntimeError:
+            self._lag_task = None
+        if PROFILE_DUMP == "yappi":
+            try:
+                import yappi
+
+                yappi.clear_stats()
+                yappi.set_clock_type("wall")
+                self._dump = yappi
+            except ImportError:
+                self._dump = cProfile.Profile()
+        elif PROFILE_DUMP == "cprofile":
+            self._dump = cProfile.Profile()
+
+    def stop(self):
+        if self._lag_task:
+            self._lag_task.cancel()
+            self._lag_task = None
+
+    async def _sample_loop_lag(self):
+        while True:
+            expected = time.perf_counter() + PROFILE_LOOP_LAG_INTERVAL
+            await asyncio.sleep(PROFILE_LOOP_LAG_INTERVAL)
+            self.loop_lag.append(max(time.perf_counter() - expected, 0.0))
+
+    # ---------------- Recording ----------------
+    def record(self, stage: str, seconds: float, key=None, kind: str | None = None):
+        entry = self.stages.get(stage)
+        if entry is None:
+            entry = self.stages[stage] = [0, 0.0, 0.0]
+        entry[0] += 1
+        entry[1] += seconds
+        entry[2] = max(entry[2], seconds)
+        if kind is not None:
+            heap = self.slowest.setdefault(kind, [])
+            item = (seconds, str(key))
+            if len(heap) < self.top_n:
+                heapq.heappush(heap, item)
+            elif item > heap[0]:
+                heapq.heapreplace(heap, item)
+
+    def stage(self, stage: str, key=None, kind: str | None = None):
+        """Times the enclosed block (awaits included) as `stage`; kind/key also rank it."""
+        if not self.enabled:
+            return nullcontext()
+        return self._timed(stage, key, kind)
+
+    @contextmanager
+    def _timed(self, stage: str, key, kind):
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.record(stage, time.perf_counter() - started, key, kind)
+
+    def sampled(self):
+        """Wraps one batch; every PROFILE_SAMPLE_EVERY-th one runs under the dump profiler."""
+        if not self.enabled or self._dump is None:
+            return nullcontext()
+        self._samples += 1
+        if (self._samples - 1) % PROFILE_SAMPLE_EVERY:
+            return nullcontext()
+        return self._profiled()
+
+    @contextmanager
+    def _profiled(self):
+        # batches of concurrently crawled states may overlap; the outermost one switches the profiler
+        is_cprofile = isinstance(self._dump, cProfile.Profile)
+        self._active += 1
+        self._profiled_batches += 1
+        if self._active == 1:
+            if is_cprofile:
+                self._dump.enable()
+            else:
+                self._dump.start()
+        try:
+            yield
+        finally:
+            self._active -= 1
+            if self._active == 0:
+                if is_cprofile:
+                    self._dump.disable()
+                else:
+                    self._dump.stop()
+
+    # ---------------- Report ----------------
+    def report(self) -> dict:
+        lag = self.loop_lag
+        return {
+            "started_at": self.started_at.isoformat() if self.started_at else None,
+            "wall_seconds": round(time.perf_counter() - self._started, 3) if self._started else None,
+            "stages": {
+                name: {
+                    "count": count,
+                    "total_seconds": round(total, 3),
+                    "mean_ms": round(total / count * 1000, 2) if count else None,
+                    "max_ms": round(longest * 1000, 2),
+                }
+                for name, (count, total, longest) in sorted(self.stages.items(), key=lambda s: -s[1][1])
+            },
+            "loop_lag_ms": {
+                "samples": len(lag),
+                "p50": round(_percentile(lag, 50) * 1000, 2) if lag else None,
+                "p99": round(_percentile(lag, 99) * 1000, 2) if lag else None,
+                "max": round(max(lag) * 1000, 2) if lag else None,
+            },
+            "slowest": {
+                kind: [{"key": key, "seconds": round(seconds, 3)} for seconds, key in sorted(heap, reverse=True)]
+                for kind, heap in self.slowest.items()
+            },
+        }
+
+    def write_report(self, output_dir, section: str = "scraper") -> Path | None:
+        """Merges this run's report into output_dir/perf_report.json under `section`."""
+        if not self.enabled:
+            return None
+        output_dir = Path(output_dir)
+        output_dir.mkdir(parents=True, exist_ok=True)
+        report_file = output_dir / REPORT_FILE
+        try:
+            report = json.loads(report_file.read_text())
+        except (OSError, ValueError):
+            report = {}
+        report[section] = self.report()
+
+        if self._dump is not None and self._profiled_batches:
+            pstats_file = output_dir / f"{section}_{PSTATS_FILE}"
+            if isinstance(self._dump, cProfile.Profile):
+                self._dump.dump_stats(pstats_file)
+            else:
+                self._dump.get_func_stats().save(str(pstats_file), type="pstat")
+            report[section]["profile_dump"] = pstats_file.name
+
+        tmp = report_file.with_suffix(".tmp")
+        tmp.write_text(json.dumps(report, indent=2))
+        os.replace(tmp, report_file)
+        return report_file
+
+
+profiler = RunProfiler()
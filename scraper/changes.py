@@ -0,0 +1,34 @@
+"""
+Field-level change detection for re-scraped entities.
+
+Every stored company keeps a short hash per tracked field (companies.field_hashes).
+When an entity is scraped again, only fields whose hash differs are written to
+company_changes as a compact {field: new_value} diff and applied to the row.
+"""
+import hashlib
+import json
+
+# fields that describe the entity itself; bookkeeping columns are not tracked
+UNTRACKED_FIELDS = {"source_state", "entity_number", "source_last_seen_at", "source_detail_url", "field_hashes"}
+
+
+def field_hash(value) -> str:
+    encoded = json.dumps(value, default=str, sort_keys=True, ensure_ascii=False).encode()
+    return hashlib.blake2b(encoded, digest_size=6).hexdigest()
+
+
+def field_hashes(row: dict) -> dict[str, str]:
+    return {field: field_hash(value) for field, value in row.items() if field not in UNTRACKED_FIELDS}
+
+
+def diff_row(row: dict, new_hashes: dict[str, str], stored_hashes: dict[str, str]) -> dict:
+    """New values of the fields whose hash changed."""
+    return {
+        field: row[field]
+        for field, digest in new_hashes.items()
+        if stored_hashes.get(field) != digest
+    }
+
+
+def jsonable(diff: dict) -> dict:
+    return json.loads(json.dumps(diff, default=str))
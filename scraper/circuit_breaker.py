@@ -0,0 +1,162 @@
+"""
+Shared circuit breaker for the DOS API.
+
+The site sits behind a WAF that answers with HTML challenge pages or 403s once
+the TS*/TSPD_* cookies expire. Instead of every coroutine burning its retries
+against a blocked endpoint, post_json reports those responses here; once
+enough of them arrive within a short window the breaker opens, all workers
+park on wait(), the cookie refresh hook runs once, and the breaker closes
+again so parked requests resume where they were.
+"""
+import asyncio
+import importlib
+import inspect
+import os
+import time
+from typing import Awaitable, Callable
+from aiohttp import ClientError
+from dotenv import dotenv_values
+from logger import logger
+
+CookieRefreshHook = Callable[[dict], dict | None | Awaitable[dict | None]]
+
+COOKIE_ENV_PREFIX = "API_COOKIE_"
+
+
+class BlockDetected(ClientError):
+    """Response looks like a WAF block or challenge page rather than API data."""
+
+
+class CircuitOpenError(ClientError):
+    """The breaker gave up: cookie refresh did not lift the block."""
+
+
+def looks_blocked(status: int, content_type: str, body: str) -> bool:
+    if status in (403, 429):
+        return True
+    if status == 200 and "json" not in (content_type or "").lower():
+        head = body.lstrip()[:1]
+        return head not in ("{", "[")
+    return False
+
+
+def reload_env_cookies(current: dict, env_file: str | None = None) -> dict:
+    """
+    Default refresh hook: re-reads API_COOKIE_* values from .env (falling back
+    to the process environment), so an operator or sidecar can drop in fresh
+    cookies without restarting the crawl. The file wins: the environment still
+    holds the values load_dotenv / compose env_file set at startup, i.e. the
+    expired ones. benchmarks/check_cookie_refresh.py exercises this.
+    """
+    values = {**os.environ, **dotenv_values(env_file)}
+    refreshed = {}
+    for name in current:
+        value = values.get(f"{COOKIE_ENV_PREFIX}{name}")
+        if value:
+            refreshed[name] = value
+    return refreshed
+
+
+def load_hook(spec: str | None) -> CookieRefreshHook:
+    """spec is 'package.module:function'; falls back to reload_env_cookies."""
+    if not spec:
+        return reload_env_cookies
+    module_name, _, attr = spec.partition(":")
+    return getattr(importlib.import_module(module_name), attr)
+
+
+class CircuitBreaker:
+    def __init__(
+        self,
+        cookies: dict,
+        refresh_hook: CookieRefreshHook | None = None,
+        threshold: int = 5,
+        window: float = 30.0,
+        cooldown: float = 15.0,
+        max_trips: int = 3,
+    ):
+        self.cookies = cookies
+        self.refresh_hook = refresh_hook or reload_env_cookies
+        self.threshold = threshold
+        self.window = window
+        self.cooldown = cooldown
+        self.max_trips = max_trips
+
+        self.trips = 0
+        self.failed = False
+        self._blocks: list[float] = []
+        self._closed = asyncio.Event()
+        self._closed.set()
+        self._lock = asyncio.Lock()
+
+    @classmethod
+    def from_env(cls, cookies: dict) -> "CircuitBreaker":
+        return cls(
+            cookies,
+            refresh_hook=load_hook(os.getenv("COOKIE_REFRESH_HOOK")),
+            threshold=int(os.getenv("BREAKER_THRESHOLD", "5")),
+            window=float(os.getenv("BREAKER_WINDOW_SECONDS", "30")),
+            cooldown=float(os.getenv("BREAKER_COOLDOWN_SECONDS", "15")),
+            max_trips=int(os.getenv("BREAKER_MAX_TRIPS", "3")),
+        )
+
+    def reset(self):
+        """Back to closed with no history, for the next crawl of a long-lived process."""
+        self.trips = 0
+        self.failed = False
+        self._blocks.clear()
+        self._closed = asyncio.Event()
+        self._closed.set()
+        self._lock = asyncio.Lock()
+
+    @property
+    def is_open(self) -> bool:
+        return not self._closed.is_set()
+
+    async def wait(self):
+        """Parks the caller while the breaker is open."""
+        await self._closed.wait()
+        if self.failed:
+            raise CircuitOpenError("DOS API still blocked after cookie refresh")
+
+    def record_success(self):
+        self._blocks.clear()
+        self.trips = 0
+
+    async def record_block(self, reason: str):
+        now = time.monotonic()
+        self._blocks = [t for t in self._blocks if now - t < self.window]
+        self._blocks.append(now)
+        if len(self._blocks) >= self.threshold and not self.is_open:
+            await self._trip(reason)
+
+    async def _trip(self, reason: str):
+        async with self._lock:
+            if self.is_open:
+                return
+            self._closed.clear()
+            self.trips += 1
+            logger.error(
+                "Circuit breaker open (trip %d/%d): %s — pausing all requests",
+                self.trips, self.max_trips, reason,
+            )
+        try:
+            if self.trips > self.max_trips:
+                self.failed = True
+                return
+            try:
+                refreshed = self.refresh_hook(dict(self.cookies))
+                if inspect.isawaitable(refreshed):
+                    refreshed = await refreshed
+            except Exception as e:
+                logger.exception("Cookie refresh hook failed: %s", e)
+                refreshed = None
+            if refreshed:
+                self.cookies.update(refreshed)
+                logger.info("Cookies refreshed: %s", ", ".join(sorted(refreshed)))
+            else:
+                logger.warning("Cookie refresh hook returned nothing, retrying with current cookies")
+            await asyncio.sleep(self.cooldown)
+        finally:
+            self._blocks.clear()
+            self._closed.set()
@@ -0,0 +1,37 @@
+"""
+Crawl process entrypoint, spawned by ScraperRunner for every run and retry.
+
+    python -m scraper.crawl                 # every state in SCRAPER_STATES
+    python -m scraper.crawl --states NY
+
+.env is loaded before any module reads its settings, and scraper.engine is
+imported once under its own name (`python -m scraper.engine` loads it twice:
+as __main__ and again when the adapter module imports it). Only what the
+crawl itself needs loads up front; pandas and the exporter are imported when
+the day's export starts, zstandard only with RAW_ARCHIVE on.
+benchmarks/bench_startup.py keeps an eye on the cost. The loop backend
+follows EVENT_LOOP (see event_loop).
+"""
+import argparse
+from dotenv import load_dotenv
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--states", default=None, help="comma-separated, defaults to SCRAPER_STATES")
+    args = parser.parse_args(argv)
+
+    load_dotenv()
+    import event_loop
+    from scraper.engine import main as crawl
+    from scraper.shutdown import DRAINED_EXIT_CODE, CrawlDrained
+
+    try:
+        event_loop.run(crawl(states=args.states, handle_signals=True))
+    except CrawlDrained:
+        return DRAINED_EXIT_CODE
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
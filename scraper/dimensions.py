@@ -0,0 +1,204 @@
+"""
+Resolves agent and address text of company rows into dimension keys (see
+models.dimensions) during persist_companies when COMPANY_DIMENSIONS=true.
+
+Keys are derived from the content itself, so resolving never reads the
+database: rows whose keys are in the in-process KeyCache are known to exist,
+the rest are inserted with ON CONFLICT DO NOTHING in one statement per table.
+The cache only learns a key once the transaction that inserted it committed
+(see remember), so a rolled-back batch never leaves keys behind that later
+batches would skip; the foreign keys from init_dimensions back this up.
+
+    python -m scraper.dimensions --migrate     # move stored rows to dimension keys
+"""
+import argparse
+import hashlib
+import json
+import os
+from collections import OrderedDict
+from sqlalchemy import text
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.ext.asyncio import AsyncSession
+from logger import logger
+import event_loop
+from models import Address, Agent, async_session
+from models.dimensions import ADDRESS_FIELDS, ADDRESS_KEYS
+
+DIMENSION_CACHE_SIZE = int(os.getenv("DIMENSION_CACHE_SIZE", "200000"))
+MIGRATE_BATCH_SIZE = int(os.getenv("DIMENSION_MIGRATE_BATCH_SIZE", "5000"))
+
+AGENT_ADDRESS = "agent"
+
+
+def content_key(*values) -> int:
+    """Signed 64-bit blake2b of the values, to fit a BIGINT."""
+    encoded = json.dumps(values, default=str, ensure_ascii=False).encode()
+    return int.from_bytes(hashlib.blake2b(encoded, digest_size=8).digest(), "big", signed=True)
+
+
+def address_key(fields: dict) -> int | None:
+    values = [fields.get(f) for f in ADDRESS_FIELDS]
+    if all(v is None for v in values):
+        return None
+    return content_key("address", *values)
+
+
+def agent_key(name: str | None, address: int | None) -> int | None:
+    if name is None and address is None:
+        return None
+    return content_key("agent", name, address)
+
+
+class KeyCache:
+    """LRU of dimension keys known to be stored."""
+
+    def __init__(self, max_keys: int):
+        self.max_keys = max_keys
+        self.hits = 0
+        self.misses = 0
+        self._keys: OrderedDict[tuple[str, int], None] = OrderedDict()
+
+    def __contains__(self, key: tuple[str, int]) -> bool:
+        if key in self._keys:
+            self._keys.move_to_end(key)
+            self.hits += 1
+            return True
+        self.misses += 1
+        return False
+
+    def add(self, key: tuple[str, int]):
+        self._keys[key] = None
+        self._keys.move_to_end(key)
+        while len(self._keys) > self.max_keys:
+            self._keys.popitem(last=False)
+
+    def update(self, keys):
+        for key in keys:
+            self.add(key)
+
+    def clear(self):
+        self._keys.clear()
+
+
+key_cache = KeyCache(DIMENSION_CACHE_SIZE)
+
+
+def _address_fields(row: dict, prefix: str) -> dict:
+    return {f: row.get(f"{prefix}_{f}") for f in ADDRESS_FIELDS}
+
+
+async def resolve_dimensions(db: AsyncSession, rows: list[dict]) -> list[tuple[str, int]]:
+    """
+    Sets agent_key / principal_address_key / mailing_address_key on the rows and
+    clears the inline text they replace; missing dimension rows are inserted
+    on db (committed by the caller together with the companies).
+    Returns the inserted keys, for key_cache.update once the commit succeeded.
+    """
+    addresses: dict[int, dict] = {}
+    agents: dict[int, dict] = {}
+    for row in rows:
+        for prefix, column in ADDRESS_KEYS.items():
+            fields = _address_fields(row, prefix)
+            key = address_key(fields)
+            if key is not None and ("address", key) not in key_cache:
+                addresses[key] = {"address_key": key, **fields}
+            row[column] = key
+            for f in ADDRESS_FIELDS:
+                row[f"{prefix}_{f}"] = None
+
+        fields = _address_fields(row, AGENT_ADDRESS)
+        agent_address = address_key(fields)
+        if agent_address is not None and ("address", agent_address) not in key_cache:
+            addresses[agent_address] = {"address_key": agent_address, **fields}
+        key = agent_key(row.get("agent_name"), agent_address)
+        if key is not None and ("agent", key) not in key_cache:
+            agents[key] = {"agent_key": key, "name": row.get("agent_name"), "address_key": agent_address}
+        row["agent_key"] = key
+        row["agent_name"] = None
+        for f in ADDRESS_FIELDS:
+            row[f"{AGENT_ADDRESS}_{f}"] = None
+
+    # sorted so that concurrent batches take the key locks in the same order
+    if addresses:
+        await db.execute(
+            insert(Address).on_conflict_do_nothing(index_elements=["address_key"]),
+            [addresses[k] for k in sorted(addresses)],
+        )
+    if agents:
+        await db.execute(
+            insert(Agent).on_conflict_do_nothing(index_elements=["agent_key"]),
+            [agents[k] for k in sorted(agents)],
+        )
+    # not cached yet: until the caller commits, a rollback would take these rows with it
+    return [("address", key) for key in addresses] + [("agent", key) for key in agents]
+
+
+# ---------------- Migration of stored rows ----------------
+INLINE_COLUMNS = ["agent_name"] + [
+    f"{prefix}_{f}" for prefix in [*ADDRESS_KEYS, AGENT_ADDRESS] for f in ADDRESS_FIELDS
+]
+
+INLINE_BATCH = text(f"""
+    SELECT id, {", ".join(INLINE_COLUMNS)}
+    FROM companies
+    WHERE id > :after
+    AND agent_key IS NULL AND principal_address_key IS NULL AND mailing_address_key IS NULL
+    ORDER BY id
+    LIMIT :limit
+""")
+
+SET_KEYS = text(f"""
+    UPDATE companies SET
+        agent_key = :agent_key,
+        principal_address_key = :principal_address_key,
+        mailing_address_key = :mailing_address_key,
+        {", ".join(f"{c} = NULL" for c in INLINE_COLUMNS)}
+    WHERE id = :id
+""")
+
+
+async def migrate(batch_size: int = MIGRATE_BATCH_SIZE) -> int:
+    """Moves the inline agent/address text of stored rows into the dimensions, in id order."""
+    from scraper.engine import init_db
+
+    await init_db()
+    after = 0
+    migrated = 0
+    while True:
+        async with async_session() as db:
+            batch = [dict(r) for r in (await db.execute(
+                INLINE_BATCH, {"after": after, "limit": batch_size}
+            )).mappings()]
+            if not batch:
+                break
+            after = batch[-1]["id"]
+            new_keys = await resolve_dimensions(db, batch)
+            await db.execute(SET_KEYS, [
+                {"id": r["id"], "agent_key": r["agent_key"],
+                 "principal_address_key": r["principal_address_key"],
+                 "mailing_address_key": r["mailing_address_key"]}
+                for r in batch
+            ])
+            await db.commit()
+            key_cache.update(new_keys)
+        migrated += len(batch)
+        logger.info("Dimensions: %d rows migrated (up to id %d)", migrated, after)
+    logger.info(
+        "Dimension migration done: %d rows, key cache %d hits / %d misses",
+        migrated, key_cache.hits, key_cache.misses,
+    )
+    return migrated
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--migrate", action="store_true", help="move stored inline agent/address text to dimensions")
+    parser.add_argument("--batch-size", type=int, default=MIGRATE_BATCH_SIZE)
+    args = parser.parse_args()
+    if not args.migrate:
+        parser.error("nothing to do (use --migrate)")
+    event_loop.run(migrate(args.batch_size))
+
+
+if __name__ == "__main__":
+    main()
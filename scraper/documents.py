@@ -0,0 +1,234 @@
+"""
+Officer rows and filing documents (PDFs) of newly found entities.
+
+Enabled with DOCUMENTS=true, for adapters with supports_documents. After the
+crawl, every company first seen today without a company_documents row gets
+its filings fetched (StateAdapter.filings): officer/filer rows are
+bulk-inserted into company_officers and every filing becomes a
+company_documents row. The PDFs are then streamed to disk in
+DOCUMENT_CHUNK_KB chunks while being hashed, at most DOCUMENT_CONCURRENCY
+at a time, and land on a content-addressed path in the day's folder:
+
+    {daily folder}/documents/ab/ab12...ef.pdf
+
+Memory stays at concurrency x chunk size whatever the document size. A
+document that is already stored with a hash is not downloaded again, and
+content whose hash is already on disk is not written twice.
+"""
+import asyncio
+import hashlib
+import os
+import uuid
+from pathlib import Path
+
+import aiohttp
+from sqlalchemy import text
+from sqlalchemy.dialects.postgresql import insert
+
+from daily_folder import ensure_daily_folder
+from logger import logger
+from models import CompanyDocument, CompanyOfficer, async_session
+from scraper.circuit_breaker import CircuitOpenError
+from scraper.shutdown import drain, gather_draining
+
+DOCUMENTS = os.getenv("DOCUMENTS", "false").lower() == "true"
+DOCUMENT_CONCURRENCY = int(os.getenv("DOCUMENT_CONCURRENCY", "4"))
+DOCUMENT_CHUNK_KB = int(os.getenv("DOCUMENT_CHUNK_KB", "64"))
+DOCUMENT_MAX_MB = float(os.getenv("DOCUMENT_MAX_MB", "25"))
+DOCUMENT_TIMEOUT = float(os.getenv("DOCUMENT_TIMEOUT", "120"))
+# entities whose filings are fetched and inserted together
+DOCUMENT_BATCH_SIZE = int(os.getenv("DOCUMENT_BATCH_SIZE", "100"))
+
+DOCUMENTS_DIR = "documents"
+# adapters may leave optional fields out; executemany needs the same keys on every row
+OFFICER_FIELDS = ["entity_number", "role", "name", "street", "city", "state", "postal_code", "country", "filed_date"]
+DOCUMENT_FIELDS = ["entity_number", "document_id", "document_type", "filed_date"]
+
+PENDING_ENTITIES = text("""
+    SELECT c.entity_number, c.entity_name, c.incorporator_name
+    FROM companies c
+    WHERE c.source_state = :state
+    AND c.source_last_seen_at = CURRENT_DATE
+    AND c.entity_number > :after
+    AND NOT EXISTS (
+        SELECT 1 FROM company_documents d
+        WHERE d.source_state = c.source_state AND d.entity_number = c.entity_number
+    )
+    ORDER BY c.entity_number
+    LIMIT :limit
+""")
+
+PENDING_DOCUMENTS = text("""
+    SELECT d.entity_number, d.document_id, d.document_type
+    FROM company_documents d
+    JOIN companies c ON c.source_state = d.source_state AND c.entity_number = d.entity_number
+    WHERE d.source_state = :state
+    AND c.source_last_seen_at = CURRENT_DATE
+    AND d.sha256 IS NULL
+    AND (d.entity_number, d.document_id) > (:after_entity, :after_document)
+    ORDER BY d.entity_number, d.document_id
+    LIMIT :limit
+""")
+
+
+async def store_filings(state: str, officers: list[dict], documents: list[dict]):
+    """Bulk insert; rows that are already stored are left alone."""
+    async with async_session() as db:
+        if officers:
+            await db.execute(
+                insert(CompanyOfficer).on_conflict_do_nothing(
+                    index_elements=["source_state", "entity_number", "role", "name"]
+                ),
+                [{"source_state": state, **{f: row.get(f) for f in OFFICER_FIELDS}} for row in officers],
+            )
+        if documents:
+            await db.execute(
+                insert(CompanyDocument).on_conflict_do_nothing(),
+                [{"source_state": state, **{f: row.get(f) for f in DOCUMENT_FIELDS}} for row in documents],
+            )
+        await db.commit()
+
+
+async def fetch_filings(session: aiohttp.ClientSession, adapter) -> tuple[int, int]:
+    """Officer rows and document references for today's entities that have none yet."""
+    officers_total = documents_total = 0
+    after = 0
+    while not drain.requested:
+        async with async_session() as db:
+            companies = (await db.execute(
+                PENDING_ENTITIES, {"state": adapter.state, "after": after, "limit": DOCUMENT_BATCH_SIZE}
+            )).mappings().all()
+        if not companies:
+            break
+        after = companies[-1]["entity_number"]
+
+        results = await gather_draining(
+            [asyncio.create_task(adapter.filings(session, dict(company))) for company in companies]
+        )
+        officers, documents = [], []
+        for company, result in zip(companies, results):
+            if isinstance(result, CircuitOpenError):
+                raise result
+            if isinstance(result, asyncio.CancelledError):
+                continue
+            if isinstance(result, BaseException):
+                # no rows means the entity is picked up again by the next run
+                logger.warning("No filings for %s %s: %s", adapter.state, company["entity_number"], result)
+                continue
+            officers.extend(result[0])
+            documents.extend(result[1])
+        await store_filings(adapter.state, officers, documents)
+        officers_total += len(officers)
+        documents_total += len(documents)
+    return officers_total, documents_total
+
+
+async def download_document(
+    session: aiohttp.ClientSession,
+    adapter,
+    ref: dict,
+    folder: Path,
+    semaphore: asyncio.Semaphore,
+) -> tuple[str, Path, int] | None:
+    """Streams one document to folder/.<random>.part; (sha256, temp path, size) or None on failure."""
+    method, url, kwargs = adapter.document_request(ref)
+    part = folder / f".{uuid.uuid4().hex}.part"
+    digest = hashlib.sha256()
+    size = 0
+    limit = DOCUMENT_MAX_MB * 1024 * 1024
+    async with semaphore:
+        if adapter.breaker:
+            await adapter.breaker.wait()
+        try:
+            async with session.request(
+                method, url, timeout=aiohttp.ClientTimeout(total=DOCUMENT_TIMEOUT), **kwargs
+            ) as resp:
+                if resp.status != 200:
+                    logger.warning("Document %s: status %s", ref["document_id"], resp.status)
+                    return None
+                with part.open("wb") as f:
+                    async for chunk in resp.content.iter_chunked(DOCUMENT_CHUNK_KB * 1024):
+                        size += len(chunk)
+                        if size > limit:
+                            raise ValueError(f"larger than {DOCUMENT_MAX_MB} MB")
+                        digest.update(chunk)
+                        f.write(chunk)
+        except asyncio.CancelledError:
+            part.unlink(missing_ok=True)
+            raise
+        except Exception as e:
+            logger.warning("Document %s not stored: %s", ref["document_id"], e)
+            part.unlink(missing_ok=True)
+            return None
+    return digest.hexdigest(), part, size
+
+
+async def store_document(db, state: str, ref: dict, sha256: str, part: Path, size: int, folder: Path, base_dir: Path):
+    """Moves a downloaded document to its content address, unless that content is already stored."""
+    stored = (await db.execute(
+        text("SELECT path FROM company_documents WHERE sha256 = :sha256 AND path IS NOT NULL LIMIT 1"),
+        {"sha256": sha256},
+    )).scalar()
+    if stored and (base_dir / stored).exists():
+        part.unlink()
+        path = stored
+    else:
+        target = folder / sha256[:2] / f"{sha256}.pdf"
+        if target.exists():
+            part.unlink()
+        else:
+            target.parent.mkdir(parents=True, exist_ok=True)
+            os.replace(part, target)
+        path = str(target.relative_to(base_dir))
+    await db.execute(
+        text("""
+            UPDATE company_documents SET sha256 = :sha256, path = :path, size_bytes = :size
+            WHERE source_state = :state AND entity_number = :entity_number AND document_id = :document_id
+        """),
+        {
+            "sha256": sha256, "path": path, "size": size, "state": state,
+            "entity_number": ref["entity_number"], "document_id": ref["document_id"],
+        },
+    )
+
+
+async def download_documents(session: aiohttp.ClientSession, adapter, output_dir: Path, base_dir: Path) -> int:
+    """Downloads every document of today's entities that is not stored yet; returns how many were stored."""
+    folder = output_dir / DOCUMENTS_DIR
+    folder.mkdir(parents=True, exist_ok=True)
+    semaphore = asyncio.Semaphore(DOCUMENT_CONCURRENCY)
+    stored = 0
+    after = (0, "")
+    while not drain.requested:
+        async with async_session() as db:
+            refs = (await db.execute(PENDING_DOCUMENTS, {
+                "state": adapter.state, "after_entity": after[0], "after_document": after[1],
+                "limit": DOCUMENT_BATCH_SIZE,
+            })).mappings().all()
+        if not refs:
+            break
+        after = (refs[-1]["entity_number"], refs[-1]["document_id"])
+
+        results = await gather_draining(
+            [asyncio.create_task(download_document(session, adapter, dict(ref), folder, semaphore)) for ref in refs]
+        )
+        async with async_session() as db:
+            for ref, result in zip(refs, results):
+                # None: failed, CancelledError: cut short by a drain; both are fetched next run
+                if isinstance(result, tuple):
+                    await store_document(db, adapter.state, ref, *result, folder, base_dir)
+                    stored += 1
+            await db.commit()
+        if adapter.breaker and adapter.breaker.failed:
+            raise CircuitOpenError(f"{adapter.state} source is blocking requests, aborting run")
+    return stored
+
+
+async def collect_documents(session: aiohttp.ClientSession, adapter, base_dir: str = "/scraper_data"):
+    output_dir = ensure_daily_folder(state=adapter.state, base_dir=base_dir)
+    officers, documents = await fetch_filings(session, adapter)
+    stored = await download_documents(session, adapter, output_dir, Path(base_dir))
+    logger.info(
+        "%s filings: %d officer rows, %d documents listed, %d PDFs stored",
+        adapter.state, officers, documents, stored,
+    )
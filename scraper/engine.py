@@ -0,0 +1,589 @@
+"""
+State-agnostic crawl engine.
+
+Scheduling, batching, circuit breaking, checkpointing, persistence and the
+daily export live here. A Secretary of State source plugs in as a
+StateAdapter that only knows how to search a prefix and turn a search row
+into a Company. Several adapters (SCRAPER_STATES=NY,...) crawl concurrently
+in one process and share the HTTP session and the DB pool.
+
+    python -m scraper.crawl                 # every state in SCRAPER_STATES
+    python -m scraper.crawl --states NY     # New York only
+"""
+import abc
+import asyncio
+import importlib
+import itertools
+import os
+import time
+from datetime import date, datetime, timedelta, timezone
+
+import aiohttp
+from dotenv import load_dotenv
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.future import select
+
+from logger import logger
+from daily_folder import ensure_daily_folder
+from profiling import profiler
+from event_loop import loop_name
+from models import Base, Company, ScraperCheckpoint, async_session, engine
+from models.dimensions import init_dimensions
+from models.migrations import upgrade_schema
+from models.partitioning import init_partitioning
+from models.search import init_search
+from scraper.circuit_breaker import CircuitBreaker, CircuitOpenError
+from scraper.documents import DOCUMENTS, collect_documents
+from scraper.fingerprints import fingerprint, load_fingerprints, save_fingerprints
+from scraper.prefix_space import PrefixSpace
+from scraper.progress import progress
+from scraper.raw_archive import raw_archive
+from scraper.shutdown import CrawlDrained, drain, gather_draining
+from scraper.scheduler import PREFIX_ORDER, load_yields, rank_prefixes, record_yields, top_prefixes
+from scraper.utils import (
+    PREFIXES,
+    crawl_state,
+    hedge_budget,
+    latency,
+    load_error_count,
+    persist_companies,
+    reset_error_count,
+)
+
+load_dotenv()
+
+# set by ScraperRunner: lookback grows when catching up missed days,
+# the freshness pass only re-crawls the highest-yield prefixes
+LOOKBACK_DAYS = int(os.getenv("SCRAPER_LOOKBACK_DAYS", "1"))
+CRAWL_PASS = os.getenv("SCRAPER_PASS", "full").lower()
+FRESHNESS_TOP_PREFIXES = int(os.getenv("FRESHNESS_TOP_PREFIXES", "2000"))
+BATCH_SIZE = max(1, int(os.getenv("SCRAPER_BATCH_SIZE", "12")))  # prefixes crawled concurrently
+SCRAPER_STATES = os.getenv("SCRAPER_STATES", "NY")
+
+# sweep: every full run searches all name prefixes
+# frontier: full runs probe entity numbers past the highest stored one (for adapters
+# that support it); the name sweep only runs on COVERAGE_SWEEP_WEEKDAY as a coverage check
+DISCOVERY_MODE = os.getenv("DISCOVERY_MODE", "sweep").lower()
+COVERAGE_SWEEP_WEEKDAY = int(os.getenv("COVERAGE_SWEEP_WEEKDAY", "6"))  # 0=Mon .. 6=Sun, -1 never
+FRONTIER_MISS_LIMIT = int(os.getenv("FRONTIER_MISS_LIMIT", "200"))
+FRONTIER_WINDOW = int(os.getenv("FRONTIER_WINDOW", "32"))
+# numbers this far below the highest stored one that are still missing get re-probed
+FRONTIER_BACKTRACK = int(os.getenv("FRONTIER_BACKTRACK", "500"))
+
+# state code -> "module:AdapterClass", imported only when the state is crawled
+ADAPTERS = {
+    "NY": "scraper.new_york_scrapper:NewYorkAdapter",
+}
+
+
+class StateAdapter(abc.ABC):
+    """
+    One Secretary of State source. Subclasses set the class attributes and
+    implement search(), filing_date() and detail(); everything else is handled
+    by CrawlEngine. probe() and filings()/document_request() are optional and
+    only called when supports_probing / supports_documents is set.
+    """
+
+    state: str = ""           # source_state value, e.g. "NY"
+    name: str = ""            # used in checkpoint ids, e.g. "newyork"
+    generator: str = ""       # manifest generator tag
+    prefixes: PrefixSpace = PREFIXES
+    max_concurrent_requests: int = 16
+    # entity numbers are issued sequentially and probe() can fetch one directly
+    supports_probing: bool = False
+    # filings() and document_request() are implemented, see scraper.documents
+    supports_documents: bool = False
+
+    def __init_subclass__(cls, **kwargs):
+        super().__init_subclass__(**kwargs)
+        # a supports_* flag without its hooks would only fail mid-crawl
+        hooks = {"supports_probing": ["probe"], "supports_documents": ["filings", "document_request"]}
+        for flag, names in hooks.items():
+            missing = [n for n in names if getattr(cls, flag) and getattr(cls, n) is getattr(StateAdapter, n)]
+            if missing:
+                raise TypeError(f"{cls.__name__} sets {flag} but does not implement {', '.join(missing)}")
+
+    def __init__(self):
+        # bounds the adapter's requests (post_json); prefixes in flight are bounded by SCRAPER_BATCH_SIZE
+        self.semaphore = asyncio.Semaphore(self.max_concurrent_requests)
+        self.breaker: CircuitBreaker | None = None
+
+    @abc.abstractmethod
+    async def search(self, session: aiohttp.ClientSession, prefix: str) -> list[dict]:
+        """Raw search rows for one prefix."""
+
+    @abc.abstractmethod
+    def filing_date(self, row: dict) -> date | None:
+        """Filing date of a search row, used for the lookback cutoff."""
+
+    @abc.abstractmethod
+    async def detail(self, session: aiohttp.ClientSession, row: dict, cutoff: date) -> Company | None:
+        """Fetches the detail record for a search row and parses it into a Company."""
+
+    async def probe(self, session: aiohttp.ClientSession, entity_number: int) -> Company | None:
+        """Fetches one entity by number; None when the number is not (yet) assigned. Needs supports_probing."""
+        raise NotImplementedError(f"{type(self).__name__} does not support probing")
+
+    async def filings(self, session: aiohttp.ClientSession, company: dict) -> tuple[list[dict], list[dict]]:
+        """
+        (officer rows, document references) of a stored company, given its
+        entity_number, entity_name and incorporator_name. Officer rows carry the
+        company_officers columns, references the company_documents ones. Needs supports_documents.
+        """
+        raise NotImplementedError(f"{type(self).__name__} does not support documents")
+
+    def document_request(self, ref: dict) -> tuple[str, str, dict]:
+        """(method, url, session.request kwargs) that download one document reference."""
+        raise NotImplementedError(f"{type(self).__name__} does not support documents")
+
+    async def after_sweep(self, session: aiohttp.ClientSession):
+        """Hook for follow-up work once every prefix was crawled (e.g. deferred lookups)."""
+
+    def parse_archived(self, endpoint: str, request: dict, body, seen_at: datetime) -> Company | None:
+        """
+        Rebuilds a Company from one archived response (see scraper.reparse);
+        None for responses that are not detail records. Runs in worker processes,
+        so it must not do I/O.
+        """
+        return None
+
+    def archived_names(self, endpoint: str, request: dict, body) -> tuple[int, list[str]] | None:
+        """(entity_number, previous names) from one archived name-history response."""
+        return None
+
+    def row_key(self, row: dict) -> str:
+        """Identifies a search row in logs and profiling reports."""
+        return repr(row)[:80]
+
+    def checkpoint_id(self, day: date | None = None) -> str:
+        return f"daily_{day or date.today()}_{self.name}"
+
+
+def load_adapters(states: str | list[str] | None = None) -> list[StateAdapter]:
+    if states is None:
+        states = SCRAPER_STATES
+    if isinstance(states, str):
+        states = [s.strip().upper() for s in states.split(",") if s.strip()]
+    adapters = []
+    for state in states:
+        if state not in ADAPTERS:
+            raise ValueError(f"No scraper adapter for state {state!r}, known: {', '.join(ADAPTERS)}")
+        module_name, class_name = ADAPTERS[state].split(":")
+        adapters.append(getattr(importlib.import_module(module_name), class_name)())
+    return adapters
+
+
+async def init_db():
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+        await upgrade_schema(conn)
+        await init_partitioning(conn)
+        await init_dimensions(conn)
+        await init_search(conn)
+
+
+class CrawlEngine:
+    def __init__(self, adapter: StateAdapter, crawl_pass: str | None = None, lookback_days: int | None = None):
+        self.adapter = adapter
+        self.crawl_pass = crawl_pass or CRAWL_PASS
+        self.lookback_days = lookback_days or LOOKBACK_DAYS
+        self.unchanged_prefixes = 0
+
+    @property
+    def cutoff(self) -> date:
+        return datetime.now().date() - timedelta(days=self.lookback_days)
+
+    # ---------------- Checkpoints ----------------
+    async def load_checkpoint(self, db: AsyncSession):
+        result = await db.execute(
+            select(ScraperCheckpoint).where(ScraperCheckpoint.id == self.adapter.checkpoint_id())
+        )
+        checkpoint = result.scalar_one_or_none()
+        if checkpoint and checkpoint.updated_at == date.today():
+            return checkpoint.last_prefix
+        return None
+
+    async def save_checkpoint(self, db: AsyncSession, prefix: str):
+        result = await db.execute(
+            select(ScraperCheckpoint).where(ScraperCheckpoint.id == self.adapter.checkpoint_id())
+        )
+        checkpoint = result.scalar_one_or_none()
+        if checkpoint:
+            checkpoint.last_prefix = prefix
+            checkpoint.updated_at = date.today()
+        else:
+            db.add(ScraperCheckpoint(
+                id=self.adapter.checkpoint_id(),
+                last_prefix=prefix,
+                updated_at=date.today(),
+            ))
+        await db.commit()
+
+    async def clear_checkpoint(self):
+        async with async_session() as db:
+            await db.execute(
+                text("DELETE FROM scraper_checkpoints WHERE id = :id"),
+                {"id": self.adapter.checkpoint_id()},
+            )
+            await db.commit()
+
+    # ---------------- Crawl ----------------
+    async def get_entities(
+        self,
+        session: aiohttp.ClientSession,
+        prefix: str,
+        known: tuple[str | None, set[str]] | None = None,
+        updates: dict | None = None,
+    ) -> list[Company]:
+        """
+        Searches one prefix and returns detailed Company objects for its new entities.
+        known is the prefix's stored fingerprint; the new one goes into updates.
+        """
+        with profiler.stage("search"):
+            rows = await self.adapter.search(session, prefix)
+        keys = [self.adapter.row_key(row) for row in rows]
+        digest = fingerprint(keys)
+        if known is not None:
+            known_digest, handled = known
+            if known_digest == digest:
+                self.unchanged_prefixes += 1
+                return []
+            rows = [row for row, key in zip(rows, keys) if key not in handled]
+
+        cutoff = self.cutoff
+        entities = []
+        for row in rows:
+            try:
+                d = self.adapter.filing_date(row)
+                if d and d >= cutoff:
+                    entities.append(row)
+            except Exception:
+                continue
+
+        logger.info("Found %d new-ish entities for %s prefix %s", len(entities), self.adapter.state, prefix)
+        if not entities:
+            if updates is not None:
+                updates[prefix] = (digest, keys)
+            return []
+
+        tasks = [asyncio.create_task(self.get_detail(session, row, cutoff)) for row in entities]
+        results = await asyncio.gather(*tasks, return_exceptions=True)
+        companies = [r for r in results if not isinstance(r, BaseException) and r is not None]
+        blocked = next((r for r in results if isinstance(r, CircuitOpenError)), None)
+        if blocked:
+            # keep what was fetched before the block, the prefix itself is retried next run
+            await persist_companies(companies)
+            raise blocked
+        if updates is not None:
+            # rows whose detail failed stay unhandled, and the page unfingerprinted, until they succeed
+            failed = {
+                self.adapter.row_key(row)
+                for row, result in zip(entities, results)
+                if result is None or isinstance(result, BaseException)
+            }
+            updates[prefix] = (None if failed else digest, [key for key in keys if key not in failed])
+        return companies
+
+    async def get_detail(self, session: aiohttp.ClientSession, row: dict, cutoff: date) -> Company | None:
+        with profiler.stage("detail", key=self.adapter.row_key(row), kind="entities"):
+            return await self.adapter.detail(session, row, cutoff)
+
+    async def process_prefix(
+        self,
+        session: aiohttp.ClientSession,
+        prefix: str,
+        known: tuple[str | None, set[str]] | None = None,
+        updates: dict | None = None,
+    ) -> list[Company] | None:
+        # no adapter.semaphore here: the adapter's requests take it themselves, and holding
+        # it per prefix starves them (or deadlocks once a batch has as many prefixes as slots)
+        try:
+            with profiler.stage("prefix", key=f"{self.adapter.state}:{prefix}", kind="prefixes"):
+                return await self.get_entities(session, prefix, known, updates)
+        except CircuitOpenError as e:
+            logger.error("%s prefix %s left for the next run: %s", self.adapter.state, prefix, e)
+            return None
+        except Exception as e:
+            logger.exception("Error processing %s prefix %s: %s", self.adapter.state, prefix, e)
+            return None
+
+    async def process_batch(self, session: aiohttp.ClientSession, batch: list[str]):
+        async with async_session() as db:
+            known = await load_fingerprints(db, self.adapter.state, batch)
+        updates = {}
+        tasks = [
+            asyncio.create_task(self.process_prefix(session, prefix, known.get(prefix), updates))
+            for prefix in batch
+        ]
+        # on a drain request, prefixes still running at the deadline come back cancelled
+        results = await gather_draining(tasks)
+        cancelled = [isinstance(r, asyncio.CancelledError) for r in results]
+
+        # one session and one insert per batch rather than per prefix
+        async with async_session() as db:
+            companies = [c for r in results if isinstance(r, list) for c in r]
+            counts = {prefix: len(r) for prefix, r in zip(batch, results) if isinstance(r, list)}
+            with profiler.stage("persist"):
+                await persist_companies(companies, db=db)
+                await record_yields(db, self.adapter.state, counts)
+                # only after the entities they vouch for are stored
+                await save_fingerprints(db, self.adapter.state, updates)
+            if self.adapter.breaker and self.adapter.breaker.failed:
+                raise CircuitOpenError(f"{self.adapter.state} source is blocking requests, aborting run")
+            # the checkpoint never moves past a prefix that did not finish
+            finished = cancelled.index(True) if any(cancelled) else len(batch)
+            if finished:
+                with profiler.stage("checkpoint"):
+                    await self.save_checkpoint(db, batch[finished - 1])
+
+    async def schedule(self):
+        """Prefixes still to crawl in this run, in crawl order."""
+        prefixes = self.adapter.prefixes
+        async with async_session() as db:
+            last_prefix = await self.load_checkpoint(db)
+            wants_yields = PREFIX_ORDER == "yield" or self.crawl_pass == "freshness"
+            yields = await load_yields(db, self.adapter.state) if wants_yields else {}
+
+        if self.crawl_pass == "freshness":
+            todo = top_prefixes(prefixes, yields, FRESHNESS_TOP_PREFIXES)
+            logger.info("%s freshness pass over %d high-yield prefixes", self.adapter.state, len(todo))
+        elif PREFIX_ORDER == "yield":
+            todo = rank_prefixes(prefixes, yields)
+            logger.info(
+                "Scheduled %d %s prefixes by yield (%d already crawled today)",
+                len(todo), self.adapter.state, len(prefixes) - len(todo),
+            )
+        else:
+            todo = prefixes.after(last_prefix)
+            if len(todo) < len(prefixes):
+                logger.info("Resuming %s from prefix %s", self.adapter.state, last_prefix)
+        return todo
+
+    def uses_frontier(self) -> bool:
+        if not self.adapter.supports_probing:
+            return False
+        if self.crawl_pass == "frontier":
+            return True
+        return (
+            self.crawl_pass == "full"
+            and DISCOVERY_MODE == "frontier"
+            and date.today().weekday() != COVERAGE_SWEEP_WEEKDAY
+        )
+
+    async def probe_frontier(self, session: aiohttp.ClientSession) -> bool:
+        """
+        Probes entity numbers upward from just below the highest stored one, a
+        window at a time, until FRONTIER_MISS_LIMIT consecutive numbers past it
+        come back empty. Hits go straight to persist_companies. Returns False
+        when there is no stored entity to start from.
+        """
+        state = self.adapter.state
+        async with async_session() as db:
+            highest = (await db.execute(
+                text("SELECT max(entity_number) FROM companies WHERE source_state = :state"),
+                {"state": state},
+            )).scalar()
+            if highest is None:
+                return False
+            start = max(highest - FRONTIER_BACKTRACK, 0) + 1
+            known = set((await db.execute(
+                text("""
+                    SELECT entity_number FROM companies
+                    WHERE source_state = :state AND entity_number BETWEEN :start AND :highest
+                """),
+                {"state": state, "start": start, "highest": highest},
+            )).scalars())
+
+        candidates = (n for n in itertools.count(start) if n not in known)
+        misses = probed = found = 0
+        logger.info("Probing %s entity numbers from %d (highest stored %d)", state, start, highest)
+        while misses < FRONTIER_MISS_LIMIT:
+            drain.check()
+            window = list(itertools.islice(candidates, FRONTIER_WINDOW))
+            results = await gather_draining([asyncio.create_task(self.get_probe(session, n)) for n in window])
+            probed += len(window)
+
+            companies = []
+            for number, result in zip(window, results):
+                if isinstance(result, Company):
+                    companies.append(result)
+                    misses = 0
+                elif isinstance(result, asyncio.CancelledError):
+                    # cut short by a drain; the next run probes it again
+                    continue
+                elif number > highest:
+                    # gaps below the highest stored number are expected and never end the probe
+                    misses += 1
+            with profiler.stage("persist"):
+                await persist_companies(companies)
+            found += len(companies)
+
+            blocked = next((r for r in results if isinstance(r, CircuitOpenError)), None)
+            if blocked or (self.adapter.breaker and self.adapter.breaker.failed):
+                raise blocked or CircuitOpenError(f"{state} source is blocking requests, aborting run")
+
+        logger.info("Frontier probe for %s: %d new entities in %d requests", state, found, probed)
+        return True
+
+    async def get_probe(self, session: aiohttp.ClientSession, entity_number: int) -> Company | None:
+        with profiler.stage("probe", key=entity_number, kind="entities"):
+            return await self.adapter.probe(session, entity_number)
+
+    async def crawl(self, session: aiohttp.ClientSession):
+        if self.uses_frontier():
+            if await self.probe_frontier(session):
+                with profiler.stage("after_sweep"):
+                    await self.adapter.after_sweep(session)
+                return
+            logger.warning("No stored %s entities to probe from, running the name sweep instead", self.adapter.state)
+
+        prefixes = await self.schedule()
+        # sliced lazily; a PrefixSpace slice is a view, a ranked list slice is a small copy
+        batches = (list(prefixes[i : i + BATCH_SIZE]) for i in range(0, len(prefixes), BATCH_SIZE))
+
+        progress.add_total(len(prefixes))
+        self.unchanged_prefixes = 0
+        for batch in batches:
+            drain.check()
+            logger.info("Processing %s batch: %s", self.adapter.state, batch)
+            batch_started = time.perf_counter()
+            with profiler.sampled():
+                await self.process_batch(session, batch)
+            latency.observe("process_batch", time.perf_counter() - batch_started)
+            progress.advance(prefixes=len(batch))
+        # a drain during the last batch may have left prefixes unfinished
+        drain.check()
+        logger.info(
+            "%d of %d %s prefixes unchanged since their last crawl",
+            self.unchanged_prefixes, len(prefixes), self.adapter.state,
+        )
+
+        with profiler.stage("after_sweep"):
+            await self.adapter.after_sweep(session)
+
+    async def export(self, start_time: datetime):
+        from exporter import (
+            export_changes,
+            export_data,
+            generate_manifest,
+            get_companies_for_today,
+            get_document_counts,
+        )
+
+        state = self.adapter.state
+        output_dir = ensure_daily_folder(state=state, base_dir="/scraper_data")
+        async with async_session() as db:
+            all_companies = await get_companies_for_today(session=db, state=state)
+            await export_changes(db, date.today(), output_dir, state=state)
+            document_counts = await get_document_counts(db, all_companies, state=state)
+
+        _, _, quality = await asyncio.to_thread(export_data, all_companies, output_dir)
+
+        crawl_errors = load_error_count()
+        reset_error_count()
+
+        await generate_manifest(
+            companies=all_companies,
+            crawl_errors=crawl_errors,
+            start_time=start_time,
+            output_dir=output_dir,
+            generator=self.adapter.generator,
+            state=state,
+            document_counts=document_counts,
+            quality=quality,
+        )
+        logger.info("Daily %s export finished for %s companies", state, len(all_companies))
+
+    async def run(self, session: aiohttp.ClientSession):
+        # error counters and other per-state context follow this task only
+        crawl_state.set(self.adapter.state)
+        start_time = datetime.now(timezone.utc)
+        await self.crawl(session)
+        if DOCUMENTS and self.adapter.supports_documents:
+            with profiler.stage("documents"):
+                await collect_documents(session, self.adapter)
+        # a drained run exports nothing; the resumed run exports the whole day
+        drain.check()
+        with profiler.stage("export"):
+            await self.export(start_time)
+        await self.clear_checkpoint()
+        logger.info("%s scraping completed successfully, checkpoint cleared.", self.adapter.state)
+
+
+# ---------------- Runner ----------------
+async def main(
+    crawl_pass: str | None = None,
+    lookback_days: int | None = None,
+    states: str | list[str] | None = None,
+    handle_signals: bool = False,
+):
+    """
+    Runs one crawl for every requested state concurrently. crawl_pass/lookback_days
+    override SCRAPER_PASS/SCRAPER_LOOKBACK_DAYS, which is how ScraperRunner drives
+    in-process runs. A failing state does not cancel the others; the first
+    failure is re-raised once all of them are done. With handle_signals,
+    SIGTERM/SIGINT drain the crawl (see scraper.shutdown) and CrawlDrained is
+    raised once everything finished is stored.
+    """
+    adapters = load_adapters(states)
+    # in-process runs (ScraperRunner) share module state with the previous run, e.g.
+    # the NY breaker, which stays failed after a blocked run
+    for adapter in adapters:
+        if adapter.breaker:
+            adapter.breaker.reset()
+    await init_db()
+    # per-request timeouts follow observed endpoint latency, see scraper.latency
+    timeout = aiohttp.ClientTimeout(total=None, connect=30)
+
+    logger.info("Crawling %s on the %s event loop", ", ".join(a.state for a in adapters), loop_name())
+    progress.start(0)
+    profiler.start()
+    raw_archive.start()
+    if handle_signals:
+        drain.install_signal_handlers()
+    try:
+        async with aiohttp.ClientSession(timeout=timeout) as session:
+            engines = [CrawlEngine(adapter, crawl_pass, lookback_days) for adapter in adapters]
+            results = await asyncio.gather(*(e.run(session) for e in engines), return_exceptions=True)
+    finally:
+        # the writer thread flushes whatever is still queued
+        await asyncio.to_thread(raw_archive.close)
+        if handle_signals:
+            drain.remove_signal_handlers()
+    profiler.stop()
+
+    logger.info(
+        "Batch duration p50=%.2fs p99=%.2fs, hedged %d of %d requests",
+        latency.percentile("process_batch", 50) or 0,
+        latency.percentile("process_batch", 99) or 0,
+        hedge_budget.hedges,
+        hedge_budget.requests,
+    )
+
+    if profiler.enabled:
+        for adapter in adapters:
+            report = profiler.write_report(ensure_daily_folder(state=adapter.state, base_dir="/scraper_data"))
+            logger.info("Performance report written to %s", report)
+
+    drained = [a.state for a, r in zip(adapters, results) if isinstance(r, CrawlDrained)]
+    if drained:
+        progress.finish("drained")
+        logger.info("Crawl drained for %s; the next run resumes from the checkpoint", ", ".join(drained))
+    failures = [
+        (a.state, r) for a, r in zip(adapters, results)
+        if isinstance(r, BaseException) and not isinstance(r, CrawlDrained)
+    ]
+    for state, error in failures:
+        logger.error("%s crawl failed: %r", state, error)
+    if failures:
+        raise failures[0][1]
+    if drained:
+        raise CrawlDrained(f"drained: {', '.join(drained)}")
+    progress.finish()
+
+
+if __name__ == "__main__":
+    from scraper.crawl import main as crawl_main
+
+    raise SystemExit(crawl_main())
@@ -0,0 +1,61 @@
+"""
+Search-result fingerprints per prefix.
+
+For most prefixes the first result page is the same as on the previous crawl.
+Each prefix stores a hash of the sorted entity keys on its page plus the keys
+already handled. When today's page hashes the same, the prefix is done without
+looking at a single row; otherwise only keys that were not handled before go
+through the filing-date filter and detail fetches.
+
+Fingerprints for a whole batch are loaded in one query before the batch runs
+and saved in one statement after it is persisted.
+"""
+import hashlib
+import os
+from sqlalchemy import String, bindparam, text
+from sqlalchemy.dialects.postgresql import ARRAY
+from sqlalchemy.ext.asyncio import AsyncSession
+
+SEARCH_FINGERPRINTS = os.getenv("SEARCH_FINGERPRINTS", "true").lower() == "true"
+
+
+def fingerprint(keys) -> str:
+    return hashlib.blake2b("\n".join(sorted(keys)).encode(), digest_size=8).hexdigest()
+
+
+async def load_fingerprints(db: AsyncSession, state: str, prefixes: list[str]) -> dict[str, tuple[str | None, set[str]]]:
+    """prefix -> (fingerprint, handled keys) for the prefixes that have one."""
+    if not SEARCH_FINGERPRINTS or not prefixes:
+        return {}
+    result = await db.execute(
+        text("""
+            SELECT prefix, fingerprint, entity_keys FROM search_fingerprints
+            WHERE source_state = :state AND prefix = ANY(:prefixes)
+        """),
+        {"state": state, "prefixes": list(prefixes)},
+    )
+    return {row.prefix: (row.fingerprint, set(row.entity_keys or ())) for row in result}
+
+
+async def save_fingerprints(db: AsyncSession, state: str, updates: dict[str, tuple[str | None, list[str]]]):
+    """
+    updates: prefix -> (fingerprint, handled keys). A None fingerprint means some
+    rows on the page failed; their keys are left out so the next crawl retries them.
+    """
+    if not SEARCH_FINGERPRINTS or not updates:
+        return
+    await db.execute(
+        text("""
+            INSERT INTO search_fingerprints (source_state, prefix, fingerprint, entity_keys, updated_at)
+            VALUES (:state, :prefix, :fingerprint, :keys, CURRENT_DATE)
+            ON CONFLICT (source_state, prefix) DO UPDATE SET
+                fingerprint = excluded.fingerprint,
+                entity_keys = excluded.entity_keys,
+                updated_at = CURRENT_DATE
+        """).bindparams(bindparam("keys", type_=ARRAY(String))),
+        [
+            {"state": state, "prefix": prefix, "fingerprint": digest, "keys": sorted(keys)}
+            for prefix, (digest, keys) in updates.items()
+        ],
+    )
+    await db.commit()
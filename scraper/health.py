@@ -0,0 +1,96 @@
+"""
+Container health probe; reads the heartbeat files, sends no network traffic.
+
+    python -m scraper.health          # exit 0 healthy, 1 unhealthy, reason on stdout
+
+Unhealthy when:
+  - the runner heartbeat (SCRAPER_RUNNER_HEARTBEAT_FILE) is older than
+    HEALTH_MAX_RUNNER_AGE seconds, i.e. the runner's event loop is stuck;
+and, while a crawl is running (progress state "running" and its pid alive):
+  - the crawl heartbeat is older than HEALTH_MAX_HEARTBEAT_AGE seconds
+  - the worst loop lag of the last heartbeat exceeds HEALTH_MAX_LOOP_LAG_MS
+  - no DOS request succeeded for HEALTH_MAX_REQUEST_AGE seconds (counted
+    from the crawl start until the first success)
+  - fewer than HEALTH_MIN_REQUESTS_PER_MIN requests succeeded per minute
+    over the last heartbeat interval (0 disables the check)
+
+Only scraper.progress (stdlib) is imported, so a probe costs an interpreter
+start and two small file reads.
+"""
+import os
+import sys
+from datetime import datetime, timezone
+from scraper.progress import PROGRESS_FILE, RUNNER_HEARTBEAT_FILE, read_progress
+
+HEALTH_MAX_RUNNER_AGE = float(os.getenv("HEALTH_MAX_RUNNER_AGE", "120"))
+HEALTH_MAX_HEARTBEAT_AGE = float(os.getenv("HEALTH_MAX_HEARTBEAT_AGE", "120"))
+HEALTH_MAX_LOOP_LAG_MS = float(os.getenv("HEALTH_MAX_LOOP_LAG_MS", "5000"))
+HEALTH_MAX_REQUEST_AGE = float(os.getenv("HEALTH_MAX_REQUEST_AGE", "1800"))
+HEALTH_MIN_REQUESTS_PER_MIN = float(os.getenv("HEALTH_MIN_REQUESTS_PER_MIN", "0"))
+
+
+def _age(timestamp: str | None, now: datetime) -> float | None:
+    if not timestamp:
+        return None
+    return (now - datetime.fromisoformat(timestamp)).total_seconds()
+
+
+def _alive(pid) -> bool:
+    try:
+        os.kill(int(pid), 0)
+    except (TypeError, ValueError, ProcessLookupError):
+        return False
+    except PermissionError:
+        return True
+    return True
+
+
+def check(runner: dict | None, crawl: dict | None, now: datetime | None = None) -> list[str]:
+    """Reasons the container is unhealthy; empty when it is healthy."""
+    now = now or datetime.now(timezone.utc)
+    problems = []
+
+    runner_age = _age(runner.get("updated_at"), now) if runner else None
+    if runner_age is None:
+        problems.append("no runner heartbeat")
+    elif runner_age > HEALTH_MAX_RUNNER_AGE:
+        problems.append(f"runner heartbeat {runner_age:.0f}s old")
+
+    if not crawl or crawl.get("state") != "running" or not _alive(crawl.get("pid")):
+        return problems
+
+    heartbeat_age = _age(crawl.get("updated_at"), now)
+    if heartbeat_age is None:
+        problems.append("no crawl heartbeat")
+    elif heartbeat_age > HEALTH_MAX_HEARTBEAT_AGE:
+        problems.append(f"crawl heartbeat {heartbeat_age:.0f}s old")
+    lag = crawl.get("loop_lag_ms")
+    if lag is not None and lag > HEALTH_MAX_LOOP_LAG_MS:
+        problems.append(f"event loop lag {lag:.0f}ms")
+    request_age = _age(crawl.get("last_request_ok_at") or crawl.get("started_at"), now)
+    if request_age is not None and request_age > HEALTH_MAX_REQUEST_AGE:
+        problems.append(f"no successful request for {request_age:.0f}s")
+    rate = crawl.get("requests_per_min")
+    if HEALTH_MIN_REQUESTS_PER_MIN and rate is not None and rate < HEALTH_MIN_REQUESTS_PER_MIN:
+        problems.append(f"{rate:.1f} requests/min")
+    return problems
+
+
+def main() -> int:
+    crawl = read_progress(PROGRESS_FILE)
+    problems = check(read_progress(RUNNER_HEARTBEAT_FILE), crawl)
+    if problems:
+        print("unhealthy: " + "; ".join(problems))
+        return 1
+    if crawl and crawl.get("state") == "running":
+        print(
+            f"healthy: crawling, {crawl.get('prefixes_done')}/{crawl.get('prefixes_total')} prefixes, "
+            f"{crawl.get('requests_per_min')} requests/min, loop lag {crawl.get('loop_lag_ms')}ms"
+        )
+    else:
+        print("healthy: waiting for the next scheduled run")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,126 @@
+"""
+Per-endpoint latency tracking, adaptive timeouts and request hedging.
+
+A flat 120s timeout lets a handful of hung detail calls hold semaphore slots
+for minutes. Instead, each endpoint gets a timeout derived from its observed
+latency percentiles, and idempotent requests that are still running after the
+endpoint's p99 (HEDGE_PERCENTILE) get one duplicate fired, whichever answers
+first wins. Hedges are capped by a budget relative to total request volume
+(HEDGE_BUDGET_RATIO, 5%).
+"""
+import asyncio
+import math
+import os
+from collections import deque
+from urllib.parse import urlparse
+
+
+def endpoint_of(url: str) -> str:
+    return urlparse(url).path.rsplit("/", 1)[-1] or url
+
+
+class LatencyTracker:
+    def __init__(
+        self,
+        window: int = 500,
+        min_samples: int = 30,
+        default_timeout: float = 120.0,
+        min_timeout: float = 5.0,
+        max_timeout: float = 120.0,
+        multiplier: float = 3.0,
+        hedge_percentile: float = 99.0,
+    ):
+        self.window = window
+        self.min_samples = min_samples
+        self.default_timeout = default_timeout
+        self.min_timeout = min_timeout
+        self.max_timeout = max_timeout
+        self.multiplier = multiplier
+        self.hedge_percentile = hedge_percentile
+        self._samples: dict[str, deque] = {}
+
+    @classmethod
+    def from_env(cls) -> "LatencyTracker":
+        return cls(
+            window=int(os.getenv("LATENCY_WINDOW", "500")),
+            min_samples=int(os.getenv("LATENCY_MIN_SAMPLES", "30")),
+            default_timeout=float(os.getenv("REQUEST_TIMEOUT_SECONDS", "120")),
+            min_timeout=float(os.getenv("REQUEST_TIMEOUT_MIN_SECONDS", "5")),
+            max_timeout=float(os.getenv("REQUEST_TIMEOUT_SECONDS", "120")),
+            multiplier=float(os.getenv("REQUEST_TIMEOUT_P99_MULTIPLIER", "3")),
+            hedge_percentile=float(os.getenv("HEDGE_PERCENTILE", "99")),
+        )
+
+    def observe(self, endpoint: str, seconds: float):
+        samples = self._samples.get(endpoint)
+        if samples is None:
+            samples = self._samples[endpoint] = deque(maxlen=self.window)
+        samples.append(seconds)
+
+    def percentile(self, endpoint: str, q: float) -> float | None:
+        samples = self._samples.get(endpoint)
+        if not samples or len(samples) < self.min_samples:
+            return None
+        ordered = sorted(samples)
+        index = min(len(ordered) - 1, max(0, math.ceil(q / 100 * len(ordered)) - 1))
+        return ordered[index]
+
+    def timeout_for(self, endpoint: str) -> float:
+        p99 = self.percentile(endpoint, 99)
+        if p99 is None:
+            return self.default_timeout
+        return min(self.max_timeout, max(self.min_timeout, p99 * self.multiplier))
+
+    def hedge_delay(self, endpoint: str) -> float | None:
+        # p95 spent the budget on the merely slow; the stalls worth hedging sit above p99
+        return self.percentile(endpoint, self.hedge_percentile)
+
+
+class HedgeBudget:
+    """Allows at most `ratio` extra requests per primary request (plus a small burst)."""
+
+    def __init__(self, ratio: float = 0.1, burst: int = 5):
+        self.ratio = ratio
+        self.burst = burst
+        self.requests = 0
+        self.hedges = 0
+
+    def record_request(self):
+        self.requests += 1
+
+    def try_spend(self) -> bool:
+        if self.hedges >= self.requests * self.ratio + self.burst:
+            return False
+        self.hedges += 1
+        return True
+
+
+async def hedged(make_request, delay: float | None, budget: HedgeBudget):
+    """
+    Runs make_request(); if it is still pending after `delay` seconds and the
+    budget allows, starts a second copy and returns whichever succeeds first.
+    Only safe for idempotent requests.
+    """
+    primary = asyncio.ensure_future(make_request())
+    tasks = [primary]
+    # whatever still runs when this returns, raises or is cancelled (e.g. by a drain) is cancelled
+    try:
+        if delay is None:
+            return await primary
+        done, _ = await asyncio.wait({primary}, timeout=delay)
+        if done or not budget.try_spend():
+            return await primary
+
+        tasks.append(asyncio.ensure_future(make_request()))
+        pending = set(tasks)
+        first_error = None
+        while pending:
+            done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+            for task in done:
+                if task.exception() is None:
+                    return task.result()
+                first_error = first_error or task.exception()
+        raise first_error
+    finally:
+        for task in tasks:
+            task.cancel()
@@ -1,34 +1,36 @@
 import asyncio
-from datetime import datetime, timedelta, timezone, date
+from datetime import datetime, timezone, date
 import aiohttp
 from sqlalchemy import text
 from scraper.utils import (
-    PREFIXES,
-    load_error_count,
     parse_date,
     post_json,
-    reset_error_count,
     safe_get,
-    persist_companies,
 )
-from models import Company, ScraperCheckpoint, async_session
+from models import Company, async_session
+from scraper.changes import field_hash
+from scraper.circuit_breaker import CircuitBreaker, CircuitOpenError
+from scraper.engine import StateAdapter
 from logger import logger
+from profiling import profiler
 from dotenv import load_dotenv
 import os
-from models import Base, engine
-from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy.future import select
-from exporter import (
-    get_companies_for_today,
-    generate_manifest,
-    ensure_daily_folder,
-    export_data,
-    )
 
 
 load_dotenv()
-MAX_CONCURRENT_REQUESTS = 16
-semaphore = asyncio.Semaphore(MAX_CONCURRENT_REQUESTS)
+
+# point at a stand-in server (benchmarks.dos_standin) to run the crawl locally
+NY_DOS_API_BASE = os.getenv(
+    "NY_DOS_API_BASE", "https://apps.dos.ny.gov/PublicInquiryWeb/api/PublicInquiry"
+).rstrip("/")
+
+# concurrent: history is fetched alongside detail
+# deferred: history is fetched after the sweep, only for entities that may have been renamed
+# off: no history lookups at all
+NAME_HISTORY_MODE = os.getenv("NAME_HISTORY_MODE", "concurrent").lower()
+NAME_HISTORY_REFRESH_WEEKDAY = int(os.getenv("NAME_HISTORY_REFRESH_WEEKDAY", "6"))  # 0=Mon .. 6=Sun, -1 disables
+history_semaphore = asyncio.Semaphore(int(os.getenv("NAME_HISTORY_CONCURRENCY", "4")))
+pending_name_history: list[tuple[int, str]] = []
 
 cookies = {
     "TS00000000076": os.getenv("API_COOKIE_TS00000000076"),
@@ -37,6 +39,8 @@ cookies = {
     "TS969a1eaa027": os.getenv("API_COOKIE_TS969a1eaa027"),
     "TSbb0d7d7a077": os.getenv("API_COOKIE_TSbb0d7d7a077"),
 }
+# shared by every request; refreshes `cookies` in place when the WAF starts blocking
+breaker = CircuitBreaker.from_env(cookies)
 
 headers = {
     "Accept": "application/json, text/plain, */*",
@@ -55,258 +59,362 @@ headers = {
 }
 
 
-# ---------------- Main scraping logic ----------------
-async def get_entities_data(session: aiohttp.ClientSession, prefix: str):
-    json_data = {
-        "searchValue": prefix,
-        "searchByTypeIndicator": "EntityName",
-        "searchExpressionIndicator": "CONTAINS",
-        "entityStatusIndicator": "AllStatuses",
-        "entityTypeIndicator": [
-            "Corporation",
-            "LimitedLiabilityCompany",
-            "LimitedPartnership",
-            "LimitedLiabilityPartnership",
-        ],
-        "listPaginationInfo": {"listStartRecord": 1, "listEndRecord": 50},
-    }
-    url = "https://apps.dos.ny.gov/PublicInquiryWeb/api/PublicInquiry/GetComplexSearchMatchingEntities"
-    # logger.info("Fetching entities for prefix: %s", prefix)
-    data = await post_json(
-        session,
-        url,
-        json_data,
-        headers=headers,
-        cookies=cookies,
-        semaphore=semaphore,
-        max_retries=8,
+# ---------------- Parsing ----------------
+def parse_company(data: dict, previous_names: list[str] | None = None, seen_at: datetime | None = None) -> Company:
+    """
+    Builds a Company from a GetEntityRecordByID response. Pure: no I/O, no globals.
+    previous_names=None means the name history was not fetched; persist_companies
+    then keeps whatever is stored.
+    """
+    return Company(
+        source_state="NY",
+        entity_number=int(safe_get(data, "entityGeneralInfo", "dosID") or 0),
+        entity_name=safe_get(data, "entityGeneralInfo", "entityName"),
+        entity_type=safe_get(data, "entityGeneralInfo", "entityType"),
+        entity_subtype=safe_get(data, "entityGeneralInfo", "entitySubtype"),
+        status=safe_get(data, "entityGeneralInfo", "entityStatus"),
+        registration_date=parse_date(
+            safe_get(data, "entityGeneralInfo", "dateOfInitialDosFiling")
+        ),
+        next_filing_date=parse_date(
+            safe_get(data, "entityGeneralInfo", "nextStatementDueDate")
+        ),
+        expiration_date=parse_date(
+            safe_get(data, "entityGeneralInfo", "inactiveDate")
+        ),
+        jurisdiction=safe_get(data, "entityGeneralInfo", "jurisdiction"),
+        principal_street=safe_get(data, "sopAddress", "address", "streetAddress"),
+        principal_city=safe_get(data, "sopAddress", "address", "city"),
+        principal_state=safe_get(data, "sopAddress", "address", "state"),
+        principal_postal_code=safe_get(data, "sopAddress", "address", "zipCode"),
+        principal_country=safe_get(data, "sopAddress", "address", "country"),
+        mailing_street=safe_get(data, "poExecAddress", "address", "streetAddress"),
+        mailing_city=safe_get(data, "poExecAddress", "address", "city"),
+        mailing_state=safe_get(data, "poExecAddress", "address", "state"),
+        mailing_postal_code=safe_get(data, "poExecAddress", "address", "zipCode"),
+        mailing_country=safe_get(data, "poExecAddress", "address", "country"),
+        agent_name=safe_get(data, "registeredAgent", "name"),
+        agent_street=safe_get(data, "registeredAgent", "address", "streetAddress"),
+        agent_city=safe_get(data, "registeredAgent", "address", "city"),
+        agent_state=safe_get(data, "registeredAgent", "address", "state"),
+        agent_postal_code=safe_get(data, "registeredAgent", "address", "zipCode"),
+        agent_country=safe_get(data, "registeredAgent", "address", "country"),
+        incorporator_name=safe_get(data, "ceo", "name"),
+        previous_names=previous_names,
+        source_detail_url="",
+        source_last_seen_at=seen_at or datetime.now(timezone.utc),
     )
-    # logger.info("Fetched entities for prefix: %s", prefix)
-    if not data:
-        logger.warning("No data for prefix %s", prefix)
-        return
 
-    raw_list = data.get("entitySearchResultList") if isinstance(data, dict) else None
-    if not raw_list:
-        logger.info("Empty searchResultList for prefix %s", prefix)
-        return
-
-    # filter recent by initialFilingDate (>= 1 days ago)
-    cutoff = datetime.now().date() - timedelta(days=1)
-    entities = []
-    for entity in raw_list:
-        try:
-            d = parse_date(entity.get("initialFilingDate"))
-            if d and d >= cutoff:
-                entities.append(entity)
-        except Exception:
-            continue
 
-    logger.info("Found %d new-ish entities for prefix %s", len(entities), prefix)
-    if not entities:
-        return
-
-    tasks = [
-        asyncio.create_task(get_detailed_entity_data(session, ent)) for ent in entities
-    ]
-    results = await asyncio.gather(*tasks, return_exceptions=True)
-    # collect successful Company objects
-    companies = [r for r in results if not isinstance(r, Exception) and r is not None]
-    if companies:
-        await persist_companies(companies)
-
-
-async def get_detailed_entity_data(session: aiohttp.ClientSession, entity):
-    try:
+def parse_filings(dos_id: int, data, ceo: str | None = None) -> tuple[list[dict], list[dict]]:
+    """(officer rows, document references) from a GetFilingHistoryByID response."""
+    officers, documents = [], []
+    if ceo:
+        officers.append({"entity_number": dos_id, "role": "CEO", "name": ceo})
+    filings = data.get("filingHistoryResultList") if isinstance(data, dict) else None
+    for filing in filings or []:
+        filed = parse_date(filing.get("filingDate"))
+        if filing.get("filerName"):
+            officers.append({
+                "entity_number": dos_id,
+                "role": "FILER",
+                "name": filing["filerName"],
+                "street": safe_get(filing, "filerAddress", "streetAddress"),
+                "city": safe_get(filing, "filerAddress", "city"),
+                "state": safe_get(filing, "filerAddress", "state"),
+                "postal_code": safe_get(filing, "filerAddress", "zipCode"),
+                "country": safe_get(filing, "filerAddress", "country"),
+                "filed_date": filed,
+            })
+        if filing.get("documentID"):
+            documents.append({
+                "entity_number": dos_id,
+                "document_id": str(filing["documentID"]),
+                "document_type": filing.get("filingType"),
+                "filed_date": filed,
+            })
+    # the same filer usually signs several filings; the first one is kept
+    unique = {}
+    for officer in officers:
+        unique.setdefault((officer["role"], officer["name"]), officer)
+    return list(unique.values()), documents
+
+
+# ---------------- Adapter ----------------
+class NewYorkAdapter(StateAdapter):
+    state = "NY"
+    name = "newyork"
+    generator = "ny_scraper_v1"
+    max_concurrent_requests = 16
+    # dosIDs are issued sequentially
+    supports_probing = True
+    supports_documents = True
+
+    def __init__(self):
+        super().__init__()
+        self.breaker = breaker
+
+    async def search(self, session: aiohttp.ClientSession, prefix: str) -> list[dict]:
         json_data = {
-            "SearchID": entity["dosID"],
-            "EntityName": entity["entityName"],
-            "AssumedNameFlag": "false",
-        }
-        url = "https://apps.dos.ny.gov/PublicInquiryWeb/api/PublicInquiry/GetEntityRecordByID"
-        data = await post_json(session, url, json_data)
-        if not data:
-            logger.warning("No detail for dosID %s", entity.get("dosID"))
-            return None
-
-        # build Company-like object
-        company = Company(
-            source_state="NY",
-            entity_number=int(safe_get(data, "entityGeneralInfo", "dosID") or 0),
-            entity_name=safe_get(data, "entityGeneralInfo", "entityName"),
-            entity_type=safe_get(data, "entityGeneralInfo", "entityType"),
-            entity_subtype=safe_get(data, "entityGeneralInfo", "entitySubtype"),
-            status=safe_get(data, "entityGeneralInfo", "entityStatus"),
-            registration_date=parse_date(
-                safe_get(data, "entityGeneralInfo", "dateOfInitialDosFiling")
-            ),
-            next_filing_date=parse_date(
-                safe_get(data, "entityGeneralInfo", "nextStatementDueDate")
-            ),
-            expiration_date=parse_date(
-                safe_get(data, "entityGeneralInfo", "inactiveDate")
-            ),
-            jurisdiction=safe_get(data, "entityGeneralInfo", "jurisdiction"),
-            principal_street=safe_get(data, "sopAddress", "address", "streetAddress"),
-            principal_city=safe_get(data, "sopAddress", "address", "city"),
-            principal_state=safe_get(data, "sopAddress", "address", "state"),
-            principal_postal_code=safe_get(data, "sopAddress", "address", "zipCode"),
-            principal_country=safe_get(data, "sopAddress", "address", "country"),
-            mailing_street=safe_get(data, "poExecAddress", "address", "streetAddress"),
-            mailing_city=safe_get(data, "poExecAddress", "address", "city"),
-            mailing_state=safe_get(data, "poExecAddress", "address", "state"),
-            mailing_postal_code=safe_get(data, "poExecAddress", "address", "zipCode"),
-            mailing_country=safe_get(data, "poExecAddress", "address", "country"),
-            agent_name=safe_get(data, "registeredAgent", "name"),
-            agent_street=safe_get(data, "registeredAgent", "address", "streetAddress"),
-            agent_city=safe_get(data, "registeredAgent", "address", "city"),
-            agent_state=safe_get(data, "registeredAgent", "address", "state"),
-            agent_postal_code=safe_get(data, "registeredAgent", "address", "zipCode"),
-            agent_country=safe_get(data, "registeredAgent", "address", "country"),
-            incorporator_name=safe_get(data, "ceo", "name"),
-            previous_names=[],
-            source_detail_url="",
-            source_last_seen_at=datetime.now(timezone.utc),
-        )
-
-        # name history
-        json_data = {
-            "SearchID": entity["dosID"],
-            "AssumedNameFlag": "false",
-            "ListSortedBy": "ALL",
-            "EntityName": entity["entityName"],
+            "searchValue": prefix,
+            "searchByTypeIndicator": "EntityName",
+            "searchExpressionIndicator": "CONTAINS",
+            "entityStatusIndicator": "AllStatuses",
+            "entityTypeIndicator": [
+                "Corporation",
+                "LimitedLiabilityCompany",
+                "LimitedPartnership",
+                "LimitedLiabilityPartnership",
+            ],
             "listPaginationInfo": {"listStartRecord": 1, "listEndRecord": 50},
         }
-        history = await post_json(
+        data = await post_json(
             session,
-            "https://apps.dos.ny.gov/PublicInquiryWeb/api/PublicInquiry/GetNameHistoryByID",
+            f"{NY_DOS_API_BASE}/GetComplexSearchMatchingEntities",
             json_data,
+            headers=headers,
+            cookies=cookies,
+            semaphore=self.semaphore,
+            max_retries=8,
+            breaker=self.breaker,
         )
-        if isinstance(history, dict):
-            company.previous_names = [
-                safe_get(n, "entityName")
-                for n in history.get("nameHistoryResultList", [])
-            ]
-        return company
-
-    except Exception as e:
-        logger.exception(
-            "Error in get_detailed_entity_data for %s: %s", entity.get("dosID"), e
-        )
-        return None
+        if not data:
+            logger.warning("No data for prefix %s", prefix)
+            return []
 
+        raw_list = data.get("entitySearchResultList") if isinstance(data, dict) else None
+        if not raw_list:
+            logger.info("Empty searchResultList for prefix %s", prefix)
+            return []
+        return raw_list
 
-async def load_checkpoint(session: AsyncSession):
-    result = await session.execute(
-        select(ScraperCheckpoint).where(
-            ScraperCheckpoint.id == f"daily_{date.today()}_newyork"
-        )
-    )
-    checkpoint = result.scalar_one_or_none()
-    if checkpoint and checkpoint.updated_at == date.today():
-        return checkpoint.last_prefix
-    return None
+    def row_key(self, row: dict) -> str:
+        return str(row.get("dosID"))
 
+    def filing_date(self, row: dict) -> date | None:
+        return parse_date(row.get("initialFilingDate"))
 
-async def save_checkpoint(session: AsyncSession, prefix: str):
-    result = await session.execute(
-        select(ScraperCheckpoint).where(
-            ScraperCheckpoint.id == f"daily_{date.today()}_newyork"
-        )
-    )
-    checkpoint = result.scalar_one_or_none()
-    if checkpoint:
-        checkpoint.last_prefix = prefix
-        checkpoint.updated_at = date.today()
-    else:
-        checkpoint = ScraperCheckpoint(
-            id=f"daily_{date.today()}_newyork",
-            last_prefix=prefix,
-            updated_at=date.today(),
-        )
-        session.add(checkpoint)
-    await session.commit()
+    async def detail(self, session: aiohttp.ClientSession, entity: dict, cutoff: date) -> Company | None:
+        try:
+            json_data = {
+                "SearchID": entity["dosID"],
+                "EntityName": entity["entityName"],
+                "AssumedNameFlag": "false",
+            }
+            url = f"{NY_DOS_API_BASE}/GetEntityRecordByID"
+            if NAME_HISTORY_MODE == "concurrent":
+                # detail and name history are independent, so fetch them side by side
+                data, history = await asyncio.gather(
+                    post_json(
+                        session, url, json_data, semaphore=self.semaphore,
+                        headers=headers, cookies=cookies, breaker=self.breaker,
+                    ),
+                    get_name_history(session, entity["dosID"], entity["entityName"]),
+                    return_exceptions=True,
+                )
+                if isinstance(data, BaseException):
+                    raise data
+                if isinstance(history, BaseException):
+                    logger.warning("No name history for dosID %s: %s", entity.get("dosID"), history)
+                    history = None
+            else:
+                data = await post_json(
+                    session, url, json_data, semaphore=self.semaphore,
+                    headers=headers, cookies=cookies, breaker=self.breaker,
+                )
+                history = None
+            if not data:
+                logger.warning("No detail for dosID %s", entity.get("dosID"))
+                return None
+
+            with profiler.stage("parse"):
+                company = parse_company(data, history)
+
+            if NAME_HISTORY_MODE == "deferred" and suggests_prior_name(entity, company, cutoff):
+                pending_name_history.append((company.entity_number, company.entity_name))
+            return company
+
+        except CircuitOpenError:
+            raise
+        except Exception as e:
+            logger.exception(
+                "Error in get_detailed_entity_data for %s: %s", entity.get("dosID"), e
+            )
+            return None
 
+    async def probe(self, session: aiohttp.ClientSession, dos_id: int) -> Company | None:
+        """
+        GetEntityRecordByID for a dosID nobody has searched for yet. Unassigned
+        IDs come back without entityGeneralInfo. Fresh filings cannot have a
+        name history yet (see suggests_prior_name), so none is fetched.
+        """
+        json_data = {
+            "SearchID": str(dos_id),
+            "EntityName": "",
+            "AssumedNameFlag": "false",
+        }
+        try:
+            data = await post_json(
+                session,
+                f"{NY_DOS_API_BASE}/GetEntityRecordByID",
+                json_data,
+                headers=headers,
+                cookies=cookies,
+                semaphore=self.semaphore,
+                max_retries=2,
+                breaker=self.breaker,
+            )
+        except CircuitOpenError:
+            raise
+        except Exception as e:
+            logger.debug("Probe of dosID %s failed: %s", dos_id, e)
+            return None
+        if not isinstance(data, dict) or not safe_get(data, "entityGeneralInfo", "dosID"):
+            return None
+        with profiler.stage("parse"):
+            return parse_company(data)
 
-async def init_db():
-    async with engine.begin() as conn:
-        await conn.run_sync(Base.metadata.create_all)
+    async def filings(self, session: aiohttp.ClientSession, company: dict) -> tuple[list[dict], list[dict]]:
+        """Filing history of one entity: the CEO from the detail record plus the filer of every filing."""
+        dos_id = company["entity_number"]
+        data = await post_json(
+            session,
+            f"{NY_DOS_API_BASE}/GetFilingHistoryByID",
+            {
+                "SearchID": str(dos_id),
+                "EntityName": company["entity_name"],
+                "AssumedNameFlag": "false",
+                "listPaginationInfo": {"listStartRecord": 1, "listEndRecord": 50},
+            },
+            headers=headers,
+            cookies=cookies,
+            semaphore=self.semaphore,
+            breaker=self.breaker,
+        )
+        return parse_filings(dos_id, data, company.get("incorporator_name"))
 
+    def document_request(self, ref: dict) -> tuple[str, str, dict]:
+        return "POST", f"{NY_DOS_API_BASE}/GetDocumentByID", {
+            "json": {"DocumentID": ref["document_id"], "SearchID": str(ref["entity_number"])},
+            "headers": {**headers, "Accept": "application/pdf"},
+            "cookies": cookies,
+        }
 
-# ---------------- Batch processor ----------------
-async def process_batch(session: aiohttp.ClientSession, batch: list[str]):
-    tasks = []
-    async with async_session() as db:
-        for prefix in batch:
-            tasks.append(
-                asyncio.create_task(
-                    process_prefix(session, db, prefix)
-                )
-            )
-        await asyncio.gather(*tasks, return_exceptions=True)
+    def parse_archived(self, endpoint: str, request: dict, body, seen_at: datetime) -> Company | None:
+        if endpoint != "GetEntityRecordByID" or not safe_get(body, "entityGeneralInfo", "dosID"):
+            return None
+        return parse_company(body, seen_at=seen_at)
 
+    def archived_names(self, endpoint: str, request: dict, body) -> tuple[int, list[str]] | None:
+        if endpoint != "GetNameHistoryByID" or not isinstance(body, dict):
+            return None
+        return int(request["SearchID"]), history_names(body)
 
-async def process_prefix(session: aiohttp.ClientSession, db: AsyncSession, prefix: str):
-    try:
-        async with semaphore:
-            await get_entities_data(session, prefix)
-    except Exception as e:
-        logger.exception("Error processing prefix %s: %s", prefix, e)
-    finally:
-        await save_checkpoint(db, prefix)
+    async def after_sweep(self, session: aiohttp.ClientSession):
+        if NAME_HISTORY_MODE == "off":
+            return
+        refresh = dict(pending_name_history)
+        refresh.update(await load_weekly_history_refresh())
+        await backfill_name_history(session, list(refresh.items()))
+        pending_name_history.clear()
 
 
-# ---------------- Runner ----------------
-async def main():
-    start_time = datetime.now(timezone.utc)
-    await init_db()
-    timeout = aiohttp.ClientTimeout(total=120)
+# ---------------- Name history ----------------
+async def get_name_history(session: aiohttp.ClientSession, dos_id, entity_name: str) -> list[str]:
+    json_data = {
+        "SearchID": dos_id,
+        "AssumedNameFlag": "false",
+        "ListSortedBy": "ALL",
+        "EntityName": entity_name,
+        "listPaginationInfo": {"listStartRecord": 1, "listEndRecord": 50},
+    }
+    with profiler.stage("history"):
+        history = await post_json(
+            session,
+            f"{NY_DOS_API_BASE}/GetNameHistoryByID",
+            json_data,
+            headers=headers,
+            cookies=cookies,
+            semaphore=history_semaphore,
+            breaker=breaker,
+        )
+    if not isinstance(history, dict):
+        return []
+    return history_names(history)
 
-    async with aiohttp.ClientSession(timeout=timeout) as session:
-        async with async_session() as db:
-            last_prefix = await load_checkpoint(db)
 
-        start_index = 0
-        if last_prefix and last_prefix in PREFIXES:
-            start_index = PREFIXES.index(last_prefix) + 1
-            logger.info("Resuming from prefix %s", last_prefix)
+def history_names(history: dict) -> list[str]:
+    return [
+        safe_get(n, "entityName")
+        for n in history.get("nameHistoryResultList", [])
+    ]
 
-        BATCH_SIZE = 12
-        batches = [PREFIXES[i : i + BATCH_SIZE] for i in range(start_index, len(PREFIXES), BATCH_SIZE)]
 
-        async with async_session() as db:
-            for batch in batches:
-                logger.info("Processing batch: %s", batch)
-                await process_batch(session, batch)
+def suggests_prior_name(entity: dict, company: Company, cutoff: date) -> bool:
+    """
+    Brand-new filings cannot have been renamed yet. Only entities that were
+    filed before the crawl window, or whose search row carries a different
+    name than the detail record, are worth a history lookup.
+    """
+    if entity.get("entityName") and entity.get("entityName") != company.entity_name:
+        return True
+    return company.registration_date is not None and company.registration_date < cutoff
 
-    async with async_session() as db:
-        all_companies = await get_companies_for_today(session=db, state="NY")
 
-    output_dir = ensure_daily_folder(state="NY", base_dir="/scraper_data")
-    csv_file, ndjson_file = await asyncio.to_thread(export_data, all_companies, output_dir)
+async def backfill_name_history(session: aiohttp.ClientSession, entities: list[tuple[int, str]]):
+    """
+    Fetches name history off the critical path and updates already persisted rows.
+    entities: list of (entity_number, entity_name)
+    """
+    if not entities:
+        return
 
-    crawl_errors = load_error_count()
-    reset_error_count()
+    async def fetch(dos_id, entity_name):
+        try:
+            names = await get_name_history(session, dos_id, entity_name)
+        except Exception as e:
+            logger.warning("Name history backfill failed for dosID %s: %s", dos_id, e)
+            return None
+        if not names:
+            return None
+        return {"entity_number": dos_id, "previous_names": names, "names_hash": field_hash(names)}
 
-    await generate_manifest(
-        companies=all_companies,
-        crawl_errors=crawl_errors,
-        start_time=start_time,
-        output_dir=output_dir,
-        generator="ny_scraper_v1",
-    )
+    results = await asyncio.gather(*(fetch(n, name) for n, name in entities))
+    rows = [r for r in results if r]
+    if rows:
+        async with async_session() as db:
+            async with db.begin():
+                # the stored hash has to follow the column, or the next sighting logs a bogus change
+                await db.execute(
+                    text("""
+                        UPDATE companies SET
+                            previous_names = :previous_names,
+                            field_hashes = jsonb_set(field_hashes, '{previous_names}', to_jsonb(CAST(:names_hash AS text)))
+                        WHERE source_state = 'NY' AND entity_number = :entity_number
+                    """),
+                    rows,
+                )
+    logger.info("Name history backfilled for %d of %d entities", len(rows), len(entities))
 
-    logger.info("Daily export finished for %s companies", len(all_companies))
 
+async def load_weekly_history_refresh() -> list[tuple[int, str]]:
+    """Entities first seen during the last week, refreshed once a week on NAME_HISTORY_REFRESH_WEEKDAY."""
+    if NAME_HISTORY_REFRESH_WEEKDAY < 0 or date.today().weekday() != NAME_HISTORY_REFRESH_WEEKDAY:
+        return []
     async with async_session() as db:
-        checkpoint_id = f"daily_{date.today()}_newyork"
-        await db.execute(
-            text("DELETE FROM scraper_checkpoints WHERE id = :id"),
-            {"id": checkpoint_id},
+        result = await db.execute(
+            text("""
+                SELECT entity_number, entity_name FROM companies
+                WHERE source_state = :state
+                AND source_last_seen_at >= CURRENT_DATE - INTERVAL '7 days'
+            """),
+            {"state": "NY"},
         )
-        await db.commit()
+        return [(row.entity_number, row.entity_name) for row in result]
 
-    logger.info("Scraping completed successfully, checkpoint cleared.")
 
 if __name__ == "__main__":
-    asyncio.run(main())
+    # New York only; `python -m scraper.crawl` crawls every state in SCRAPER_STATES
+    from scraper.crawl import main as crawl_main
+
+    raise SystemExit(crawl_main(["--states", "NY"]))
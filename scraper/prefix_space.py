@@ -0,0 +1,84 @@
+"""
+Lazy view over the search prefix space.
+
+Prefixes are fixed-length words over an alphabet, enumerated in the same order
+as itertools.product. A prefix's index is its base-len(alphabet) number, so
+index <-> prefix conversion is O(1) arithmetic and nothing is materialised.
+Slicing returns another view, which is how resuming, sharding and batching work.
+"""
+from collections.abc import Iterator, Sequence
+
+
+class PrefixSpace(Sequence):
+    def __init__(self, alphabet: str, length: int, indices: range | None = None):
+        self.alphabet = alphabet
+        self.length = length
+        self.base = len(alphabet)
+        self._digits = {ch: i for i, ch in enumerate(alphabet)}
+        self._indices = indices if indices is not None else range(self.base ** length)
+
+    # ---------------- Encoding ----------------
+    def encode(self, number: int) -> str:
+        chars = []
+        for _ in range(self.length):
+            number, digit = divmod(number, self.base)
+            chars.append(self.alphabet[digit])
+        return "".join(reversed(chars))
+
+    def decode(self, prefix: str) -> int:
+        if len(prefix) != self.length:
+            raise ValueError(f"{prefix!r} is not a {self.length}-character prefix")
+        number = 0
+        for ch in prefix:
+            try:
+                number = number * self.base + self._digits[ch]
+            except KeyError:
+                raise ValueError(f"{ch!r} is not in the prefix alphabet") from None
+        return number
+
+    # ---------------- Sequence protocol ----------------
+    def __len__(self) -> int:
+        return len(self._indices)
+
+    def __getitem__(self, key):
+        if isinstance(key, slice):
+            return PrefixSpace(self.alphabet, self.length, self._indices[key])
+        return self.encode(self._indices[key])
+
+    def __iter__(self) -> Iterator[str]:
+        return map(self.encode, self._indices)
+
+    def __contains__(self, prefix) -> bool:
+        try:
+            return self.decode(prefix) in self._indices
+        except (TypeError, ValueError):
+            return False
+
+    def index(self, prefix: str, *args) -> int:
+        try:
+            return self._indices.index(self.decode(prefix))
+        except ValueError:
+            raise ValueError(f"{prefix!r} is not in prefix space") from None
+
+    def __repr__(self) -> str:
+        return f"PrefixSpace(length={self.length}, {self._indices})"
+
+    # ---------------- Iteration helpers ----------------
+    def iter_from(self, offset: int) -> Iterator[str]:
+        return iter(self[offset:])
+
+    def after(self, prefix: str | None) -> "PrefixSpace":
+        """Everything after `prefix` (the whole space if prefix is None or unknown)."""
+        if prefix is None or prefix not in self:
+            return self
+        return self[self.index(prefix) + 1:]
+
+    def shard(self, shard_index: int, shard_count: int) -> "PrefixSpace":
+        """Every shard_count-th prefix starting at shard_index; shards are disjoint and cover the space."""
+        if not 0 <= shard_index < shard_count:
+            raise ValueError("shard_index must be in [0, shard_count)")
+        return self[shard_index::shard_count]
+
+    def batches(self, size: int) -> Iterator[list[str]]:
+        for start in range(0, len(self), size):
+            yield list(self[start:start + size])
@@ -0,0 +1,157 @@
+"""
+Structured crawl progress.
+
+The crawl updates a CrawlProgress as batches finish and periodically writes
+it to SCRAPER_PROGRESS_FILE (atomically), so the runner and health checks can
+read real progress instead of guessing from log output.
+
+While a crawl runs, a heartbeat task samples event-loop lag every
+SCRAPER_LAG_SAMPLE_INTERVAL seconds and rewrites the file at least every
+SCRAPER_HEARTBEAT_INTERVAL seconds, together with the time of the last
+successful DOS request and the recent request rate. scraper.health judges
+liveness from that file alone.
+"""
+import json
+import os
+import time
+from datetime import datetime, timezone
+from pathlib import Path
+
+PROGRESS_FILE = Path(os.getenv("SCRAPER_PROGRESS_FILE", "/tmp/scraper_progress.json"))
+PROGRESS_WRITE_INTERVAL = float(os.getenv("SCRAPER_PROGRESS_INTERVAL", "5"))
+HEARTBEAT_INTERVAL = float(os.getenv("SCRAPER_HEARTBEAT_INTERVAL", "15"))
+LAG_SAMPLE_INTERVAL = float(os.getenv("SCRAPER_LAG_SAMPLE_INTERVAL", "1"))
+# written by ScraperRunner, crawl or not, so a hung runner is noticed between crawls too
+RUNNER_HEARTBEAT_FILE = Path(os.getenv("SCRAPER_RUNNER_HEARTBEAT_FILE", "/tmp/scraper_runner_heartbeat.json"))
+
+
+def write_json(path: Path, data: dict):
+    """Atomic replace; a failed write is ignored, the next one catches up."""
+    try:
+        tmp = path.with_suffix(".tmp")
+        tmp.write_text(json.dumps(data))
+        os.replace(tmp, path)
+    except OSError:
+        pass
+
+
+class CrawlProgress:
+    def __init__(self, path: Path = PROGRESS_FILE, write_interval: float = PROGRESS_WRITE_INTERVAL):
+        self.path = path
+        self.write_interval = write_interval
+        self.state = "idle"
+        self.started_at: datetime | None = None
+        self.prefixes_total = 0
+        self.prefixes_done = 0
+        self.entities_persisted = 0
+        self.requests_ok = 0
+        self.last_request_ok_at: float | None = None  # unix time
+        self.requests_per_min: float | None = None
+        self.loop_lag_ms: float | None = None  # worst sample since the last heartbeat
+        self._started_monotonic = 0.0
+        self._last_write = 0.0
+        self._heartbeat_task = None
+
+    def start(self, prefixes_total: int):
+        self.state = "running"
+        self.started_at = datetime.now(timezone.utc)
+        self.prefixes_total = prefixes_total
+        self.prefixes_done = 0
+        self.entities_persisted = 0
+        self.requests_ok = 0
+        self.last_request_ok_at = None
+        self.requests_per_min = None
+        self.loop_lag_ms = None
+        self._started_monotonic = time.monotonic()
+        # imported here: the health probe reads this module and should not pay for asyncio
+        import asyncio
+
+        try:
+            self._heartbeat_task = asyncio.get_running_loop().create_task(self._heartbeat())
+        except RuntimeError:
+            self._heartbeat_task = None
+        self.write(force=True)
+
+    def add_total(self, prefixes: int):
+        """Each concurrently crawled state adds its own prefixes to the total."""
+        self.prefixes_total += prefixes
+        self.write(force=True)
+
+    def advance(self, prefixes: int = 0, entities: int = 0):
+        self.prefixes_done += prefixes
+        self.entities_persisted += entities
+        self.write()
+
+    def request_ok(self):
+        """Called for every successful DOS request; kept to a counter and a timestamp."""
+        self.requests_ok += 1
+        self.last_request_ok_at = time.time()
+
+    def finish(self, state: str = "finished"):
+        if self._heartbeat_task:
+            self._heartbeat_task.cancel()
+            self._heartbeat_task = None
+        self.state = state
+        self.write(force=True)
+
+    async def _heartbeat(self):
+        import asyncio
+
+        worst = 0.0
+        beat = time.monotonic()
+        requests = self.requests_ok
+        while True:
+            expected = time.monotonic() + LAG_SAMPLE_INTERVAL
+            await asyncio.sleep(LAG_SAMPLE_INTERVAL)
+            now = time.monotonic()
+            worst = max(worst, now - expected)
+            if now - beat < HEARTBEAT_INTERVAL:
+                continue
+            self.loop_lag_ms = round(worst * 1000, 1)
+            self.requests_per_min = round((self.requests_ok - requests) / (now - beat) * 60, 1)
+            worst, beat, requests = 0.0, now, self.requests_ok
+            self.write(force=True)
+
+    def eta_seconds(self) -> float | None:
+        if not self.prefixes_done or not self.prefixes_total:
+            return None
+        elapsed = time.monotonic() - self._started_monotonic
+        remaining = self.prefixes_total - self.prefixes_done
+        return elapsed / self.prefixes_done * remaining
+
+    def snapshot(self) -> dict:
+        eta = self.eta_seconds()
+        return {
+            "state": self.state,
+            "pid": os.getpid(),
+            "started_at": self.started_at.isoformat() if self.started_at else None,
+            "updated_at": datetime.now(timezone.utc).isoformat(),
+            "prefixes_total": self.prefixes_total,
+            "prefixes_done": self.prefixes_done,
+            "entities_persisted": self.entities_persisted,
+            "eta_seconds": round(eta, 1) if eta is not None else None,
+            "requests_ok": self.requests_ok,
+            "last_request_ok_at": (
+                datetime.fromtimestamp(self.last_request_ok_at, timezone.utc).isoformat()
+                if self.last_request_ok_at else None
+            ),
+            "requests_per_min": self.requests_per_min,
+            "loop_lag_ms": self.loop_lag_ms,
+        }
+
+    def write(self, force: bool = False):
+        now = time.monotonic()
+        if not force and now - self._last_write < self.write_interval:
+            return
+        self._last_write = now
+        write_json(self.path, self.snapshot())
+
+
+def read_progress(path: Path = PROGRESS_FILE) -> dict | None:
+    try:
+        return json.loads(path.read_text())
+    except (OSError, ValueError):
+        return None
+
+
+progress = CrawlProgress()
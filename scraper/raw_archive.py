@@ -0,0 +1,193 @@
+"""
+Raw response archive.
+
+With RAW_ARCHIVE=true every successful DOS response (search, detail, name
+history, probes) is appended together with its request to zstd-compressed
+segment files:
+
+    {RAW_ARCHIVE_DIR}/{state_lower}_raw/YYYY/MM/DD/segment-HHMMSS-<pid>-<n>.ndjson.zst
+    {RAW_ARCHIVE_DIR}/{state_lower}_raw/YYYY/MM/DD/index.ndjson
+
+A segment is one zstd stream of NDJSON records
+{"ts", "state", "endpoint", "url", "status", "elapsed_ms", "request", "body"},
+where body is the response text exactly as received. Segments are closed
+after RAW_ARCHIVE_SEGMENT_MB of uncompressed records, at the end of a run,
+or when the UTC day changes; each closed segment gets one line in the day's
+index. A segment without an index line was cut short by a crash.
+
+Compression runs on a background thread so the event loop only pays for a
+queue put. `python -m scraper.reparse` replays the segments through the
+parsers. Requires the zstandard package; without it the archive stays off.
+"""
+import json
+import os
+import queue
+import threading
+from datetime import datetime, timezone
+from pathlib import Path
+from logger import logger
+
+RAW_ARCHIVE = os.getenv("RAW_ARCHIVE", "false").lower() == "true"
+RAW_ARCHIVE_DIR = os.getenv("RAW_ARCHIVE_DIR", "/scraper_data")
+RAW_ARCHIVE_LEVEL = int(os.getenv("RAW_ARCHIVE_LEVEL", "6"))
+RAW_ARCHIVE_SEGMENT_MB = float(os.getenv("RAW_ARCHIVE_SEGMENT_MB", "64"))
+
+INDEX_FILE = "index.ndjson"
+SEGMENT_SUFFIX = ".ndjson.zst"
+
+
+def day_dir(state: str, day, base_dir: str = RAW_ARCHIVE_DIR) -> Path:
+    return Path(base_dir) / f"{state.lower()}_raw" / f"{day:%Y/%m/%d}"
+
+
+class _Segment:
+    """One open segment file; only touched by the writer thread."""
+
+    def __init__(self, folder: Path, number: int, level: int):
+        import zstandard
+
+        folder.mkdir(parents=True, exist_ok=True)
+        opened = datetime.now(timezone.utc)
+        self.folder = folder
+        self.path = folder / f"segment-{opened:%H%M%S}-{os.getpid()}-{number}{SEGMENT_SUFFIX}"
+        self.file = open(self.path, "wb")
+        self.writer = zstandard.ZstdCompressor(level=level).stream_writer(self.file, closefd=False)
+        self.records = 0
+        self.raw_bytes = 0
+        self.endpoints: dict[str, int] = {}
+        self.first_ts = self.last_ts = None
+
+    def write(self, record: dict):
+        line = (json.dumps(record, ensure_ascii=False, separators=(",", ":")) + "\n").encode()
+        self.writer.write(line)
+        self.records += 1
+        self.raw_bytes += len(line)
+        self.endpoints[record["endpoint"]] = self.endpoints.get(record["endpoint"], 0) + 1
+        self.first_ts = self.first_ts or record["ts"]
+        self.last_ts = record["ts"]
+
+    def close(self):
+        self.writer.close()
+        self.file.close()
+        entry = {
+            "segment": self.path.name,
+            "records": self.records,
+            "raw_bytes": self.raw_bytes,
+            "compressed_bytes": self.path.stat().st_size,
+            "endpoints": self.endpoints,
+            "first_ts": self.first_ts,
+            "last_ts": self.last_ts,
+        }
+        # the index line is the segment's commit marker, so it goes last
+        with open(self.folder / INDEX_FILE, "a") as index:
+            index.write(json.dumps(entry) + "\n")
+
+
+class RawArchive:
+    def __init__(
+        self,
+        enabled: bool = RAW_ARCHIVE,
+        base_dir: str = RAW_ARCHIVE_DIR,
+        level: int = RAW_ARCHIVE_LEVEL,
+        segment_mb: float = RAW_ARCHIVE_SEGMENT_MB,
+    ):
+        self.enabled = enabled
+        self.base_dir = base_dir
+        self.level = level
+        self.segment_bytes = int(segment_mb * 1024 * 1024)
+        self.records = 0
+        self._queue: queue.SimpleQueue | None = None
+        self._thread: threading.Thread | None = None
+
+    @property
+    def active(self) -> bool:
+        return self._thread is not None
+
+    def start(self):
+        if not self.enabled or self.active:
+            return
+        try:
+            import zstandard  # noqa: F401
+        except ImportError:
+            logger.warning("RAW_ARCHIVE is set but zstandard is not installed, raw responses are not archived")
+            return
+        self._queue = queue.SimpleQueue()
+        self._thread = threading.Thread(target=self._run, name="raw-archive", daemon=True)
+        self._thread.start()
+        logger.info("Archiving raw responses under %s", self.base_dir)
+
+    def close(self):
+        """Flushes queued records and closes every open segment."""
+        if not self.active:
+            return
+        self._queue.put(None)
+        self._thread.join()
+        self._thread = None
+        self._queue = None
+        logger.info("Raw response archive closed after %d records", self.records)
+
+    def record(self, state: str, url: str, request: dict, status: int, body: str, elapsed: float):
+        """Called for every successful response; a no-op unless the archive is running."""
+        if self._queue is None:
+            return
+        self.records += 1
+        self._queue.put({
+            "ts": datetime.now(timezone.utc).isoformat(),
+            "state": state,
+            "endpoint": url.rstrip("/").rsplit("/", 1)[-1],
+            "url": url,
+            "status": status,
+            "elapsed_ms": round(elapsed * 1000, 1),
+            "request": request,
+            "body": body,
+        })
+
+    def _run(self):
+        segments: dict[str, _Segment] = {}  # "<state> <day>" -> open segment
+        opened = 0
+        while True:
+            record = self._queue.get()
+            if record is None:
+                break
+            try:
+                key = f"{record['state']} {record['ts'][:10]}"
+                segment = segments.get(key)
+                if segment is None:
+                    for stale in [k for k in segments if k.split()[0] == record["state"]]:
+                        segments.pop(stale).close()  # the day rolled over
+                    opened += 1
+                    day = datetime.fromisoformat(record["ts"]).date()
+                    segment = segments[key] = _Segment(day_dir(record["state"], day, self.base_dir), opened, self.level)
+                segment.write(record)
+                if segment.raw_bytes >= self.segment_bytes:
+                    segments.pop(key).close()
+            except Exception as e:
+                logger.error("Raw archive write failed: %s", e)
+        for segment in segments.values():
+            try:
+                segment.close()
+            except Exception as e:
+                logger.error("Could not close raw archive segment %s: %s", segment.path, e)
+
+
+def read_index(folder: Path) -> list[dict]:
+    try:
+        lines = (folder / INDEX_FILE).read_text().splitlines()
+    except OSError:
+        return []
+    return [json.loads(line) for line in lines if line.strip()]
+
+
+def read_segment(path: Path):
+    """Yields the records of one segment in write order."""
+    import io
+    import zstandard
+
+    with open(path, "rb") as f:
+        reader = zstandard.ZstdDecompressor().stream_reader(f)
+        for line in io.TextIOWrapper(reader, encoding="utf-8"):
+            if line.strip():
+                yield json.loads(line)
+
+
+raw_archive = RawArchive()
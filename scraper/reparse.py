@@ -0,0 +1,161 @@
+"""
+Replays archived raw responses (see scraper.raw_archive) through the state
+adapter's parsers into persist_companies, without touching the DOS API.
+
+    python -m scraper.reparse --state NY --from 2026-09-01            # through today
+    python -m scraper.reparse --state NY --from 2026-10-01 --to 2026-10-07 --workers 8
+
+Segments are decompressed and parsed in a process pool, one segment per task;
+the parent only merges results and writes them. Days are replayed oldest
+first and the newest record of an entity wins, so a range should end at the
+latest archived day: replaying an old day on its own puts that day's values
+back. Name histories missing from the replayed range keep the stored
+previous_names. Changed rows are recorded in company_changes as usual.
+Segments without an index line (a crashed run) are skipped unless
+--include-unindexed is given.
+"""
+import argparse
+import asyncio
+import json
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor
+from datetime import date, datetime, timedelta, timezone
+from functools import lru_cache
+from pathlib import Path
+from models import Company
+from scraper.engine import StateAdapter, init_db, load_adapters
+from scraper.raw_archive import RAW_ARCHIVE_DIR, SEGMENT_SUFFIX, day_dir, read_index, read_segment
+from scraper.utils import persist_companies
+from logger import logger
+import event_loop
+
+REPARSE_BATCH_SIZE = int(os.getenv("REPARSE_BATCH_SIZE", "2000"))
+
+
+@lru_cache(maxsize=None)
+def _adapter(state: str) -> StateAdapter:
+    return load_adapters([state])[0]
+
+
+def parse_segment(path: str, state: str) -> tuple[list[dict], dict[int, list[str]], int]:
+    """
+    Worker: (company rows, entity_number -> previous names, records read) for one
+    segment. A truncated segment yields whatever was readable.
+    """
+    adapter = _adapter(state)
+    companies: dict[int, dict] = {}
+    names: dict[int, list[str]] = {}
+    records = 0
+    try:
+        for record in read_segment(Path(path)):
+            records += 1
+            try:
+                body = json.loads(record["body"])
+                company = adapter.parse_archived(
+                    record["endpoint"], record["request"], body, datetime.fromisoformat(record["ts"])
+                )
+                if company is not None:
+                    companies[company.entity_number] = {
+                        k: v for k, v in vars(company).items() if not k.startswith("_")
+                    }
+                    continue
+                named = adapter.archived_names(record["endpoint"], record["request"], body)
+                if named:
+                    names[named[0]] = named[1]
+            except Exception as e:
+                logger.warning("Skipping unparsable %s record in %s: %s", record.get("endpoint"), path, e)
+    except Exception as e:
+        logger.warning("Segment %s is truncated after %d records: %s", path, records, e)
+    return list(companies.values()), names, records
+
+
+def day_segments(state: str, day: date, base_dir: str, include_unindexed: bool) -> list[Path]:
+    folder = day_dir(state, day, base_dir)
+    indexed = [folder / entry["segment"] for entry in read_index(folder)]
+    unindexed = sorted(set(folder.glob(f"*{SEGMENT_SUFFIX}")) - set(indexed)) if folder.exists() else []
+    if unindexed:
+        logger.warning(
+            "%s: %d segment(s) without an index entry%s",
+            folder, len(unindexed), "" if include_unindexed else ", skipped",
+        )
+        if include_unindexed:
+            return indexed + unindexed
+    return indexed
+
+
+async def replay_day(state: str, day: date, futures: list) -> tuple[int, int, int]:
+    """Merges the day's parsed segments and persists them; (records, companies, new companies)."""
+    companies: dict[int, dict] = {}
+    names: dict[int, list[str]] = {}
+    records = 0
+    for rows, segment_names, segment_records in await asyncio.gather(*futures):
+        records += segment_records
+        names.update(segment_names)
+        for row in rows:
+            known = companies.get(row["entity_number"])
+            if known is None or known["source_last_seen_at"] <= row["source_last_seen_at"]:
+                companies[row["entity_number"]] = row
+
+    for number, row in companies.items():
+        # None when the day has no history record: persist_companies keeps the stored names
+        row["previous_names"] = names.get(number)
+
+    rows = list(companies.values())
+    new = 0
+    for i in range(0, len(rows), REPARSE_BATCH_SIZE):
+        new += await persist_companies([Company(**row) for row in rows[i : i + REPARSE_BATCH_SIZE]])
+    logger.info("%s %s: %d archived records, %d companies (%d new)", state, day, records, len(rows), new)
+    return records, len(rows), new
+
+
+async def reparse(
+    state: str,
+    first_day: date,
+    last_day: date,
+    workers: int | None = None,
+    base_dir: str = RAW_ARCHIVE_DIR,
+    include_unindexed: bool = False,
+):
+    await init_db()
+    days = [first_day + timedelta(days=i) for i in range((last_day - first_day).days + 1)]
+    loop = asyncio.get_running_loop()
+    # spawn: the parent runs an event loop and a logging thread, neither survives fork cleanly
+    with ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context("spawn")) as pool:
+        # every segment is queued up front so workers stay busy while earlier days are persisted
+        planned = [
+            (day, [loop.run_in_executor(pool, parse_segment, str(path), state)
+                   for path in day_segments(state, day, base_dir, include_unindexed)])
+            for day in days
+        ]
+        totals = [0, 0, 0]
+        for day, futures in planned:
+            if not futures:
+                continue
+            for i, value in enumerate(await replay_day(state, day, futures)):
+                totals[i] += value
+    logger.info(
+        "Reparse of %s %s..%s done: %d records, %d companies, %d new",
+        state, first_day, last_day, *totals,
+    )
+
+
+def main():
+    # archive days are UTC days, like the daily export folders
+    today = datetime.now(timezone.utc).date()
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--state", default="NY")
+    parser.add_argument("--from", dest="first_day", type=date.fromisoformat, default=today)
+    parser.add_argument("--to", dest="last_day", type=date.fromisoformat, default=today)
+    parser.add_argument("--workers", type=int, default=os.cpu_count())
+    parser.add_argument("--dir", default=RAW_ARCHIVE_DIR, help="base directory of the raw archive")
+    parser.add_argument("--include-unindexed", action="store_true", help="also replay segments of crashed runs")
+    args = parser.parse_args()
+    event_loop.run(reparse(
+        args.state.upper(), args.first_day, args.last_day,
+        workers=args.workers, base_dir=args.dir, include_unindexed=args.include_unindexed,
+    ))
+
+
+if __name__ == "__main__":
+    main()
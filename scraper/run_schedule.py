@@ -0,0 +1,123 @@
+"""
+Daily run scheduling for ScraperRunner.
+
+Start times are cron expressions (minute hour day-of-month month day-of-week,
+supporting *, lists, ranges and steps) evaluated in SCRAPER_TIMEZONE. Run
+state lives in the scraper_runs table, so a restarted container knows what
+already ran, and how many days were missed.
+"""
+from datetime import date, datetime, timedelta, timezone
+from zoneinfo import ZoneInfo
+from sqlalchemy import text
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.ext.asyncio import AsyncSession
+from models import ScraperRun
+
+
+class CronSchedule:
+    RANGES = ((0, 59), (0, 23), (1, 31), (1, 12), (0, 6))
+
+    def __init__(self, expression: str, tz: str = "UTC"):
+        fields = expression.split()
+        if len(fields) != 5:
+            raise ValueError(f"Cron expression needs 5 fields: {expression!r}")
+        self.expression = expression
+        self.tz = ZoneInfo(tz)
+        self.minutes, self.hours, self.days, self.months, self.weekdays = (
+            sorted(self._parse(field, lo, hi)) for field, (lo, hi) in zip(fields, self.RANGES)
+        )
+        # cron semantics: if both day fields are restricted, either may match
+        self._any_day = fields[2] == "*"
+        self._any_weekday = fields[4] == "*"
+
+    @staticmethod
+    def _parse(field: str, lo: int, hi: int) -> set[int]:
+        values = set()
+        for part in field.split(","):
+            step = 1
+            if "/" in part:
+                part, step_text = part.split("/")
+                step = int(step_text)
+            if part == "*":
+                start, end = lo, hi
+            elif "-" in part:
+                start, end = map(int, part.split("-"))
+            else:
+                start = end = int(part)
+            if start < lo or end > hi or step < 1:
+                raise ValueError(f"Cron field {field!r} out of range {lo}-{hi}")
+            values.update(range(start, end + 1, step))
+        return values
+
+    def _day_matches(self, day: date) -> bool:
+        if day.month not in self.months:
+            return False
+        dom = day.day in self.days
+        dow = (day.isoweekday() % 7) in self.weekdays  # cron: 0 = Sunday
+        if self._any_day and self._any_weekday:
+            return True
+        if self._any_day:
+            return dow
+        if self._any_weekday:
+            return dom
+        return dom or dow
+
+    def time_on(self, day: date) -> datetime | None:
+        """First scheduled time on `day` (local), or None if the day is not scheduled."""
+        if not self._day_matches(day):
+            return None
+        return datetime(day.year, day.month, day.day, self.hours[0], self.minutes[0], tzinfo=self.tz)
+
+    def next_after(self, moment: datetime) -> datetime:
+        local = moment.astimezone(self.tz)
+        for offset in range(0, 367):
+            day = local.date() + timedelta(days=offset)
+            if not self._day_matches(day):
+                continue
+            for hour in self.hours:
+                for minute in self.minutes:
+                    candidate = datetime(day.year, day.month, day.day, hour, minute, tzinfo=self.tz)
+                    if candidate > local:
+                        return candidate
+        raise ValueError(f"Cron expression {self.expression!r} never fires")
+
+    def today(self, now: datetime | None = None) -> date:
+        return (now or datetime.now(timezone.utc)).astimezone(self.tz).date()
+
+
+# ---------------- Run state ----------------
+async def last_completed(db: AsyncSession, kind: str) -> date | None:
+    result = await db.execute(
+        text("SELECT max(run_date) FROM scraper_runs WHERE kind = :kind AND status = 'completed'"),
+        {"kind": kind},
+    )
+    return result.scalar()
+
+
+async def is_completed(db: AsyncSession, run_date: date, kind: str) -> bool:
+    result = await db.execute(
+        text("SELECT 1 FROM scraper_runs WHERE run_date = :run_date AND kind = :kind AND status = 'completed'"),
+        {"run_date": run_date, "kind": kind},
+    )
+    return result.scalar() is not None
+
+
+async def record_run(db: AsyncSession, run_date: date, kind: str, status: str):
+    now = datetime.now(timezone.utc)
+    values = {"run_date": run_date, "kind": kind, "status": status}
+    if status == "running":
+        values.update(started_at=now, finished_at=None, attempts=1)
+        update = {
+            "status": status,
+            "started_at": now,
+            "finished_at": None,
+            "attempts": ScraperRun.attempts + 1,
+        }
+    else:
+        values.update(finished_at=now, attempts=1)
+        update = {"status": status, "finished_at": now}
+    stmt = insert(ScraperRun).values(**values).on_conflict_do_update(
+        index_elements=["run_date", "kind"], set_=update
+    )
+    await db.execute(stmt)
+    await db.commit()
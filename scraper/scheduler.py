@@ -0,0 +1,98 @@
+"""
+Prefix scheduling by historical yield.
+
+Every prefix keeps an exponentially decayed count of the new entities it
+produced (prefix_yields table). The daily crawl walks prefixes that are
+overdue for coverage first, then the rest by decayed yield, so a crash late
+in the run loses the least valuable work.
+"""
+from datetime import date
+import os
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncSession
+
+# lexicographic: plain PREFIXES order, resume by last checkpoint prefix
+# yield: high-yield prefixes first, resume by prefixes already crawled today
+PREFIX_ORDER = os.getenv("PREFIX_ORDER", "yield").lower()
+YIELD_HALF_LIFE_DAYS = float(os.getenv("YIELD_HALF_LIFE_DAYS", "7"))
+# every prefix is guaranteed a crawl at least once per window, whatever its yield
+COVERAGE_WINDOW_DAYS = int(os.getenv("COVERAGE_WINDOW_DAYS", "3"))
+
+
+def decayed_score(score: float, score_date: date | None, today: date) -> float:
+    if not score or score_date is None:
+        return 0.0
+    age = max((today - score_date).days, 0)
+    return score * 0.5 ** (age / YIELD_HALF_LIFE_DAYS)
+
+
+async def load_yields(db: AsyncSession, state: str) -> dict[str, tuple[float, date | None, date | None]]:
+    result = await db.execute(
+        text("SELECT prefix, score, score_date, last_crawled FROM prefix_yields WHERE source_state = :state"),
+        {"state": state},
+    )
+    return {row.prefix: (row.score, row.score_date, row.last_crawled) for row in result}
+
+
+def rank_prefixes(prefixes, yields: dict, today: date | None = None) -> list[str]:
+    """
+    Returns the prefixes still to crawl today, best first:
+    overdue prefixes (oldest first), then by decayed yield, then lexicographic.
+    Prefixes already crawled today are dropped, which is what makes resuming work.
+    """
+    today = today or date.today()
+    overdue, ranked = [], []
+    for position, prefix in enumerate(prefixes):
+        score, score_date, last_crawled = yields.get(prefix, (0.0, None, None))
+        if last_crawled == today:
+            continue
+        if last_crawled is None or (today - last_crawled).days >= COVERAGE_WINDOW_DAYS:
+            overdue.append((last_crawled or date.min, position, prefix))
+        else:
+            ranked.append((-decayed_score(score, score_date, today), position, prefix))
+    overdue.sort()
+    ranked.sort()
+    return [p for *_, p in overdue] + [p for *_, p in ranked]
+
+
+async def record_yields(db: AsyncSession, state: str, counts: dict[str, int]):
+    """
+    Folds today's new-entity counts into the decayed score and marks the prefixes as crawled.
+    counts: prefix -> number of new entities found
+    """
+    if not counts:
+        return
+    await db.execute(
+        text("""
+            INSERT INTO prefix_yields (source_state, prefix, score, score_date, last_crawled)
+            VALUES (:state, :prefix, :count, CURRENT_DATE, CURRENT_DATE)
+            ON CONFLICT (source_state, prefix) DO UPDATE SET
+                score = CASE
+                    WHEN prefix_yields.last_crawled = CURRENT_DATE
+                    THEN GREATEST(prefix_yields.score, excluded.score)
+                    ELSE prefix_yields.score
+                        * power(0.5, (CURRENT_DATE - prefix_yields.score_date) / CAST(:half_life AS float))
+                        + excluded.score
+                END,
+                score_date = CURRENT_DATE,
+                last_crawled = CURRENT_DATE
+        """),
+        [
+            {"state": state, "prefix": prefix, "count": float(count), "half_life": YIELD_HALF_LIFE_DAYS}
+            for prefix, count in counts.items()
+        ],
+    )
+    await db.commit()
+
+
+def top_prefixes(prefixes, yields: dict, limit: int, today: date | None = None) -> list[str]:
+    """The `limit` prefixes with the highest decayed yield, for the freshness pass."""
+    today = today or date.today()
+    scored = [
+        (decayed_score(score, score_date, today), prefix)
+        for prefix, (score, score_date, _) in yields.items()
+        if prefix in prefixes
+    ]
+    scored = [item for item in scored if item[0] > 0]
+    scored.sort(reverse=True)
+    return [prefix for _, prefix in scored[:limit]]
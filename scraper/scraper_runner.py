@@ -8,11 +8,15 @@ import signal
 import sys
 import time
 import traceback
-from datetime import datetime, timezone, date
+from datetime import datetime, timezone, date, timedelta
 from pathlib import Path
 import subprocess
 import os
 import logging
+from collections import deque
+import event_loop
+from scraper.progress import HEARTBEAT_INTERVAL, RUNNER_HEARTBEAT_FILE, write_json
+from scraper.run_schedule import CronSchedule, is_completed, last_completed, record_run
 
 # Setup logging
 logging.basicConfig(
@@ -29,6 +33,7 @@ class ScraperRunner:
     def __init__(self):
         self.should_stop = False
         self.current_process = None
+        self.crawling = False
         self.last_run_date = None
         self.consecutive_failures = 0
         
@@ -38,13 +43,26 @@ class ScraperRunner:
         self.restart_on_failure = os.getenv('SCRAPER_RESTART_ON_FAILURE', 'true').lower() == 'true'
         self.daily_restart = os.getenv('SCRAPER_DAILY_RESTART', 'true').lower() == 'true'
         self.log_activity_timeout = int(os.getenv('LOG_ACTIVITY_TIMEOUT', '1800'))  # 30 minutes
+        # subprocess: child process with streamed output; inprocess: crawl in this event loop
+        self.run_mode = os.getenv('SCRAPER_RUN_MODE', 'subprocess').lower()
+        self.progress_log_interval = int(os.getenv('SCRAPER_PROGRESS_LOG_INTERVAL', '300'))
+        # cron expressions (minute hour day month weekday) in SCRAPER_TIMEZONE
+        timezone_name = os.getenv('SCRAPER_TIMEZONE', 'UTC')
+        self.schedule = CronSchedule(os.getenv('SCRAPER_SCHEDULE', '0 0 * * *'), timezone_name)
+        freshness = os.getenv('SCRAPER_FRESHNESS_SCHEDULE', '')
+        self.freshness_schedule = CronSchedule(freshness, timezone_name) if freshness else None
+        self.max_catchup_days = int(os.getenv('SCRAPER_MAX_CATCHUP_DAYS', '7'))
+        # the child drains for SCRAPER_DRAIN_TIMEOUT after SIGTERM; killed if still running after the grace
+        self.drain_timeout = float(os.getenv('SCRAPER_DRAIN_TIMEOUT', '30'))
+        self.drain_grace = float(os.getenv('SCRAPER_DRAIN_GRACE', '15'))
         
         # Ensure logs directory exists
         Path('/app/logs').mkdir(parents=True, exist_ok=True)
         
-        # Setup signal handlers
-        signal.signal(signal.SIGTERM, self._signal_handler)
-        signal.signal(signal.SIGINT, self._signal_handler)
+        # Setup signal handlers (on the loop, so an in-process drain can be requested safely)
+        loop = asyncio.get_running_loop()
+        for signum in (signal.SIGTERM, signal.SIGINT):
+            loop.add_signal_handler(signum, self._signal_handler, signum, None)
         
         logger.info(f"Scraper runner initialized with config:")
         logger.info(f"  - Auto restart: {self.auto_restart}")
@@ -52,14 +70,31 @@ class ScraperRunner:
         logger.info(f"  - Daily restart: {self.daily_restart}")
         logger.info(f"  - Max consecutive failures: {self.max_consecutive_failures}")
         logger.info(f"  - Log activity timeout: {self.log_activity_timeout}s")
+        logger.info(f"  - Run mode: {self.run_mode}")
+        logger.info(f"  - Schedule: {self.schedule.expression} ({timezone_name})")
+        logger.info(f"  - Freshness schedule: {freshness or 'disabled'}")
         
     def _signal_handler(self, signum, frame):
-        """Handle shutdown signals gracefully"""
+        """Handle shutdown signals gracefully: the running crawl drains and checkpoints first"""
         logger.info(f"Received signal {signum}, initiating graceful shutdown...")
         self.should_stop = True
-        if self.current_process:
-            logger.info("Terminating current scraper process...")
+        if self.current_process and self.current_process.returncode is None:
+            logger.info("Asking the scraper process to drain...")
             self.current_process.terminate()
+        elif self.crawling and self.run_mode == "inprocess":
+            from scraper.shutdown import drain
+
+            drain.request(signal.Signals(signum).name)
+
+    async def _escalate_shutdown(self, process):
+        """Kill the child if it has not drained within the deadline after a shutdown signal"""
+        while not self.should_stop:
+            await asyncio.sleep(1)
+        try:
+            await asyncio.wait_for(process.wait(), self.drain_timeout + self.drain_grace)
+        except asyncio.TimeoutError:
+            logger.warning("Scraper process did not drain in time, killing it")
+            process.kill()
     
     def _check_memory_usage(self) -> bool:
         """Check if memory usage is within acceptable limits"""
@@ -83,102 +118,197 @@ class ScraperRunner:
             logger.warning(f"Could not check memory usage: {e}")
             return True
     
-    def _should_run_today(self) -> bool:
-        """Check if scraper should run today"""
-        current_date = date.today()
-        
-        # Always run if we haven't run today
-        if self.last_run_date != current_date:
-            return True
-            
-        # Check if there's a completion marker for today
-        completion_file = f"/tmp/scraper_completed_{current_date}"
-        return not os.path.exists(completion_file)
-    
     def _mark_completion(self):
         """Mark that scraper completed successfully today"""
         current_date = date.today()
-        completion_file = f"/tmp/scraper_completed_{current_date}"
-        
+
         # Update last run tracking
         with open("/tmp/last_scraper_run", "w") as f:
             f.write(str(current_date))
-        
-        # Create completion marker
-        with open(completion_file, "w") as f:
-            f.write(str(datetime.now(timezone.utc)))
-        
+
         self.last_run_date = current_date
         self.consecutive_failures = 0
         logger.info(f"Marked scraper completion for {current_date}")
-    
-    def _cleanup_old_markers(self):
-        """Remove old completion markers"""
-        current_date = date.today()
-        for file_path in Path("/tmp").glob("scraper_completed_*"):
-            try:
-                file_date_str = file_path.name.replace("scraper_completed_", "")
-                file_date = datetime.strptime(file_date_str, "%Y-%m-%d").date()
-                if file_date < current_date:
-                    file_path.unlink()
-                    logger.info(f"Cleaned up old completion marker: {file_path}")
-            except (ValueError, OSError) as e:
-                logger.warning(f"Could not process file {file_path}: {e}")
-    
-    async def _run_scraper(self) -> bool:
-        """Run the scraper process and monitor it"""
-        logger.info("Starting scraper process...")
-        
+
+    async def _init_run_state(self):
+        """Make sure the scraper_runs table exists"""
+        from models import engine, ScraperRun
+
+        async with engine.begin() as conn:
+            await conn.run_sync(ScraperRun.__table__.create, checkfirst=True)
+
+    async def _next_due_run(self) -> tuple[str, date, int] | None:
+        """Returns (kind, run_date, lookback_days) for a run that is due now, or None"""
+        from models import async_session
+
+        now = datetime.now(timezone.utc)
+        today = self.schedule.today(now)
+        async with async_session() as db:
+            last_full = await last_completed(db, "full")
+            lookback = 1
+            if last_full is not None:
+                lookback = min(max((today - last_full).days, 1), self.max_catchup_days)
+
+            start = self.schedule.time_on(today)
+            if start is not None and now >= start and last_full != today:
+                return "full", today, lookback
+
+            # A scheduled day was missed since the last full run: today's run starts now and
+            # its lookback covers the missed days (the crawl's cutoff and export are today's).
+            # Without any run history there is nothing to catch up, the schedule decides.
+            if last_full is not None and last_full != today:
+                for offset in range(1, lookback + 1):
+                    missed = today - timedelta(days=offset)
+                    if missed <= last_full:
+                        break
+                    if self.schedule.time_on(missed) is not None:
+                        logger.info(f"Missed the scheduled run on {missed}, catching up with a {lookback}-day lookback")
+                        return "full", today, lookback
+
+            if self.freshness_schedule and last_full == today:
+                fresh_start = self.freshness_schedule.time_on(today)
+                if fresh_start is not None and now >= fresh_start and not await is_completed(db, today, "freshness"):
+                    return "freshness", today, 1
+        return None
+
+    def _next_wake(self) -> datetime:
+        now = datetime.now(timezone.utc)
+        wake = self.schedule.next_after(now)
+        if self.freshness_schedule:
+            wake = min(wake, self.freshness_schedule.next_after(now))
+        return wake
+
+    async def _sleep(self, seconds: float):
+        """Sleep in short steps so shutdown signals are honoured promptly"""
+        deadline = time.monotonic() + seconds
+        while not self.should_stop:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            await asyncio.sleep(min(remaining, 10))
+
+    async def _run_scraper(self, kind: str = "full", lookback_days: int = 1) -> bool:
+        """Run the scraper (in a child process or in-process) and monitor it"""
+        logger.info(f"Starting scraper ({self.run_mode} mode)...")
+        progress_task = asyncio.create_task(self._log_progress())
+        self.crawling = True
+
         try:
-            # Start the scraper process
-            self.current_process = await asyncio.create_subprocess_exec(
-                sys.executable, "-m", "scraper.new_york_scrapper",
-                stdout=asyncio.subprocess.PIPE,
-                stderr=asyncio.subprocess.PIPE,
-                cwd="/app"
-            )
-            
-            # Monitor the process
-            stdout, stderr = await self.current_process.communicate()
-            
-            if self.current_process.returncode == 0:
-                logger.info("Scraper completed successfully")
-                logger.info(f"Stdout: {stdout.decode()}")
-                self._mark_completion()
-                return True
+            if self.run_mode == "inprocess":
+                success = await self._run_inprocess(kind, lookback_days)
             else:
-                logger.error(f"Scraper failed with return code: {self.current_process.returncode}")
-                logger.error(f"Stderr: {stderr.decode()}")
-                self.consecutive_failures += 1
-                return False
-                
+                success = await self._run_subprocess(kind, lookback_days)
         except Exception as e:
             logger.error(f"Error running scraper: {e}")
             logger.error(traceback.format_exc())
-            self.consecutive_failures += 1
-            return False
+            success = False
         finally:
+            progress_task.cancel()
             self.current_process = None
-    
+            self.crawling = False
+
+        if success:
+            logger.info("Scraper completed successfully")
+            self._mark_completion()
+        else:
+            self.consecutive_failures += 1
+        return success
+
+    async def _run_subprocess(self, kind: str, lookback_days: int) -> bool:
+        """Run the scraper as a child process, streaming its output line by line"""
+        self.current_process = await asyncio.create_subprocess_exec(
+            sys.executable, "-m", "scraper.crawl",
+            stdout=asyncio.subprocess.PIPE,
+            stderr=asyncio.subprocess.STDOUT,
+            cwd="/app",
+            env={**os.environ, "SCRAPER_PASS": kind, "SCRAPER_LOOKBACK_DAYS": str(lookback_days)},
+            limit=1024 * 1024,
+        )
+
+        escalation = asyncio.create_task(self._escalate_shutdown(self.current_process))
+        try:
+            # Forward output as it arrives; only a short tail is kept for failure reports
+            tail = deque(maxlen=50)
+            async for line in self.current_process.stdout:
+                text = line.decode(errors="replace")
+                sys.stdout.write(text)
+                tail.append(text)
+            sys.stdout.flush()
+
+            returncode = await self.current_process.wait()
+        finally:
+            escalation.cancel()
+        if returncode == 0:
+            return True
+        from scraper.shutdown import DRAINED_EXIT_CODE
+
+        if returncode == DRAINED_EXIT_CODE:
+            logger.info("Scraper drained on shutdown; the next run resumes from its checkpoint")
+            return False
+        logger.error(f"Scraper failed with return code: {returncode}")
+        logger.error("Last output:\n" + "".join(tail))
+        return False
+
+    async def _run_inprocess(self, kind: str, lookback_days: int) -> bool:
+        """Run the crawl in the runner's own event loop"""
+        from scraper.engine import main as crawl
+        from scraper.progress import progress
+
+        from scraper.shutdown import CrawlDrained
+
+        try:
+            await crawl(crawl_pass=kind, lookback_days=lookback_days)
+            return True
+        except CrawlDrained:
+            logger.info("Scraper drained on shutdown; the next run resumes from its checkpoint")
+            return False
+        except Exception as e:
+            progress.finish("failed")
+            logger.error(f"In-process scraper failed: {e}")
+            logger.error(traceback.format_exc())
+            return False
+
+    async def _log_progress(self):
+        """Periodically report structured progress published by the crawl"""
+        from scraper.progress import read_progress
+
+        while True:
+            await asyncio.sleep(self.progress_log_interval)
+            snapshot = read_progress()
+            if not snapshot or snapshot.get("state") != "running":
+                continue
+            eta = snapshot.get("eta_seconds")
+            logger.info(
+                f"Progress: {snapshot['prefixes_done']}/{snapshot['prefixes_total']} prefixes, "
+                f"{snapshot['entities_persisted']} entities persisted, "
+                f"ETA {f'{eta / 60:.0f} min' if eta is not None else 'unknown'}"
+            )
+
+    async def _heartbeat(self):
+        """Publish runner liveness for scraper.health, whether a crawl is running or not"""
+        while True:
+            write_json(RUNNER_HEARTBEAT_FILE, {
+                "pid": os.getpid(),
+                "updated_at": datetime.now(timezone.utc).isoformat(),
+                "crawling": self.crawling,
+            })
+            await asyncio.sleep(HEARTBEAT_INTERVAL)
+
     def _calculate_wait_time(self) -> int:
-        """Calculate how long to wait before next run"""
-        if self.consecutive_failures == 0:
-            # Successful run - wait until next day
-            return 3600  # Check every hour if it's a new day
-        elif self.consecutive_failures <= 2:
+        """Calculate how long to wait before retrying a failed run"""
+        if self.consecutive_failures <= 2:
             # Few failures - wait 10 minutes
             return 600
         else:
             # Many failures - wait 30 minutes
             return 1800
-    
+
     async def run(self):
         """Main runner loop"""
         logger.info("Scraper runner starting...")
-        
-        # Clean up old markers on startup
-        self._cleanup_old_markers()
-        
+        heartbeat_task = asyncio.create_task(self._heartbeat())
+        await self._init_run_state()
+
         while not self.should_stop:
             try:
                 # Check memory usage periodically
@@ -186,50 +316,54 @@ class ScraperRunner:
                     logger.warning("Memory usage too high, requesting restart...")
                     if self.auto_restart:
                         break  # Exit loop to restart container
-                
-                if self._should_run_today():
-                    if self.consecutive_failures >= self.max_consecutive_failures:
-                        if not self.restart_on_failure:
-                            logger.error(
-                                f"Too many consecutive failures ({self.consecutive_failures}). "
-                                "Auto-restart disabled, stopping."
-                            )
-                            break
-                        
-                        logger.warning(
+
+                if self.consecutive_failures >= self.max_consecutive_failures:
+                    if not self.restart_on_failure:
+                        logger.error(
                             f"Too many consecutive failures ({self.consecutive_failures}). "
-                            "Waiting longer before retry..."
+                            "Auto-restart disabled, stopping."
                         )
-                        await asyncio.sleep(3600)  # Wait 1 hour
-                        self.consecutive_failures = 0  # Reset after long wait
-                        continue
-                    
-                    logger.info("Running scraper for today...")
-                    success = await self._run_scraper()
-                    
-                    if not success and self.should_stop:
-                        logger.info("Scraper interrupted by shutdown signal")
                         break
-                        
-                else:
-                    logger.info("Scraper already completed for today")
-                    self.consecutive_failures = 0
-                
-                # Wait before next check
-                wait_time = self._calculate_wait_time()
-                logger.info(f"Waiting {wait_time} seconds before next check...")
-                
-                # Wait with periodic checks for shutdown signal
-                for _ in range(wait_time // 10):
+
+                    logger.warning(
+                        f"Too many consecutive failures ({self.consecutive_failures}). "
+                        "Waiting longer before retry..."
+                    )
+                    await self._sleep(3600)  # Wait 1 hour
+                    self.consecutive_failures = 0  # Reset after long wait
+                    continue
+
+                due = await self._next_due_run()
+                if due is None:
+                    wake = self._next_wake()
+                    logger.info(f"Nothing due, next scheduled run at {wake.isoformat()}")
+                    await self._sleep((wake - datetime.now(timezone.utc)).total_seconds())
+                    continue
+
+                kind, run_date, lookback_days = due
+                logger.info(f"Running {kind} crawl for {run_date} (lookback {lookback_days} days)...")
+                from models import async_session
+
+                async with async_session() as db:
+                    await record_run(db, run_date, kind, "running")
+                success = await self._run_scraper(kind, lookback_days)
+                async with async_session() as db:
+                    await record_run(db, run_date, kind, "completed" if success else "failed")
+
+                if not success:
                     if self.should_stop:
+                        logger.info("Scraper interrupted by shutdown signal")
                         break
-                    await asyncio.sleep(10)
-                
+                    wait_time = self._calculate_wait_time()
+                    logger.info(f"Waiting {wait_time} seconds before retry...")
+                    await self._sleep(wait_time)
+
             except Exception as e:
                 logger.error(f"Unexpected error in runner loop: {e}")
                 logger.error(traceback.format_exc())
                 await asyncio.sleep(60)  # Wait 1 minute on unexpected errors
-        
+
+        heartbeat_task.cancel()
         logger.info("Scraper runner shutting down...")
 
 async def main():
@@ -239,7 +373,7 @@ async def main():
 
 if __name__ == "__main__":
     try:
-        asyncio.run(main())
+        event_loop.run(main())
     except KeyboardInterrupt:
         logger.info("Received keyboard interrupt, shutting down...")
     except Exception as e:
@@ -0,0 +1,99 @@
+"""
+Graceful drain on SIGTERM/SIGINT.
+
+A drain request stops the crawl from starting new prefix batches, probe
+windows or document batches. Work already in flight gets DRAIN_TIMEOUT
+seconds to finish (gather_draining); whatever is still running then is
+cancelled. The current batch's finished prefixes are persisted and the
+checkpoint only moves past prefixes that finished, so the next run picks
+up exactly the unfinished ones. The crawl then raises CrawlDrained instead
+of exporting, and `python -m scraper.crawl` exits with DRAINED_EXIT_CODE.
+
+A second signal while draining cancels in-flight work at once.
+ScraperRunner forwards SIGTERM to the child and waits
+SCRAPER_DRAIN_TIMEOUT + SCRAPER_DRAIN_GRACE before killing it.
+"""
+import asyncio
+import os
+import signal
+import time
+from logger import logger
+
+DRAIN_TIMEOUT = float(os.getenv("SCRAPER_DRAIN_TIMEOUT", "30"))
+DRAINED_EXIT_CODE = 75  # EX_TEMPFAIL: stopped on request, resume on the next run
+
+
+class CrawlDrained(Exception):
+    """The crawl stopped early on a drain request; its progress is checkpointed."""
+
+
+class Drain:
+    def __init__(self, timeout: float = DRAIN_TIMEOUT):
+        self.timeout = timeout
+        self.deadline: float | None = None
+        self._event: asyncio.Event | None = None
+
+    @property
+    def requested(self) -> bool:
+        return self.deadline is not None
+
+    def _ensure_event(self) -> asyncio.Event:
+        if self._event is None:
+            self._event = asyncio.Event()
+        return self._event
+
+    def request(self, reason: str = "shutdown requested"):
+        if self.requested:
+            # second request: stop waiting for in-flight work
+            logger.warning("Drain forced (%s), cancelling in-flight requests", reason)
+            self.deadline = time.monotonic()
+        else:
+            logger.info("Draining (%s): no new work, %gs for in-flight requests", reason, self.timeout)
+            self.deadline = time.monotonic() + self.timeout
+        self._ensure_event().set()
+
+    def remaining(self) -> float:
+        return max(self.deadline - time.monotonic(), 0.0) if self.requested else self.timeout
+
+    async def wait(self):
+        await self._ensure_event().wait()
+
+    def check(self):
+        """Raises CrawlDrained once a drain was requested; called between units of work."""
+        if self.requested:
+            raise CrawlDrained("drained on shutdown request")
+
+    def install_signal_handlers(self):
+        loop = asyncio.get_running_loop()
+        for signum in (signal.SIGTERM, signal.SIGINT):
+            loop.add_signal_handler(signum, self.request, signal.Signals(signum).name)
+
+    def remove_signal_handlers(self):
+        loop = asyncio.get_running_loop()
+        for signum in (signal.SIGTERM, signal.SIGINT):
+            loop.remove_signal_handler(signum)
+
+
+async def gather_draining(tasks: list[asyncio.Task]) -> list:
+    """
+    Like gather(return_exceptions=True), except that on a drain request the
+    tasks get what is left of the drain deadline and are then cancelled;
+    cancelled tasks come back as CancelledError.
+    """
+    if not tasks:
+        return []
+    everything = asyncio.gather(*tasks, return_exceptions=True)
+    drained = asyncio.ensure_future(drain.wait())
+    try:
+        await asyncio.wait({everything, drained}, return_when=asyncio.FIRST_COMPLETED)
+        # polled rather than awaited once, so a forced drain takes effect too
+        while not everything.done() and drain.remaining() > 0:
+            await asyncio.wait({everything}, timeout=min(drain.remaining(), 0.5))
+    finally:
+        drained.cancel()
+        for task in tasks:
+            task.cancel()
+    return await everything
+
+
+drain = Drain()
@@ -1,23 +1,41 @@
-from itertools import product
 from datetime import datetime, timezone, date
 import aiohttp
 from logger import logger
+from daily_folder import init_daily_errors_file
 from asyncio import Semaphore
 import asyncio
 from aiohttp import ContentTypeError, ClientError
 import json
 import random
-from models import Company, async_session
+from models import Company, CompanyChange, async_session, bulk_mode
+from scraper.changes import UNTRACKED_FIELDS, diff_row, field_hashes, jsonable
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import bindparam, text, update
+from models.partitioning import company_conflict_target
+from models.dimensions import COMPANY_DIMENSIONS
 from sqlalchemy.dialects.postgresql import insert
 import pathlib
-from exporter import init_daily_errors_file
-TEMP_ERRORS_FILE = init_daily_errors_file(state="NY", base_dir="/scraper_data")
+import os
+import time
+from scraper.dimensions import key_cache, resolve_dimensions
+from scraper.circuit_breaker import BlockDetected, CircuitBreaker, CircuitOpenError, looks_blocked
+from scraper.latency import HedgeBudget, LatencyTracker, endpoint_of, hedged
+from scraper.prefix_space import PrefixSpace
+from scraper.progress import progress
+from scraper.raw_archive import raw_archive
+from functools import lru_cache
+from contextvars import ContextVar
 
-alphabet = list("ABCDEFGHIJKLMNOPQRSTUVWXYZ0123456789 &()-'./")
-def generate_prefixes():
-    for combo in product(alphabet, repeat=3):
-        yield ''.join(combo)
-PREFIXES = list(generate_prefixes())
+latency = LatencyTracker.from_env()
+HEDGE_REQUESTS = os.getenv("HEDGE_REQUESTS", "true").lower() == "true"
+# at most ~5% extra requests; benchmarks/bench_hedging.py checks the increase against that cap
+hedge_budget = HedgeBudget(ratio=float(os.getenv("HEDGE_BUDGET_RATIO", "0.05")))
+
+alphabet = "ABCDEFGHIJKLMNOPQRSTUVWXYZ0123456789 &()-'./"
+PREFIXES = PrefixSpace(alphabet, 3)
+
+# state whose crawl the current task belongs to; set by CrawlEngine.run
+crawl_state: ContextVar[str] = ContextVar("crawl_state", default="NY")
 
 # ---------------- Helpers ----------------
 def safe_get(d: dict, *keys, default=None):
@@ -49,70 +67,142 @@ def parse_date(s):
                 continue
     return None
 
+@lru_cache(maxsize=16)
+def _errors_file(state: str, day: date, base_dir: str = "/scraper_data") -> pathlib.Path:
+    return init_daily_errors_file(state=state, base_dir=base_dir, target_date=day)
+
+def errors_file() -> pathlib.Path:
+    """
+    Daily crawl error counter of the current state; created on first use rather than at import.
+    Keyed by day too: an in-process runner keeps this module loaded across days.
+    """
+    return _errors_file(crawl_state.get(), datetime.now(timezone.utc).date())
+
 def load_error_count() -> int:
-    if TEMP_ERRORS_FILE.exists():
+    if errors_file().exists():
         try:
-            return int(TEMP_ERRORS_FILE.read_text())
+            return int(errors_file().read_text())
         except Exception:
             return 0
     return 0
 
 def save_error_count(count: int):
-    TEMP_ERRORS_FILE.write_text(str(count))
+    errors_file().write_text(str(count))
 
 def reset_error_count():
-    if TEMP_ERRORS_FILE.exists():
-        TEMP_ERRORS_FILE.unlink()
+    if errors_file().exists():
+        errors_file().unlink()
 
         
+async def _post_once(
+    session: aiohttp.ClientSession,
+    url: str,
+    json_data: dict,
+    timeout: float,
+    headers,
+    cookies,
+    breaker: CircuitBreaker | None,
+) -> dict | list:
+    """Single POST attempt; raises ClientError on anything but a JSON 200."""
+    started = time.perf_counter()
+    async with session.post(
+        url, json=json_data, headers=headers, cookies=cookies,
+        timeout=aiohttp.ClientTimeout(total=timeout),
+    ) as resp:
+        text = await resp.text()
+        if breaker and looks_blocked(resp.status, resp.content_type, text):
+            await breaker.record_block(f"status {resp.status} from {url}")
+            raise BlockDetected(f"Blocked response {resp.status}")
+        if resp.status != 200:
+            logger.warning(
+                "Bad status %s for %s. Body starts: %.200s",
+                resp.status, url, text
+            )
+            # Retry only on server errors (5xx)
+            if 500 <= resp.status < 600:
+
+                raise ClientError(f"Server error {resp.status}")
+            # For 4xx or other codes, fail immediately
+            raise ClientError(f"Non-retriable status {resp.status}")
+
+        # Parse JSON robustly
+        try:
+            data = await resp.json()
+        except ContentTypeError:
+            # Fallback if content-type is wrong
+            try:
+                data = json.loads(text)
+            except Exception:
+                raise ClientError("Invalid JSON body")
+        if not isinstance(data, (dict, list)):
+            raise ClientError("Response is not dict/list")
+        elapsed = time.perf_counter() - started
+        latency.observe(endpoint_of(url), elapsed)
+        raw_archive.record(crawl_state.get(), url, json_data, resp.status, text, elapsed)
+        if breaker:
+            breaker.record_success()
+        progress.request_ok()
+        return data
+
+
 async def post_json(
     session: aiohttp.ClientSession,
     url: str,
     json_data: dict,
+    semaphore: Semaphore,
     max_retries: int = 4,
     base_backoff: float = 0.5,
-    timeout: float = 120.0,
+    timeout: float | None = None,
     headers=None,
     cookies=None,
-    semaphore: Semaphore = Semaphore(10),
+    breaker: CircuitBreaker | None = None,
+    hedge: bool = HEDGE_REQUESTS,
 ) -> dict | list:
     """
     Robust POST + JSON parser with retries, exponential backoff, and semaphore limiting.
+    The semaphore is the caller's (usually its adapter's), there is no shared default.
+    Without an explicit timeout, the endpoint's timeout follows its observed p99 latency.
+    With hedge, a still-running attempt gets a duplicate after the endpoint's p99
+    (all DOS endpoints used here are read-only, so duplicates are safe).
+    With a breaker, block/challenge responses are reported to it and do not use up
+    retries while the breaker is refreshing the session.
     Raises ClientError if permanently failed.
     """
+    endpoint = endpoint_of(url)
     attempt = 0
     while attempt < max_retries:
         try:
+            if breaker:
+                await breaker.wait()
+            hedge_budget.record_request()
+
+            def make_request():
+                return _post_once(
+                    session, url, json_data,
+                    timeout or latency.timeout_for(endpoint),
+                    headers, cookies, breaker,
+                )
+
+            # the hedge delay only starts once the primary holds a slot; a hedged
+            # duplicate runs outside the semaphore, bounded by the hedge budget
+            delay = latency.hedge_delay(endpoint) if hedge else None
             async with semaphore:
-                async with session.post(url, json=json_data, headers=headers, cookies=cookies, timeout=timeout) as resp:
-                    text = await resp.text()
-                    if resp.status != 200:
-                        logger.warning(
-                            "Bad status %s for %s (attempt %d). Body starts: %.200s",
-                            resp.status, url, attempt + 1, text
-                        )
-                        # Retry only on server errors (5xx)
-                        if 500 <= resp.status < 600:
-
-                            raise ClientError(f"Server error {resp.status}")
-                        # For 4xx or other codes, fail immediately
-                        raise ClientError(f"Non-retriable status {resp.status}")
-
-                    # Parse JSON robustly
-                    try:
-                        data = await resp.json()
-                        if not isinstance(data, (dict, list)):
-                            raise ClientError("Response is not dict/list")
-                        return data
-                    except ContentTypeError:
-                        # Fallback if content-type is wrong
-                        try:
-                            data = json.loads(text)
-                            if not isinstance(data, (dict, list)):
-                                raise ClientError("Response is not dict/list")
-                            return data
-                        except Exception:
-                            raise ClientError("Invalid JSON body")
+                return await hedged(make_request, delay, hedge_budget)
+        except CircuitOpenError:
+            current_errors = load_error_count()
+            save_error_count(current_errors + 1)
+            raise
+        except BlockDetected as e:
+            if breaker.is_open:
+                # the breaker is refreshing the session; wait for it instead of spending a retry
+                continue
+            attempt += 1
+            if attempt >= max_retries:
+                logger.error("Giving up on %s after %d blocked attempts", url, max_retries)
+                current_errors = load_error_count()
+                save_error_count(current_errors + 1)
+                raise ClientError("Max retries exceeded")
+            await asyncio.sleep(base_backoff * (2 ** (attempt - 1)) + random.uniform(0, 0.3))
         except (ClientError, asyncio.TimeoutError, aiohttp.ServerTimeoutError) as e:
             attempt += 1
             if attempt < max_retries:
@@ -170,10 +260,11 @@ def make_aware(dt):
 
 
 # ---------------- DB persistence ----------------
-async def persist_companies(companies):
+async def persist_companies(companies, db: AsyncSession | None = None) -> int:
     """
     Batched insert using postgres ON CONFLICT DO NOTHING.
     companies: list of Company-like objects or dicts
+    db: session to reuse (committed here); a new one is opened if omitted
     """
     rows = []
     for c in companies:
@@ -212,10 +303,92 @@ async def persist_companies(companies):
             'source_last_seen_at': getattr(c, 'source_last_seen_at', None),
         })
     if not rows:
-        return
-    stmt = insert(Company).on_conflict_do_nothing(index_elements=['entity_number'])
-    async with async_session() as session:
-        async with session.begin():
-            # pass rows as params for bulk insert
-            await session.execute(stmt, rows)
-    logger.info("Persisted %d companies (duplicates skipped).", len(rows))
+        return 0
+    if db is None:
+        async with async_session() as session:
+            return await persist_companies(companies, db=session)
+
+    # the same entity often turns up under several prefixes of a batch
+    rows = list({(r['source_state'], r['entity_number']): r for r in rows}.values())
+    for r in rows:
+        # None: name history was not fetched, which is not the same as having no prior names
+        if r.get('previous_names') is None:
+            r.pop('previous_names', None)
+        r['field_hashes'] = field_hashes(r)
+
+    # entity numbers are only unique within a state
+    existing = await db.execute(
+        text("""
+            SELECT c.source_state, c.entity_number, c.field_hashes FROM companies c
+            JOIN unnest(CAST(:states AS text[]), CAST(:numbers AS integer[])) AS k(source_state, entity_number)
+            ON c.source_state = k.source_state AND c.entity_number = k.entity_number
+        """),
+        {"states": [r['source_state'] for r in rows], "numbers": [r['entity_number'] for r in rows]},
+    )
+    stored = {(state, number): hashes for state, number, hashes in existing}
+    new_rows = [r for r in rows if (r['source_state'], r['entity_number']) not in stored]
+    for r in new_rows:
+        if 'previous_names' not in r:
+            r['previous_names'] = []
+            r['field_hashes'] = field_hashes(r)
+
+    changed, changes = [], []
+    for r in rows:
+        key = (r['source_state'], r['entity_number'])
+        if key not in stored:
+            continue
+        stored_hashes = stored[key]
+        if stored_hashes is None:
+            # row predates change tracking: take today's values as the baseline
+            changed.append(r)
+            continue
+        diff = diff_row(r, r['field_hashes'], stored_hashes)
+        if diff:
+            if 'previous_names' not in r and 'previous_names' in stored_hashes:
+                r['field_hashes'] = {**r['field_hashes'], 'previous_names': stored_hashes['previous_names']}
+            changed.append(r)
+            changes.append({
+                'source_state': r['source_state'],
+                'entity_number': r['entity_number'],
+                'diff': jsonable(diff),
+            })
+
+    await bulk_mode(db)
+    new_keys = []
+    if COMPANY_DIMENSIONS:
+        # after the diffs, which keep the agent/address text rather than keys
+        new_keys = await resolve_dimensions(db, rows)
+    if new_rows:
+        # with partitioning the unique index includes the partition key, so known entities
+        # are filtered above rather than relying on the conflict clause alone
+        stmt = insert(Company).on_conflict_do_nothing(index_elements=company_conflict_target())
+        # pass rows as params for bulk insert
+        await db.execute(stmt, new_rows)
+    # rows without fetched name history leave previous_names out of the UPDATE
+    by_fields: dict[tuple, list[dict]] = {}
+    for r in changed:
+        tracked = tuple(f for f in r if f not in UNTRACKED_FIELDS or f == 'field_hashes')
+        by_fields.setdefault(tracked, []).append(r)
+    table = Company.__table__
+    for tracked, group in by_fields.items():
+        stmt = (
+            update(table)
+            .where(table.c.source_state == bindparam('_source_state'))
+            .where(table.c.entity_number == bindparam('_entity_number'))
+            .values({f: bindparam(f) for f in tracked})
+        )
+        await db.execute(stmt, [
+            {**{f: r[f] for f in tracked}, '_source_state': r['source_state'], '_entity_number': r['entity_number']}
+            for r in group
+        ])
+    if changes:
+        await db.execute(insert(CompanyChange), changes)
+    await db.commit()
+    key_cache.update(new_keys)
+
+    progress.advance(entities=len(new_rows))
+    logger.info(
+        "Persisted %d new companies, %d changed (%d already known).",
+        len(new_rows), len(changes), len(rows) - len(new_rows),
+    )
+    return len(new_rows)